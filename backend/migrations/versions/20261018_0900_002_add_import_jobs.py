@@ -0,0 +1,46 @@
+"""Add import jobs table for streaming Excel imports
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create import_jobs table
+    op.create_table('import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('import_type', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), default='pending', nullable=True),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('processed_rows', sa.Integer(), default=0, nullable=True),
+        sa.Column('success_count', sa.Integer(), default=0, nullable=True),
+        sa.Column('error_count', sa.Integer(), default=0, nullable=True),
+        sa.Column('errors_json', sa.Text(), nullable=True),
+        sa.Column('preview_json', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_index('idx_import_jobs_created_by', 'import_jobs', ['created_by'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_import_jobs_created_by', table_name='import_jobs')
+    op.drop_table('import_jobs')
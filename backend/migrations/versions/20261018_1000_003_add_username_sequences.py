@@ -0,0 +1,36 @@
+"""Add per-role username sequences for batch username allocation
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create username_sequences table
+    username_sequences = op.create_table('username_sequences',
+        sa.Column('prefix', sa.String(length=10), nullable=False),
+        sa.Column('last_value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('prefix')
+    )
+
+    # Seed one row per role so workers only ever UPDATE existing rows
+    op.bulk_insert(username_sequences, [
+        {'prefix': prefix, 'last_value': 10000}
+        for prefix in ('st', 'tr', 'pr', 'ad', 'us')
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('username_sequences')
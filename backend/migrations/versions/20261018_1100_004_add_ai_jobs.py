@@ -0,0 +1,48 @@
+"""Add AI jobs table for asynchronous AI analysis
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create ai_jobs table
+    op.create_table('ai_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(length=30), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('params_json', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), default='pending', nullable=True),
+        sa.Column('result_json', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('total_items', sa.Integer(), default=1, nullable=True),
+        sa.Column('processed_items', sa.Integer(), default=0, nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.ForeignKeyConstraint(['created_by'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_index('idx_ai_jobs_status', 'ai_jobs', ['status'])
+    op.create_index('idx_ai_jobs_created_by', 'ai_jobs', ['created_by'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ai_jobs_created_by', table_name='ai_jobs')
+    op.drop_index('idx_ai_jobs_status', table_name='ai_jobs')
+    op.drop_table('ai_jobs')
@@ -0,0 +1,29 @@
+"""Add cache key to AI insights for content-addressed caching
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ai_insight', sa.Column('cache_key', sa.String(length=64), nullable=True))
+    op.create_index('idx_ai_insight_cache_key', 'ai_insight', ['cache_key'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ai_insight_cache_key', table_name='ai_insight')
+    # batch mode so the column can also be dropped on SQLite
+    with op.batch_alter_table('ai_insight') as batch_op:
+        batch_op.drop_column('cache_key')
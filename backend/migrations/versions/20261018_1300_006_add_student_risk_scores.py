@@ -0,0 +1,44 @@
+"""Add student risk scores table for local risk screening
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create student_risk_scores table
+    op.create_table('student_risk_scores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('risk_score', sa.Integer(), nullable=False),
+        sa.Column('risk_level', sa.String(length=10), nullable=False),
+        sa.Column('academic_decline', sa.Boolean(), default=False, nullable=True),
+        sa.Column('poor_attendance', sa.Boolean(), default=False, nullable=True),
+        sa.Column('behavioral_issues', sa.Boolean(), default=False, nullable=True),
+        sa.Column('grade_trend', sa.String(length=20), default='stable', nullable=True),
+        sa.Column('attendance_rate', sa.Float(), default=0, nullable=True),
+        sa.Column('negative_behavior_ratio', sa.Float(), default=0, nullable=True),
+        sa.Column('scored_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('student_id')
+    )
+
+    op.create_index('idx_student_risk_scores_risk_level', 'student_risk_scores', ['risk_level'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_student_risk_scores_risk_level', table_name='student_risk_scores')
+    op.drop_table('student_risk_scores')
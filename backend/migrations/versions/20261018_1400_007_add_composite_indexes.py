@@ -0,0 +1,73 @@
+"""Add composite indexes for the per-student filter and ordering paths
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('idx_student_user_id', 'student', ['user_id']),
+    ('idx_student_class_name', 'student', ['class_name']),
+    ('idx_teacher_user_id', 'teacher', ['user_id']),
+    ('idx_parent_user_id', 'parent', ['user_id']),
+    ('idx_parent_student_parent_student', 'parent_student', ['parent_id', 'student_id']),
+    ('idx_parent_student_student_id', 'parent_student', ['student_id']),
+    ('idx_grade_student_date', 'grade', ['student_id', 'date_recorded']),
+    ('idx_attendance_student_date', 'attendance', ['student_id', 'date']),
+    ('idx_attendance_student_status', 'attendance', ['student_id', 'status']),
+    ('idx_behavior_note_student_date', 'behavior_note', ['student_id', 'date_recorded']),
+    ('idx_tuition_student_created', 'tuition', ['student_id', 'created_at']),
+    ('idx_ai_insight_student_active_generated', 'ai_insight', ['student_id', 'is_active', 'generated_at']),
+    ('idx_enrollments_student_status', 'enrollments', ['student_id', 'status']),
+    ('idx_student_grades_student_published', 'student_grades', ['student_id', 'is_published', 'recorded_at']),
+    ('idx_attendance_records_student_date', 'attendance_records', ['student_id', 'attendance_date']),
+    ('idx_attendance_records_classroom_date', 'attendance_records', ['classroom_id', 'attendance_date']),
+    ('idx_notifications_user_read', 'notifications', ['user_id', 'is_read', 'created_at']),
+    ('idx_assignment_submissions_student_assignment', 'assignment_submissions', ['student_id', 'assignment_id']),
+]
+
+# Indexes from 001 that are now a leftmost prefix of one of the composites above
+SUPERSEDED_INDEXES = [
+    ('idx_enrollments_student', 'enrollments', ['student_id']),
+    ('idx_student_grades_student', 'student_grades', ['student_id']),
+    ('idx_attendance_student', 'attendance_records', ['student_id']),
+    ('idx_notifications_user', 'notifications', ['user_id']),
+    ('idx_notifications_unread', 'notifications', ['user_id', 'is_read']),
+]
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    # assignment_submissions is created by db.create_all(), not by a migration
+    tables = _existing_tables()
+    for name, table, columns in INDEXES:
+        if table in tables:
+            op.create_index(name, table, columns)
+
+    for name, table, columns in SUPERSEDED_INDEXES:
+        op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    for name, table, columns in SUPERSEDED_INDEXES:
+        op.create_index(name, table, columns)
+
+    tables = _existing_tables()
+    for name, table, columns in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table)
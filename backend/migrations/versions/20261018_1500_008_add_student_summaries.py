@@ -0,0 +1,164 @@
+"""Add materialized per-student summary table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tables as they are at this revision: the backfill must not follow later model changes
+student = sa.table('student', sa.column('id', sa.Integer()))
+grade = sa.table(
+    'grade', sa.column('id', sa.Integer()), sa.column('student_id', sa.Integer()),
+    sa.column('subject', sa.String()), sa.column('grade', sa.Float()), sa.column('date_recorded', sa.DateTime())
+)
+attendance = sa.table(
+    'attendance', sa.column('id', sa.Integer()), sa.column('student_id', sa.Integer()),
+    sa.column('status', sa.String()), sa.column('date', sa.Date())
+)
+behavior_note = sa.table(
+    'behavior_note', sa.column('id', sa.Integer()), sa.column('student_id', sa.Integer()),
+    sa.column('note_type', sa.String()), sa.column('date_recorded', sa.DateTime())
+)
+ATTENDANCE_STATUSES = ('present', 'absent', 'late', 'excused')
+BEHAVIOR_TYPES = ('positive', 'negative', 'neutral')
+
+
+def _count_where(column, value):
+    return sa.func.sum(sa.case((column == value, 1), else_=0))
+
+
+def _zero(column):
+    return sa.func.coalesce(column, 0)
+
+
+def _order_key(recorded_at, row_id):
+    return [recorded_at.isoformat() if recorded_at else '', row_id]
+
+
+def backfill(connection, summaries):
+    """
+    One summary row per existing student: totals, counts and last dates in a single
+    INSERT ... SELECT over GROUP BY subqueries, then the per-subject statistics
+    (count/sum/min/max and first/latest grade) in one executemany UPDATE
+    """
+    grades = sa.select(
+        grade.c.student_id, sa.func.count(grade.c.id).label('count'), sa.func.sum(grade.c.grade).label('sum'),
+        sa.func.min(grade.c.grade).label('min'), sa.func.max(grade.c.grade).label('max'),
+        sa.func.max(grade.c.date_recorded).label('last')
+    ).group_by(grade.c.student_id).subquery()
+    attendances = sa.select(
+        attendance.c.student_id, sa.func.count(attendance.c.id).label('count'),
+        *(_count_where(attendance.c.status, status).label(status) for status in ATTENDANCE_STATUSES),
+        sa.func.max(attendance.c.date).label('last')
+    ).group_by(attendance.c.student_id).subquery()
+    behaviors = sa.select(
+        behavior_note.c.student_id, sa.func.count(behavior_note.c.id).label('count'),
+        *(_count_where(behavior_note.c.note_type, note_type).label(note_type) for note_type in BEHAVIOR_TYPES),
+        sa.func.max(behavior_note.c.date_recorded).label('last')
+    ).group_by(behavior_note.c.student_id).subquery()
+
+    columns = {
+        'student_id': student.c.id,
+        'grade_count': _zero(grades.c.count),
+        'grade_sum': _zero(grades.c.sum),
+        'grade_min': grades.c.min,
+        'grade_max': grades.c.max,
+        'subject_grades': sa.literal({}, sa.JSON()),
+        'last_grade_at': grades.c.last,
+        'attendance_count': _zero(attendances.c.count),
+        **{f'attendance_{status}': _zero(attendances.c[status]) for status in ATTENDANCE_STATUSES},
+        'last_attendance_date': attendances.c.last,
+        'behavior_count': _zero(behaviors.c.count),
+        **{f'behavior_{note_type}': _zero(behaviors.c[note_type]) for note_type in BEHAVIOR_TYPES},
+        'last_behavior_at': behaviors.c.last,
+        'updated_at': sa.literal(datetime.utcnow(), sa.DateTime()),
+    }
+    rows = sa.select(*columns.values()).select_from(
+        student.outerjoin(grades, grades.c.student_id == student.c.id)
+        .outerjoin(attendances, attendances.c.student_id == student.c.id)
+        .outerjoin(behaviors, behaviors.c.student_id == student.c.id)
+    )
+    connection.execute(summaries.insert().from_select(list(columns), rows))
+
+    subject_grades = {}
+    rows = connection.execute(
+        sa.select(grade.c.student_id, grade.c.subject, sa.func.count(grade.c.id), sa.func.sum(grade.c.grade),
+                  sa.func.min(grade.c.grade), sa.func.max(grade.c.grade))
+        .group_by(grade.c.student_id, grade.c.subject)
+    )
+    for student_id, subject, count, grade_sum, grade_min, grade_max in rows:
+        subject_grades.setdefault(student_id, {})[subject] = {
+            'count': count, 'sum': float(grade_sum or 0), 'min': grade_min, 'max': grade_max
+        }
+
+    partition = (grade.c.student_id, grade.c.subject)
+    ranked = sa.select(
+        grade.c.id, grade.c.student_id, grade.c.subject, grade.c.grade, grade.c.date_recorded,
+        sa.func.row_number().over(partition_by=partition, order_by=(grade.c.date_recorded, grade.c.id))
+        .label('first_rank'),
+        sa.func.row_number().over(partition_by=partition, order_by=(grade.c.date_recorded.desc(), grade.c.id.desc()))
+        .label('latest_rank')
+    ).subquery()
+    rows = connection.execute(sa.select(ranked).where((ranked.c.first_rank == 1) | (ranked.c.latest_rank == 1)))
+    for row_id, student_id, subject, value, recorded_at, first_rank, latest_rank in rows:
+        stats = subject_grades[student_id][subject]
+        if first_rank == 1:
+            stats.update(first=value, first_key=_order_key(recorded_at, row_id))
+        if latest_rank == 1:
+            stats.update(latest=value, latest_key=_order_key(recorded_at, row_id))
+
+    if subject_grades:
+        connection.execute(
+            summaries.update().where(summaries.c.student_id == sa.bindparam('summary_student_id'))
+            .values(subject_grades=sa.bindparam('summary_subject_grades')),
+            [{'summary_student_id': student_id, 'summary_subject_grades': subjects}
+             for student_id, subjects in subject_grades.items()]
+        )
+
+
+def upgrade() -> None:
+    # Create student_summaries table
+    summaries = op.create_table('student_summaries',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('grade_count', sa.Integer(), nullable=False),
+        sa.Column('grade_sum', sa.Float(), nullable=False),
+        sa.Column('grade_min', sa.Float(), nullable=True),
+        sa.Column('grade_max', sa.Float(), nullable=True),
+        sa.Column('subject_grades', sa.JSON(), nullable=False),
+        sa.Column('last_grade_at', sa.DateTime(), nullable=True),
+        sa.Column('attendance_count', sa.Integer(), nullable=False),
+        sa.Column('attendance_present', sa.Integer(), nullable=False),
+        sa.Column('attendance_absent', sa.Integer(), nullable=False),
+        sa.Column('attendance_late', sa.Integer(), nullable=False),
+        sa.Column('attendance_excused', sa.Integer(), nullable=False),
+        sa.Column('last_attendance_date', sa.Date(), nullable=True),
+        sa.Column('behavior_count', sa.Integer(), nullable=False),
+        sa.Column('behavior_positive', sa.Integer(), nullable=False),
+        sa.Column('behavior_negative', sa.Integer(), nullable=False),
+        sa.Column('behavior_neutral', sa.Integer(), nullable=False),
+        sa.Column('last_behavior_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+        sa.PrimaryKeyConstraint('student_id')
+    )
+
+    # Backfill one row per existing student from the raw grade/attendance/behavior
+    # rows; new students get theirs on insert (see src/services/student_summary.py)
+    backfill(op.get_bind(), summaries)
+
+
+def downgrade() -> None:
+    op.drop_table('student_summaries')
@@ -0,0 +1,52 @@
+"""Add (role, id) and (created_at, id) indexes for keyset user pagination
+
+user.created_at becomes NOT NULL: a NULL sort key cannot be encoded in a cursor
+and `created_at > :value` would skip those rows. Rows without a creation time
+are backfilled with the oldest known created_at (or the migration time if none
+is known), so they sort first.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('idx_user_role_id', 'user', ['role', 'id']),
+    ('idx_user_created_at_id', 'user', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    user = sa.table('user', sa.column('created_at', sa.DateTime()))
+    connection = op.get_bind()
+    oldest = connection.execute(sa.select(sa.func.min(user.c.created_at))).scalar()
+    connection.execute(
+        user.update().where(user.c.created_at.is_(None)).values(created_at=oldest or datetime.utcnow())
+    )
+    # batch mode so the column can also be altered on SQLite
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
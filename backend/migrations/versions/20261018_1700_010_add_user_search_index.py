@@ -0,0 +1,41 @@
+"""Add the user search index (SQLite FTS5 trigram / PostgreSQL pg_trgm)
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fill it with scripts/rebuild_user_search.py (the documents are normalized in Python)
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE user_search USING fts5(document, tokenize='trigram')")
+    elif dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_table('user_search',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('document', sa.Text(), nullable=False),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+        op.execute('CREATE INDEX idx_user_search_document_trgm ON user_search USING gin (document gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE user_search')
+    elif dialect == 'postgresql':
+        op.drop_index('idx_user_search_document_trgm', table_name='user_search')
+        op.drop_table('user_search')
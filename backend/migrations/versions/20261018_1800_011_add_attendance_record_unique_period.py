@@ -0,0 +1,86 @@
+"""Make attendance records unique per (student, date, period) for bulk upserts
+
+The upgrade refuses to run while duplicate (student_id, attendance_date, period)
+rows exist; it lists them instead of choosing which one to drop. Clean up before
+re-running it, keeping the row whose status is correct for each group:
+
+    -- review the duplicates
+    SELECT student_id, attendance_date, period, id, status, recorded_by, recorded_at
+    FROM attendance_records
+    WHERE period IS NOT NULL AND (student_id, attendance_date, period) IN (
+        SELECT student_id, attendance_date, period FROM attendance_records
+        WHERE period IS NOT NULL
+        GROUP BY student_id, attendance_date, period HAVING COUNT(*) > 1)
+    ORDER BY student_id, attendance_date, period, id;
+
+    -- then delete the rows that should not be kept, e.g.
+    DELETE FROM attendance_records WHERE id IN (...);
+
+Rows with a NULL period are not constrained by the index and are left alone.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Duplicate groups listed in the upgrade error
+MAX_REPORTED_DUPLICATES = 50
+
+
+def duplicate_records(connection):
+    """(student_id, attendance_date, period, ids, statuses) for every duplicated key"""
+    records = sa.table('attendance_records', sa.column('id'), sa.column('student_id'),
+                       sa.column('attendance_date'), sa.column('period'), sa.column('status'))
+    key = (records.c.student_id, records.c.attendance_date, records.c.period)
+    duplicates = sa.select(*key).where(records.c.period.isnot(None)).group_by(*key).having(
+        sa.func.count() > 1
+    ).subquery()
+    rows = connection.execute(
+        sa.select(*key, records.c.id, records.c.status).join(
+            duplicates, sa.and_(*(column == duplicates.c[column.name] for column in key))
+        ).order_by(*key, records.c.id)
+    )
+
+    groups = {}
+    for student_id, attendance_date, period, record_id, status in rows:
+        ids, statuses = groups.setdefault((student_id, attendance_date, period), ([], []))
+        ids.append(record_id)
+        statuses.append(status)
+    return [(*group, ids, statuses) for group, (ids, statuses) in groups.items()]
+
+
+def upgrade() -> None:
+    duplicates = duplicate_records(op.get_bind())
+    if duplicates:
+        report = '\n'.join(
+            f'  student_id={student_id} date={attendance_date} period={period} ids={ids} statuses={statuses}'
+            for student_id, attendance_date, period, ids, statuses in duplicates[:MAX_REPORTED_DUPLICATES]
+        )
+        more = len(duplicates) - MAX_REPORTED_DUPLICATES
+        raise RuntimeError(
+            f'{len(duplicates)} (student, date, period) keys have more than one attendance record; keep one row per '
+            f'group and delete the others before upgrading (see this migration\'s docstring):\n{report}'
+            + (f'\n  ... and {more} more' if more > 0 else '')
+        )
+
+    # The unique index leads with (student_id, attendance_date), so it replaces the plain one
+    op.drop_index('idx_attendance_records_student_date', table_name='attendance_records')
+    op.create_index('uq_attendance_records_student_date_period', 'attendance_records',
+                    ['student_id', 'attendance_date', 'period'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_attendance_records_student_date_period', table_name='attendance_records')
+    op.create_index('idx_attendance_records_student_date', 'attendance_records', ['student_id', 'attendance_date'])
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+قياس أداء التحليل المجمع بالذكاء الاصطناعي
+AI batch analysis benchmark - runs the serial per-student loop and the
+concurrent batch mode against a local stub of the OpenAI client that simulates
+network latency, so no API key or network access is needed
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from types import SimpleNamespace
+from datetime import date, datetime, timedelta
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import event
+from src.models.user import db, User, Student, Teacher, Grade, Attendance, BehaviorNote, AIInsight
+from src.services.ai_service import AIService
+
+
+class StubOpenAIClient:
+    """عميل وهمي بنفس واجهة openai.OpenAI().chat.completions.create"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, max_tokens, temperature):
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        content = f'تحليل تجريبي ({model}, {len(messages[-1]["content"])} حرف)'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def create_benchmark_app(database_url):
+    """إنشاء تطبيق مصغر لقاعدة بيانات القياس"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # تعطيل ذاكرة الرؤى المؤقتة حتى يقيس الوضعان استدعاءات النموذج نفسها
+    app.config['AI_INSIGHT_CACHE_TTL'] = 0
+    db.init_app(app)
+    return app
+
+
+def seed_class(students_count, records_per_student):
+    """إنشاء صف كامل مع درجات وحضور وسلوك لكل طالب"""
+    teacher_user = User(username='bench_teacher', email='teacher@bench.local',
+                        password_hash='x', role='teacher', name='معلم القياس')
+    db.session.add(teacher_user)
+    db.session.flush()
+    teacher = Teacher(user_id=teacher_user.id, teacher_id='BT00001')
+    db.session.add(teacher)
+    db.session.flush()
+
+    users = [
+        User(username=f'bench_student_{i}', email=f'student{i}@bench.local',
+             password_hash='x', role='student', name=f'طالب {i}')
+        for i in range(students_count)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+    students = [
+        Student(user_id=user.id, student_id=f'BS{i:05d}', class_name='3أ')
+        for i, user in enumerate(users)
+    ]
+    db.session.add_all(students)
+    db.session.flush()
+
+    subjects = ['الرياضيات', 'الفيزياء', 'الكيمياء', 'اللغة العربية']
+    statuses = ['present', 'present', 'present', 'absent', 'late']
+    now = datetime.utcnow()
+    records = []
+    for student in students:
+        for i in range(records_per_student):
+            records.append(Grade(student_id=student.id, teacher_id=teacher.id,
+                                 subject=subjects[i % len(subjects)], grade=55 + (i * 11) % 45,
+                                 grade_type='exam', date_recorded=now - timedelta(days=i)))
+            records.append(Attendance(student_id=student.id, teacher_id=teacher.id,
+                                      date=date.today() - timedelta(days=i),
+                                      status=statuses[i % len(statuses)]))
+            if i % 4 == 0:
+                records.append(BehaviorNote(student_id=student.id, teacher_id=teacher.id,
+                                            note_type='positive' if i % 8 else 'negative',
+                                            note='ملاحظة', date_recorded=now - timedelta(days=i)))
+    db.session.add_all(records)
+    db.session.commit()
+    return [student.id for student in students]
+
+
+def count_queries(engine):
+    """عداد استعلامات SQL مع دالة لإزالته"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', on_execute)
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='AI batch analysis benchmark (stub client)')
+    parser.add_argument('--students', type=int, default=35)
+    parser.add_argument('--records', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.5, help='simulated seconds per model call')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests-per-minute', type=int, default=0, help='0 disables rate limiting')
+    parser.add_argument('--analysis-type', default='performance',
+                        choices=['performance', 'risk', 'recommendations'])
+    args = parser.parse_args()
+
+    serial_methods = {
+        'performance': 'analyze_student_performance',
+        'risk': 'predict_academic_risk',
+        'recommendations': 'generate_personalized_recommendations'
+    }
+
+    app = create_benchmark_app('sqlite://')
+    with app.app_context():
+        db.create_all()
+        student_ids = seed_class(args.students, args.records)
+        engine = db.engine
+
+        print(f"{'mode':>10} {'seconds':>10} {'queries':>10} {'model calls':>12} {'max parallel':>13}")
+
+        # التحليل التسلسلي كما كان في المسار سابقاً
+        client = StubOpenAIClient(args.latency)
+        service = AIService(client=client)
+        statements, stop = count_queries(engine)
+        started = time.perf_counter()
+        serial_results = [getattr(service, serial_methods[args.analysis_type])(sid) for sid in student_ids]
+        serial_seconds = time.perf_counter() - started
+        stop()
+        print(f"{'serial':>10} {serial_seconds:>10.2f} {len(statements):>10} "
+              f"{client.calls:>12} {client.max_in_flight:>13}")
+
+        # التحليل المجمع بالتوازي
+        client = StubOpenAIClient(args.latency)
+        service = AIService(client=client)
+        statements, stop = count_queries(engine)
+        started = time.perf_counter()
+        batch_results = service.batch_analyze(
+            student_ids, args.analysis_type,
+            concurrency=args.concurrency,
+            requests_per_minute=args.requests_per_minute or None
+        )
+        batch_seconds = time.perf_counter() - started
+        stop()
+        print(f"{'batch':>10} {batch_seconds:>10.2f} {len(statements):>10} "
+              f"{client.calls:>12} {client.max_in_flight:>13}")
+
+        stored = AIInsight.query.count()
+
+    failed = [r for r in batch_results if not r['success']] + [r for r in serial_results if not r]
+    if failed or stored != 2 * len(student_ids):
+        print(f"❌ فشل بعض التحليلات أو لم تُحفظ جميع النتائج ({stored} رؤية محفوظة)")
+        return 1
+
+    print(f"✅ تسريع {serial_seconds / batch_seconds:.1f}x مع حفظ {stored} رؤية")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
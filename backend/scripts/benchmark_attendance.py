@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+قياس تسجيل الحضور الصباحي للمدرسة
+Morning attendance benchmark - generates a school, then records every
+classroom's attendance for the first periods of a day twice: once row by row
+through the ORM (membership check, insert and commit per student, as a
+per-student write path would) and once through
+POST /api/teacher/classrooms/<id>/attendance (one Enrollment query and one
+upsert per classroom), then resubmits the bulk day to time in-place
+corrections, checking both paths stored the same statuses
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+from benchmark_endpoints import percentile, DEFAULT_END_DATE
+
+EXCEPTION_STATUSES = ['absent', 'absent', 'late', 'excused', 'sick']
+
+
+def classrooms_with_teachers():
+    """الفصول النشطة مع اسم مستخدم مربي الفصل وطلابه المسجلين"""
+    from src.models.user import db, User, Teacher
+    from src.models.extended_models import Classroom, Enrollment
+
+    rows = db.session.query(Classroom.id, User.username).join(
+        Teacher, Teacher.id == Classroom.homeroom_teacher_id
+    ).join(User, User.id == Teacher.user_id).filter(Classroom.is_active.is_(True)).order_by(Classroom.id).all()
+
+    students = {}
+    for classroom_id, student_id in db.session.query(Enrollment.classroom_id, Enrollment.student_id).filter(
+        Enrollment.status == 'active'
+    ):
+        students.setdefault(classroom_id, []).append(student_id)
+    return [(classroom_id, username, sorted(students.get(classroom_id, []))) for classroom_id, username in rows]
+
+
+def day_sheet(classrooms, periods, rng):
+    """الغائبون والمتأخرون لكل فصل وحصة؛ البقية حاضرون"""
+    return {
+        (classroom_id, period): {
+            student_id: rng.choice(EXCEPTION_STATUSES) for student_id in students if rng.random() < 0.1
+        }
+        for classroom_id, _, students in classrooms for period in range(1, periods + 1)
+    }
+
+
+def record_row_by_row(classroom_id, teacher_id, students, attendance_date, period, exceptions):
+    """حضور الحصة طالباً طالباً عبر ORM: تحقق من التسجيل ثم إدراج وحفظ لكل سجل"""
+    from src.models.user import db
+    from src.models.extended_models import Enrollment, AttendanceRecord
+
+    for student_id in students:
+        if not Enrollment.query.filter_by(classroom_id=classroom_id, student_id=student_id, status='active').first():
+            raise RuntimeError(f'student {student_id} not enrolled in {classroom_id}')
+        db.session.add(AttendanceRecord(
+            classroom_id=classroom_id, student_id=student_id, attendance_date=attendance_date,
+            period=f'period_{period}', status=exceptions.get(student_id, 'present'), recorded_by=teacher_id,
+            recorded_at=datetime.utcnow()
+        ))
+        db.session.commit()
+
+
+def stored_statuses(attendance_date):
+    from src.models.user import db
+    from src.models.extended_models import AttendanceRecord
+
+    return {
+        (student_id, period): status
+        for student_id, period, status in db.session.query(
+            AttendanceRecord.student_id, AttendanceRecord.period, AttendanceRecord.status
+        ).filter(AttendanceRecord.attendance_date == attendance_date)
+    }
+
+
+def summarize(name, timings, queries, wall_seconds):
+    timings.sort()
+    print(f"{name:<22} {len(timings):>8} {percentile(timings, 0.5):>8.2f} {percentile(timings, 0.95):>8.2f} "
+          f"{queries:>8} {wall_seconds:>8.2f}")
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='Row-by-row vs bulk classroom attendance benchmark')
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--periods', type=int, default=2, help='periods recorded per classroom')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(prefix='thanawiya-attendance-'), 'school.db')
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{database}'
+
+    from src.main import create_app
+    from src.models.user import db, Teacher, User
+    from src.services.query_metrics import QUERY_COUNT_HEADER
+    from generate_dataset import generate, DEFAULT_PASSWORD
+
+    app = create_app('testing')
+    app.config['QUERY_BUDGET_STRICT'] = False
+    app.logger.setLevel('ERROR')
+
+    rng = random.Random(args.seed)
+    # أيام بعد نهاية البيانات المولدة حتى لا تتعارض مع سجلاتها
+    row_day, bulk_day = DEFAULT_END_DATE + timedelta(days=1), DEFAULT_END_DATE + timedelta(days=2)
+    with app.app_context():
+        started = time.perf_counter()
+        generate(args.scale, args.seed, years=1, end_date=DEFAULT_END_DATE)
+        print(f"تم توليد المدرسة في {time.perf_counter() - started:.1f} ثانية")
+        classrooms = classrooms_with_teachers()
+        teachers = dict(db.session.query(User.username, Teacher.id).join(Teacher, Teacher.user_id == User.id))
+    sheet = day_sheet(classrooms, args.periods, rng)
+    students_total = sum(len(students) for _, _, students in classrooms)
+    print(f"{len(classrooms)} فصل، {students_total} طالب، {args.periods} حصة\n")
+
+    print(f"{'path':<22} {'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'total s':>8}")
+
+    # سجل لكل طالب
+    timings = []
+    wall = time.perf_counter()
+    with app.app_context():
+        for classroom_id, username, students in classrooms:
+            for period in range(1, args.periods + 1):
+                started = time.perf_counter()
+                record_row_by_row(classroom_id, teachers[username], students, row_day, period,
+                                  sheet[(classroom_id, period)])
+                timings.append((time.perf_counter() - started) * 1000)
+    # استعلام تحقق + إدراج لكل طالب
+    summarize('row by row (ORM)', timings, 2 * round(students_total / max(len(classrooms), 1)),
+              time.perf_counter() - wall)
+
+    clients = {}
+    for _, username, _ in classrooms:
+        if username not in clients:
+            clients[username] = app.test_client()
+            response = clients[username].post('/api/login', json={'username': username, 'password': DEFAULT_PASSWORD})
+            if response.status_code != 200:
+                raise RuntimeError(f'login failed for {username}: {response.status_code}')
+
+    def submit_day(attendance_date, sheet):
+        timings, queries = [], 0
+        wall = time.perf_counter()
+        for classroom_id, username, _ in classrooms:
+            for period in range(1, args.periods + 1):
+                started = time.perf_counter()
+                response = clients[username].post(f'/api/teacher/classrooms/{classroom_id}/attendance', json={
+                    'date': attendance_date.isoformat(), 'period': f'period_{period}', 'default_status': 'present',
+                    'records': [[student_id, status] for student_id, status in sheet[(classroom_id, period)].items()]
+                })
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f'classroom {classroom_id}: {response.status_code} {response.get_json()}')
+                queries = max(queries, int(response.headers.get(QUERY_COUNT_HEADER, 0)))
+        return timings, queries, time.perf_counter() - wall
+
+    timings, queries, wall_seconds = submit_day(bulk_day, sheet)
+    summarize('bulk upsert (API)', timings, queries, wall_seconds)
+
+    # إعادة إرسال اليوم بحالات مصححة: نفس العبارة تحدّث الصفوف الموجودة
+    corrected = day_sheet(classrooms, args.periods, rng)
+    timings, queries, wall_seconds = submit_day(bulk_day, corrected)
+    summarize('bulk resubmit (API)', timings, queries, wall_seconds)
+
+    with app.app_context():
+        row_statuses = stored_statuses(row_day)
+        bulk_statuses = stored_statuses(bulk_day)
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(database)
+
+    expected = {
+        (student_id, f'period_{period}'): corrected[(classroom_id, period)].get(student_id, 'present')
+        for classroom_id, _, students in classrooms for student_id in students
+        for period in range(1, args.periods + 1)
+    }
+    row_expected = {
+        (student_id, f'period_{period}'): sheet[(classroom_id, period)].get(student_id, 'present')
+        for classroom_id, _, students in classrooms for student_id in students
+        for period in range(1, args.periods + 1)
+    }
+    if bulk_statuses != expected or row_statuses != row_expected:
+        print("\n❌ السجلات المحفوظة لا تطابق كشوف الحضور المرسلة")
+        return 1
+
+    print(f"\n✅ {len(bulk_statuses)} سجل لكل مسار تطابق كشوف الحضور (وإعادة الإرسال حدّثت الصفوف نفسها)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
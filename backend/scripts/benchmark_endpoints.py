@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+قياس أداء المسارات الرئيسية
+Endpoint benchmark suite - runs create_app('testing') against a generated
+file-backed school database, drives the main endpoints with the Flask test
+client and reports p50/p95/p99 latency, throughput and SQL query counts,
+optionally saving or comparing against a stored baseline. Cached endpoints are
+measured twice: cold (cache cleared before every request) and warm (entry
+primed before every request). A baseline is only compared with a run that used
+the same settings
+
+    python scripts/benchmark_endpoints.py --save-baseline scripts/benchmark_endpoints_baseline.json
+    python scripts/benchmark_endpoints.py --baseline scripts/benchmark_endpoints_baseline.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+import openpyxl
+
+DEFAULT_BASELINE = os.path.join(SCRIPTS_DIR, 'benchmark_endpoints_baseline.json')
+DEFAULT_END_DATE = date(2026, 6, 1)
+ADMIN_PASSWORD = 'admin123'
+
+
+def percentile(sorted_values, fraction):
+    """النسبة المئوية بطريقة nearest-rank"""
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def build_students_workbook(rows, rng):
+    """ملف Excel للطلاب بنفس أعمدة القالب"""
+    from src.services.excel_import import STUDENT_COLUMNS
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(STUDENT_COLUMNS)
+    for n in range(rows):
+        sheet.append([
+            f'طالب القياس {n}', f'{990000000000 + n}', f'{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2009',
+            'الرابع الإعدادي', 'غير فرنسي', f'ولي أمر {n}', f'0781{n:07d}', 'بغداد', 'ذكر', 'بنين'
+        ])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def prepare_database(app, args):
+    """توليد بيانات المدرسة (أو إعادة استخدامها) وإضافة حساب مدير"""
+    from generate_dataset import generate
+    from src.models.user import db, User, Student, ParentStudent, Parent
+
+    with app.app_context():
+        db.create_all()
+        if db.session.query(User.id).first() is None:
+            started = time.perf_counter()
+            counts = generate(args.scale, args.seed, end_date=args.end_date)
+            print(f"تم إنشاء {sum(counts.values()):,} صف في {time.perf_counter() - started:.1f} ثانية")
+
+        if not User.query.filter_by(username='bench_admin').first():
+            admin = User(username='bench_admin', email='bench_admin@thanawiya-school.com',
+                         role='admin', name='مدير القياس', is_active=True)
+            admin.set_password(ADMIN_PASSWORD)
+            db.session.add(admin)
+            db.session.commit()
+
+        rng = random.Random(args.seed)
+        student_rows = db.session.query(User.username, Student.id).join(Student, Student.user_id == User.id).all()
+        parent_rows = db.session.query(User.username, ParentStudent.student_id).join(
+            Parent, Parent.user_id == User.id
+        ).join(ParentStudent, ParentStudent.parent_id == Parent.id).all()
+
+        return {
+            'students': rng.sample(student_rows, min(args.users, len(student_rows))),
+            'parents': rng.sample(parent_rows, min(args.users, len(parent_rows))),
+            'search_terms': ['الموسوي', 'st_1', 'محمد', 'pr_2', 'الزبيدي'],
+        }
+
+
+def login(client, username, password):
+    response = client.post('/api/login', json={'username': username, 'password': password})
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed for {username}: {response.status_code} {response.get_json()}')
+    return client
+
+
+def build_scenarios(app, sample, password, excel_rows, rng):
+    """
+    كل سيناريو: (الاسم، دالة تُنشئ عميلاً مسجلاً للدخول، دالة تنفذ طلباً واحداً،
+    دالة تحضير اختيارية تُنفذ قبل كل طلب خارج التوقيت).
+    """
+    workbook = build_students_workbook(excel_rows, rng)
+    students, parents = sample['students'], sample['parents']
+
+    def student_client(i):
+        return login(app.test_client(), students[i % len(students)][0], password), students[i % len(students)][1]
+
+    def parent_client(i):
+        return login(app.test_client(), parents[i % len(parents)][0], password), parents[i % len(parents)][1]
+
+    def admin_client(i):
+        return login(app.test_client(), 'bench_admin', ADMIN_PASSWORD), None
+
+    def anonymous_client(i):
+        return app.test_client(), students[i % len(students)][0]
+
+    def upload(client, _, i):
+        # الاستيراد يعمل في الخلفية: الزمن المقاس يشمل متابعة المهمة حتى انتهائها
+        response = client.post('/api/upload-excel', content_type='multipart/form-data', data={
+            'type': 'students', 'file': (io.BytesIO(workbook), 'students.xlsx')
+        })
+        if response.status_code != 202:
+            return response
+        status_url = response.get_json()['status_url']
+        while client.get(status_url).get_json()['import_job']['status'] in ('pending', 'processing'):
+            time.sleep(0.005)
+        return response
+
+    def cold(client, context, i):
+        # إفراغ ذاكرة الاستجابات: كل طلب مقاس يبني الاستجابة من قاعدة البيانات
+        app.extensions['dashboard_cache'].clear()
+
+    def warm(request_once):
+        # طلب غير مقاس لنفس العميل يضمن أن الطلب المقاس يُخدم من الذاكرة
+        return lambda client, context, i: request_once(client, context, i)
+
+    def cached(name, make_client, request_once):
+        return [(f'{name} cold', make_client, request_once, cold),
+                (f'{name} warm', make_client, request_once, warm(request_once))]
+
+    return [
+        ('login', anonymous_client,
+         lambda client, username, i: client.post('/api/login', json={'username': username, 'password': password}), None),
+        *cached('student dashboard', student_client, lambda client, _, i: client.get('/api/dashboard')),
+        ('student grades', student_client,
+         lambda client, _, i: client.get(f'/api/grades?page={i % 3 + 1}&per_page=20'), None),
+        ('student attendance', student_client, lambda client, _, i: client.get('/api/attendance'), None),
+        *cached('parent dashboard', parent_client, lambda client, _, i: client.get('/api/parent/dashboard')),
+        ('parent child grades', parent_client, lambda client, child, i: client.get(f'/api/child/{child}/grades'), None),
+        ('parent child attendance', parent_client,
+         lambda client, child, i: client.get(f'/api/child/{child}/attendance'), None),
+        ('admin user search', admin_client, lambda client, _, i: client.get(
+            f'/api/admin/users?search={sample["search_terms"][i % len(sample["search_terms"])]}&page={i % 5 + 1}'), None),
+        *cached('admin stats', admin_client, lambda client, _, i: client.get('/api/admin/stats')),
+        ('excel upload', admin_client, upload, None),
+    ]
+
+
+def run_scenario(make_client, request_once, requests_count, concurrency, pool_size, warmup, prepare=None):
+    """تنفيذ السيناريو وإرجاع الأزمنة وعدد الاستعلامات ورموز الاستجابة"""
+    from src.services.query_metrics import QUERY_COUNT_HEADER
+
+    clients = [make_client(i) for i in range(pool_size)]
+    # طلبات إحماء (تحميل المسارات وذاكرة SQLite المؤقتة) لا تدخل في النتائج
+    for i in range(warmup):
+        client, context = clients[i % len(clients)]
+        request_once(client, context, i)
+    latencies, query_counts, failures = [], [], []
+    lock = threading.Lock()
+
+    def one(i):
+        client, context = clients[i % len(clients)]
+        if prepare:
+            prepare(client, context, i)
+        started = time.perf_counter()
+        response = request_once(client, context, i)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            query_counts.append(int(response.headers.get(QUERY_COUNT_HEADER, 0)))
+            if response.status_code >= 400:
+                failures.append(response.status_code)
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        # عميل لكل خيط: نوزع الطلبات بحيث لا يستخدم خيطان نفس العميل
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda worker: [one(i) for i in range(worker, requests_count, concurrency)],
+                              range(concurrency)))
+    else:
+        for i in range(requests_count):
+            one(i)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests_count,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'throughput_rps': round(requests_count / wall, 1),
+        'queries': max(query_counts) if query_counts else 0,
+        'errors': len(failures),
+    }
+
+
+def settings_mismatch(settings, baseline):
+    """الإعدادات التي تختلف عن إعدادات الخط الأساسي: نتائجها غير قابلة للمقارنة"""
+    reference = baseline.get('settings', {})
+    return [
+        f"{key}: {reference.get(key)} (baseline) != {settings.get(key)}"
+        for key in sorted(set(settings) | set(reference)) if settings.get(key) != reference.get(key)
+    ]
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """مقارنة بالخط الأساسي: زيادة زمن p95 فوق النسبة والفرق المسموحين أو أي زيادة في عدد الاستعلامات"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if not reference:
+            continue
+        if result['queries'] > reference['queries']:
+            regressions.append(f"{name}: queries {reference['queries']} -> {result['queries']}")
+        slowdown = result['p95_ms'] - reference['p95_ms']
+        if slowdown > min_delta_ms and result['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {reference['p95_ms']} ms -> {result['p95_ms']} ms")
+    return regressions
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='Endpoint latency/throughput benchmark')
+    parser.add_argument('--database', help='SQLite file to use/reuse (default: a new temporary file)')
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=DEFAULT_END_DATE)
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--users', type=int, default=20, help='distinct logged-in users per scenario')
+    parser.add_argument('--excel-rows', type=int, default=200)
+    parser.add_argument('--only', nargs='+', help='run only these scenarios')
+    parser.add_argument('--baseline', help=f'compare with a stored baseline (e.g. {DEFAULT_BASELINE})')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 slowdown vs baseline')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='ignore p95 slowdowns smaller than this (timer noise on fast endpoints)')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per scenario')
+    parser.add_argument('--save-baseline', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    database = args.database or os.path.join(tempfile.mkdtemp(prefix='thanawiya-bench-'), 'school.db')
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{os.path.abspath(database)}'
+
+    from src.main import create_app
+    from generate_dataset import DEFAULT_PASSWORD
+
+    app = create_app('testing')
+    # عدد الاستعلامات يُقارن بالخط الأساسي بدلاً من إيقاف الطلب عند تجاوز الحد
+    app.config['QUERY_BUDGET_STRICT'] = False
+    app.logger.setLevel('ERROR')
+
+    sample = prepare_database(app, args)
+    rng = random.Random(args.seed)
+    scenarios = build_scenarios(app, sample, DEFAULT_PASSWORD, args.excel_rows, rng)
+
+    results = {}
+    print(f"\n{'scenario':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8} {'errors':>7}")
+    for name, make_client, request_once, prepare in scenarios:
+        if args.only and name not in args.only:
+            continue
+        requests_count = max(args.requests // 10, 5) if name == 'excel upload' else args.requests
+        result = run_scenario(make_client, request_once, requests_count, args.concurrency,
+                              pool_size=max(args.concurrency, min(args.users, requests_count)),
+                              warmup=min(args.warmup, requests_count), prepare=prepare)
+        results[name] = result
+        print(f"{name:<24} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+              f"{result['throughput_rps']:>8.1f} {result['queries']:>8} {result['errors']:>7}")
+
+    report = {
+        'created_at': date.today().isoformat(),
+        'python': sys.version.split()[0],
+        'settings': {'scale': args.scale, 'seed': args.seed, 'end_date': args.end_date.isoformat(),
+                     'requests': args.requests, 'concurrency': args.concurrency, 'users': args.users,
+                     'warmup': args.warmup, 'excel_rows': args.excel_rows},
+        'scenarios': results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        print(f"\n💾 تم حفظ الخط الأساسي في {args.save_baseline}")
+
+    failed = [name for name, result in results.items() if result['errors']]
+    if failed:
+        print(f"\n❌ أخطاء في: {', '.join(failed)}")
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as source:
+            baseline = json.load(source)
+        mismatched = settings_mismatch(report['settings'], baseline)
+        if mismatched:
+            print("\n❌ إعدادات التشغيل تختلف عن الخط الأساسي، لا يمكن المقارنة:")
+            for difference in mismatched:
+                print(f"   - {difference}")
+            return 1
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\n❌ تراجع في الأداء مقارنة بالخط الأساسي:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print(f"\n✅ لا تراجع مقارنة بالخط الأساسي (سماحية p95 {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+قياس إدخال الدرجات ونشرها
+Grade entry benchmark - generates a school, picks the teacher with the most
+students, and records then publishes a midterm for every one of their courses
+twice: one GradeSystemService.record_student_grade() call per student followed
+by the per-grade publish loop (lazy recorder load per grade), and through
+POST /api/teacher/grade-systems/<id>/grades per course plus one
+POST /api/teacher/grades/publish, checking both stored the same grades
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+from benchmark_endpoints import DEFAULT_END_DATE
+
+MAX_SCORE = 50.0
+
+
+class QueryCounter:
+    """عدد العبارات المنفذة على المحرك"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def busiest_teacher():
+    """المعلم الذي يدرّس أكبر عدد من الطلاب، مع مواده وطلاب كل مادة"""
+    from src.models.user import db, User, Teacher
+    from src.models.extended_models import Course, Enrollment
+
+    rows = db.session.query(Course.teacher_id, Course.id, Enrollment.student_id).join(
+        Enrollment, (Enrollment.classroom_id == Course.classroom_id) & (Enrollment.status == 'active')
+    ).filter(Course.is_active.is_(True)).all()
+    courses = {}
+    for teacher_id, course_id, student_id in rows:
+        courses.setdefault(teacher_id, {}).setdefault(course_id, []).append(student_id)
+
+    teacher_id = max(courses, key=lambda teacher: sum(len(students) for students in courses[teacher].values()))
+    username = db.session.query(User.username).join(Teacher, Teacher.user_id == User.id).filter(
+        Teacher.id == teacher_id
+    ).scalar()
+    user_id = db.session.query(Teacher.user_id).filter(Teacher.id == teacher_id).scalar()
+    return teacher_id, user_id, username, courses[teacher_id]
+
+
+def create_grade_systems(teacher_id, courses, name):
+    """امتحان نصف السنة لكل مادة من مواد المعلم"""
+    from src.models.user import db
+    from src.models.extended_models import GradeSystem
+
+    grade_systems = {}
+    for course_id in courses:
+        grade_system = GradeSystem(course_id=course_id, name=name, grade_type='midterm', max_score=MAX_SCORE,
+                                   created_by=teacher_id, notify_parents=True, auto_publish=False)
+        db.session.add(grade_system)
+        db.session.flush()
+        grade_systems[course_id] = grade_system.id
+    db.session.commit()
+    return grade_systems
+
+
+def publish_one_by_one(grade_ids, user_id):
+    """مسار النشر السابق: تحميل الدرجات ثم التحقق من المعلم لكل درجة (تحميل كسول للمسجّل)"""
+    from src.models.user import db
+    from src.models.extended_models import StudentGrade
+
+    published = 0
+    for grade in StudentGrade.query.filter(StudentGrade.id.in_(grade_ids)).all():
+        if grade.recorder.user_id == user_id:
+            grade.publish_grade()
+            published += 1
+    db.session.commit()
+    return published
+
+
+def stored_grades(grade_system_ids):
+    from src.models.user import db
+    from src.models.extended_models import StudentGrade, GradeSystem
+
+    return sorted(db.session.query(
+        GradeSystem.course_id, StudentGrade.student_id, StudentGrade.score, StudentGrade.percentage,
+        StudentGrade.grade_letter, StudentGrade.is_published, StudentGrade.parent_notified
+    ).join(GradeSystem).filter(StudentGrade.grade_system_id.in_(grade_system_ids)))
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='Per-grade vs bulk grade entry and publish benchmark')
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(prefix='thanawiya-grades-'), 'school.db')
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{database}'
+
+    from src.main import create_app
+    from src.models.user import db
+    from src.services.user_management import GradeSystemService
+    from src.services.query_metrics import QUERY_COUNT_HEADER
+    from generate_dataset import generate, DEFAULT_PASSWORD
+
+    app = create_app('testing')
+    app.config['QUERY_BUDGET_STRICT'] = False
+    app.logger.setLevel('ERROR')
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        started = time.perf_counter()
+        generate(args.scale, args.seed, years=1, end_date=DEFAULT_END_DATE)
+        print(f"تم توليد المدرسة في {time.perf_counter() - started:.1f} ثانية")
+        teacher_id, user_id, username, courses = busiest_teacher()
+        row_systems = create_grade_systems(teacher_id, courses, 'نصف السنة (سجل لكل طالب)')
+        bulk_systems = create_grade_systems(teacher_id, courses, 'نصف السنة (إدخال جماعي)')
+        counter = QueryCounter(db.engine)
+
+    scores = {
+        course_id: [[student_id, round(rng.uniform(10, MAX_SCORE) * 2) / 2] for student_id in students]
+        for course_id, students in courses.items()
+    }
+    students_total = sum(len(students) for students in courses.values())
+    print(f"{len(courses)} مادة، {students_total} درجة\n")
+    print(f"{'path':<24} {'entry ms':>9} {'queries':>8} {'publish ms':>11} {'queries':>8}")
+
+    # درجة لكل استدعاء ثم النشر السابق
+    with app.app_context():
+        counter.count = 0
+        started = time.perf_counter()
+        grade_ids = []
+        for course_id, course_scores in scores.items():
+            for student_id, score in course_scores:
+                result = GradeSystemService.record_student_grade(student_id, row_systems[course_id], score, teacher_id)
+                if not result['success']:
+                    raise RuntimeError(result['error'])
+                grade_ids.append(result['student_grade']['id'])
+        entry_ms, entry_queries = (time.perf_counter() - started) * 1000, counter.count
+
+        counter.count = 0
+        started = time.perf_counter()
+        published = publish_one_by_one(grade_ids, user_id)
+        publish_ms, publish_queries = (time.perf_counter() - started) * 1000, counter.count
+    print(f"{'per grade (service)':<24} {entry_ms:>9.1f} {entry_queries:>8} {publish_ms:>11.1f} {publish_queries:>8}")
+
+    # طلب لكل مادة ثم طلب نشر واحد
+    client = app.test_client()
+    response = client.post('/api/login', json={'username': username, 'password': DEFAULT_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed: {response.status_code}')
+
+    entry_queries = 0
+    bulk_ids = []
+    started = time.perf_counter()
+    for course_id, course_scores in scores.items():
+        response = client.post(f'/api/teacher/grade-systems/{bulk_systems[course_id]}/grades',
+                               json={'scores': course_scores})
+        if response.status_code != 201:
+            raise RuntimeError(f'course {course_id}: {response.status_code} {response.get_json()}')
+        bulk_ids.extend(response.get_json()['grade_ids'])
+        entry_queries += int(response.headers.get(QUERY_COUNT_HEADER, 0))
+    entry_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    response = client.post('/api/teacher/grades/publish', json={'grade_ids': bulk_ids})
+    publish_ms = (time.perf_counter() - started) * 1000
+    bulk_published = response.get_json()['published_count']
+    print(f"{'bulk (API)':<24} {entry_ms:>9.1f} {entry_queries:>8} {publish_ms:>11.1f} "
+          f"{response.headers.get(QUERY_COUNT_HEADER):>8}")
+
+    with app.app_context():
+        row_grades = [grade[1:] for grade in stored_grades(row_systems.values())]
+        bulk_grades = [grade[1:] for grade in stored_grades(bulk_systems.values())]
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(database)
+
+    if row_grades != bulk_grades or not published == bulk_published == students_total:
+        print("\n❌ الدرجات المحفوظة أو المنشورة أو إشعاراتها تختلف بين المسارين")
+        return 1
+
+    print(f"\n✅ {len(bulk_grades)} درجة بنفس النسب والدرجات الحرفية وحالة النشر والإشعار في المسارين")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
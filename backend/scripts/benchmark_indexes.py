@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+قياس أثر الفهارس المركبة على خطط الاستعلامات
+Composite index benchmark - loads a large synthetic dataset, then runs the hot
+per-student queries with only primary keys / unique constraints and again with
+the model indexes, printing each query plan and median time
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import date, datetime, timedelta
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import select, func, insert, text
+from src.models.user import (
+    db, User, Student, Teacher, Parent, ParentStudent, Grade, Attendance, BehaviorNote, AIInsight
+)
+
+
+def create_benchmark_app(database_url):
+    """إنشاء تطبيق مصغر لقاعدة بيانات القياس"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed(students_count, records_per_student, seed_value=42):
+    """إدراج بيانات كبيرة بإدراج جماعي (Core) بدلاً من كائنات ORM"""
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    today = date.today()
+
+    users = [
+        {'username': f'bench_{role}_{i}', 'email': f'{role}{i}@bench.local', 'password_hash': 'x',
+         'role': role, 'name': f'{role} {i}'}
+        for role, count in (('teacher', 1), ('student', students_count), ('parent', students_count // 2))
+        for i in range(count)
+    ]
+    db.session.execute(insert(User), users)
+    user_ids = dict(db.session.execute(select(User.username, User.id)).all())
+
+    db.session.execute(insert(Teacher), [{'user_id': user_ids['bench_teacher_0'], 'teacher_id': 'BT00001'}])
+    teacher_id = db.session.execute(select(Teacher.id)).scalar()
+
+    classes = [f'{grade}{section}' for grade in range(1, 7) for section in 'أبج']
+    db.session.execute(insert(Student), [
+        {'user_id': user_ids[f'bench_student_{i}'], 'student_id': f'BS{i:06d}', 'class_name': rng.choice(classes)}
+        for i in range(students_count)
+    ])
+    db.session.execute(insert(Parent), [
+        {'user_id': user_ids[f'bench_parent_{i}'], 'relationship': 'father'}
+        for i in range(students_count // 2)
+    ])
+    student_ids = db.session.execute(select(Student.id).order_by(Student.id)).scalars().all()
+    parent_ids = db.session.execute(select(Parent.id).order_by(Parent.id)).scalars().all()
+    db.session.execute(insert(ParentStudent), [
+        {'parent_id': parent_ids[i // 2], 'student_id': student_id}
+        for i, student_id in enumerate(student_ids) if i // 2 < len(parent_ids)
+    ])
+
+    subjects = ['الرياضيات', 'الفيزياء', 'الكيمياء', 'اللغة العربية', 'اللغة الإنجليزية']
+    statuses = ['present', 'present', 'present', 'present', 'absent', 'late', 'excused']
+    for student_id in student_ids:
+        days = rng.sample(range(365), records_per_student)
+        db.session.execute(insert(Grade), [
+            {'student_id': student_id, 'teacher_id': teacher_id, 'subject': rng.choice(subjects),
+             'grade': rng.randint(35, 100), 'grade_type': 'exam', 'date_recorded': now - timedelta(days=day)}
+            for day in days
+        ])
+        db.session.execute(insert(Attendance), [
+            {'student_id': student_id, 'teacher_id': teacher_id, 'date': today - timedelta(days=day),
+             'status': rng.choice(statuses)}
+            for day in days
+        ])
+        db.session.execute(insert(BehaviorNote), [
+            {'student_id': student_id, 'teacher_id': teacher_id, 'note_type': rng.choice(['positive', 'negative']),
+             'note': 'ملاحظة', 'date_recorded': now - timedelta(days=day)}
+            for day in days[:records_per_student // 5]
+        ])
+        db.session.execute(insert(AIInsight), [
+            {'student_id': student_id, 'insight_type': 'performance_analysis', 'content': 'تحليل',
+             'generated_at': now - timedelta(days=day), 'is_active': rng.random() > 0.2}
+            for day in days[:3]
+        ])
+    db.session.commit()
+    return student_ids, parent_ids
+
+
+def hot_queries(student_id, parent_id, user_id, class_name):
+    """الاستعلامات الأكثر تكراراً في لوحات التحكم وصفحات الطالب"""
+    return {
+        'student by user_id': select(Student).where(Student.user_id == user_id),
+        'recent grades': select(Grade).where(Grade.student_id == student_id)
+            .order_by(Grade.date_recorded.desc()).limit(20),
+        'attendance by status': select(Attendance.status, func.count(Attendance.id))
+            .where(Attendance.student_id == student_id).group_by(Attendance.status),
+        'attendance range': select(Attendance).where(
+            Attendance.student_id == student_id, Attendance.date >= date.today() - timedelta(days=30)),
+        'recent behavior': select(BehaviorNote).where(BehaviorNote.student_id == student_id)
+            .order_by(BehaviorNote.date_recorded.desc()).limit(10),
+        'active insights': select(AIInsight).where(AIInsight.student_id == student_id, AIInsight.is_active == True)
+            .order_by(AIInsight.generated_at.desc()).limit(5),
+        'parent children': select(ParentStudent).where(ParentStudent.parent_id == parent_id),
+        'class students': select(Student.id).where(Student.class_name == class_name),
+    }
+
+
+def explain(connection, statement):
+    """خطة تنفيذ الاستعلام (SQLite أو PostgreSQL)"""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        return ' | '.join(row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+    return ' | '.join(row[0].strip() for row in connection.execute(text(f'EXPLAIN {sql}')))
+
+
+def run(queries_for, samples, repeats):
+    """تنفيذ كل استعلام على عينة من الطلاب وإرجاع الخطة والزمن الوسيط"""
+    results = {}
+    with db.engine.connect() as connection:
+        for name, statement in queries_for(samples[0]).items():
+            timings = []
+            for sample in samples:
+                query = queries_for(sample)[name]
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    connection.execute(query).fetchall()
+                    timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[name] = (explain(connection, statement), timings[len(timings) // 2])
+    return results
+
+
+def model_indexes():
+    """فهارس النماذج (idx_*) المعرفة في __table_args__"""
+    return [
+        index for table in db.metadata.sorted_tables for index in table.indexes
+        if index.name and index.name.startswith('idx_')
+    ]
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='Composite index query plan benchmark')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--records', type=int, default=60, help='grades/attendance rows per student')
+    parser.add_argument('--samples', type=int, default=20, help='students to query')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--database-url', default='sqlite://')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(args.database_url)
+    with app.app_context():
+        db.create_all()
+        indexes = model_indexes()
+        for index in indexes:
+            index.drop(db.engine, checkfirst=True)
+
+        started = time.perf_counter()
+        student_ids, parent_ids = seed(args.students, args.records)
+        print(f"تم إنشاء {len(student_ids)} طالب و{len(student_ids) * args.records * 2} سجل "
+              f"في {time.perf_counter() - started:.1f} ثانية\n")
+
+        rng = random.Random(7)
+        samples = []
+        for student_id in rng.sample(student_ids, min(args.samples, len(student_ids))):
+            student = db.session.get(Student, student_id)
+            parent_id = db.session.query(ParentStudent.parent_id).filter_by(student_id=student_id).scalar()
+            samples.append((student_id, parent_id or parent_ids[0], student.user_id, student.class_name))
+
+        queries_for = lambda sample: hot_queries(*sample)
+        before = run(queries_for, samples, args.repeats)
+
+        started = time.perf_counter()
+        for index in indexes:
+            index.create(db.engine)
+        with db.engine.begin() as connection:
+            if connection.dialect.name == 'sqlite':
+                connection.execute(text('ANALYZE'))
+        print(f"تم إنشاء {len(indexes)} فهرس في {time.perf_counter() - started:.2f} ثانية\n")
+        after = run(queries_for, samples, args.repeats)
+
+    print(f"{'query':<22} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for name, (_, before_ms) in before.items():
+        after_ms = after[name][1]
+        print(f"{name:<22} {before_ms:>10.3f} {after_ms:>10.3f} {before_ms / max(after_ms, 1e-6):>7.1f}x")
+
+    print("\nخطط التنفيذ:")
+    scans_left = []
+    for name in before:
+        print(f"  {name}\n    قبل: {before[name][0]}\n    بعد: {after[name][0]}")
+        if 'SCAN' in after[name][0] and 'USING' not in after[name][0]:
+            scans_left.append(name)
+
+    if scans_left:
+        print(f"\n❌ استعلامات ما زالت تفحص الجدول كاملاً: {', '.join(scans_left)}")
+        return 1
+
+    print("\n✅ جميع الاستعلامات تستخدم الفهارس")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
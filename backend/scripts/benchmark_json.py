@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+قياس ترميز استجابات JSON
+JSON provider benchmark - encodes a 5k-row attendance history response with
+Flask's default provider, the stdlib provider and the orjson provider, both
+as to_dict() output and as raw rows with native date/time values, and checks
+that every provider produces the same document
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import date, datetime, time as clock, timedelta
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.models.extended_models import AttendanceRecord, Course, Subject
+from src.services.json_provider import StdlibJSONProvider, OrjsonProvider, orjson
+
+STATUSES = ['present', 'present', 'present', 'present', 'absent', 'late', 'excused']
+NOTES = [None, None, None, 'تأخر بسبب المواصلات', 'غياب بعذر طبي', 'حضر بعد الحصة الأولى']
+
+
+def attendance_history(rows, seed):
+    """سجل حضور طالب بمواد عربية الأسماء (كائنات غير محفوظة؛ لا حاجة لقاعدة بيانات)"""
+    rng = random.Random(seed)
+    subjects = [
+        Subject(id=i + 1, name=name, code=code, department='علوم', is_mandatory=True, is_active=True,
+                created_at=datetime(2025, 9, 1))
+        for i, (name, code) in enumerate([
+            ('الرياضيات', 'MATH'), ('الفيزياء', 'PHYS'), ('الكيمياء', 'CHEM'),
+            ('اللغة العربية', 'ARAB'), ('اللغة الإنجليزية', 'ENG'), ('التربية الإسلامية', 'ISL'),
+        ])
+    ]
+    courses = [
+        Course(id=i + 1, classroom_id=1, subject_id=subject.id, teacher_id=i + 1, credit_hours=4,
+               is_active=True, created_at=datetime(2025, 9, 1), subject=subject)
+        for i, subject in enumerate(subjects)
+    ]
+    start = date(2026, 6, 1)
+    records = []
+    for i in range(rows):
+        day = start - timedelta(days=i // len(courses))
+        records.append(AttendanceRecord(
+            id=i + 1, classroom_id=1, student_id=1, course=courses[i % len(courses)],
+            course_id=courses[i % len(courses)].id, attendance_date=day, period=f'period_{i % 7 + 1}',
+            status=rng.choice(STATUSES), arrival_time=clock(7, rng.randint(0, 59)),
+            departure_time=clock(13, 30), notes=rng.choice(NOTES), recorded_by=1,
+            recorded_at=datetime.combine(day, clock(8, rng.randint(0, 59), rng.randint(0, 59)))
+        ))
+    return records
+
+
+def raw_rows(records):
+    """نفس السجلات كقيم خام (تواريخ وأوقات أصلية) كما يعيدها استعلام أعمدة"""
+    return [
+        {'id': r.id, 'attendance_date': r.attendance_date, 'status': r.status, 'period': r.period,
+         'arrival_time': r.arrival_time, 'departure_time': r.departure_time, 'notes': r.notes,
+         'recorded_at': r.recorded_at, 'subject': r.course.subject.name}
+        for r in records
+    ]
+
+
+def measure(app, provider, payload, repeats):
+    """الزمن الوسيط لبناء استجابة jsonify كاملة بالمزود"""
+    app.json = provider
+    timings = []
+    with app.app_context():
+        for _ in range(repeats):
+            started = time.perf_counter()
+            body = app.json.response(payload).get_data()
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], body
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='JSON provider benchmark')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeats', type=int, default=25)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    records = attendance_history(args.rows, args.seed)
+
+    started = time.perf_counter()
+    attendance_records = [record.to_dict('summary') for record in records]
+    to_dict_ms = (time.perf_counter() - started) * 1000
+
+    payloads = {
+        'to_dict': {'attendance_records': attendance_records, 'total_count': len(attendance_records)},
+        'raw rows': {'attendance_records': raw_rows(records), 'total_count': len(records)},
+    }
+    providers = {
+        'flask default': DefaultJSONProvider(app),
+        'stdlib': StdlibJSONProvider(app),
+    }
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(app)
+    else:
+        print('⚠️ orjson غير مثبت؛ يُقاس مزود المكتبة القياسية فقط')
+
+    print(f"{args.rows} سجل حضور؛ to_dict('summary') استغرق {to_dict_ms:.1f} ms\n")
+    print(f"{'payload':<10} {'provider':<14} {'median ms':>10} {'KB':>8} {'speedup':>8}")
+    mismatches = []
+    for payload_name, payload in payloads.items():
+        results = {}
+        for provider_name, provider in providers.items():
+            if payload_name == 'raw rows' and provider_name == 'flask default':
+                continue  # يرمز التواريخ بصيغة HTTP لا ISO 8601 فلا تصح المقارنة
+            results[provider_name] = measure(app, provider, payload, args.repeats)
+
+        reference_ms, reference_body = next(iter(results.values()))
+        for provider_name, (median_ms, body) in results.items():
+            print(f"{payload_name:<10} {provider_name:<14} {median_ms:>10.2f} {len(body) / 1024:>8.1f} "
+                  f"{reference_ms / max(median_ms, 1e-6):>7.1f}x")
+            if json.loads(body) != json.loads(reference_body):
+                mismatches.append(f'{payload_name}/{provider_name}')
+
+    if mismatches:
+        print(f"\n❌ مخرجات مختلفة بين المزودات: {', '.join(mismatches)}")
+        return 1
+
+    print("\n✅ جميع المزودات تنتج المستند نفسه")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
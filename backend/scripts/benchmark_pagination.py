@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+قياس ترقيم قائمة المستخدمين: OFFSET مقابل المؤشر
+Admin user pagination benchmark - fills a file-backed database with tens of
+thousands of users, then times /api/admin/users at page 1 and at a deep page
+with ?page= (COUNT + OFFSET) and with ?cursor= (keyset seek), checking that
+both return the same users
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+ADMIN_PASSWORD = 'admin123'
+
+
+def seed_users(count, seed_value):
+    """إدراج جماعي لمستخدمين بأدوار وتواريخ إنشاء موزعة على عدة سنوات"""
+    from sqlalchemy import insert
+    from src.models.user import db, User
+
+    rng = random.Random(seed_value)
+    roles = ['student'] * 6 + ['parent'] * 3 + ['teacher']
+    started_at = datetime(2022, 9, 1)
+    rows = [
+        {'username': f'pg_user_{i}', 'email': f'pg_user_{i}@bench.local', 'password_hash': 'x',
+         'role': rng.choice(roles), 'name': f'مستخدم {i}', 'is_active': True,
+         'created_at': started_at + timedelta(minutes=rng.randrange(4 * 365 * 24 * 60))}
+        for i in range(count)
+    ]
+    for start in range(0, len(rows), 5000):
+        db.session.execute(insert(User), rows[start:start + 5000])
+
+    admin = User(username='bench_admin', email='bench_admin@bench.local', role='admin', name='مدير القياس')
+    admin.set_password(ADMIN_PASSWORD)
+    db.session.add(admin)
+    db.session.commit()
+
+
+def timed(client, url, repeats):
+    """الزمن الوسيط وعدد الاستعلامات وآخر استجابة"""
+    from src.services.query_metrics import QUERY_COUNT_HEADER
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: {response.status_code} {response.get_json()}')
+    timings.sort()
+    return timings[len(timings) // 2], int(response.headers.get(QUERY_COUNT_HEADER, 0)), response.get_json()
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='Offset vs keyset pagination benchmark for /api/admin/users')
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--page', type=int, default=500, help='deep page to compare')
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(prefix='thanawiya-pagination-'), 'users.db')
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{database}'
+
+    from src.main import create_app
+    from src.models.user import db
+
+    app = create_app('testing')
+    app.config['QUERY_BUDGET_STRICT'] = False
+    app.logger.setLevel('ERROR')
+
+    with app.app_context():
+        started = time.perf_counter()
+        seed_users(args.users, args.seed)
+        print(f"تم إنشاء {args.users:,} مستخدم في {time.perf_counter() - started:.1f} ثانية\n")
+
+    client = app.test_client()
+    response = client.post('/api/login', json={'username': 'bench_admin', 'password': ADMIN_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed: {response.status_code}')
+
+    cases = [
+        ('all users', '', 'role'),
+        ('role=student', '&role=student', 'role'),
+        ('by created_at', '', 'created_at'),
+    ]
+    print(f"{'listing':<15} {'page':>5} {'offset ms':>10} {'queries':>8} {'cursor ms':>10} {'queries':>8} {'speedup':>8}")
+    mismatches = []
+    for name, filters, sort in cases:
+        base = f'/api/admin/users?per_page={args.per_page}&sort={sort}{filters}'
+        pages = client.get(f'{base}&page=1').get_json()['pages']
+        for page in sorted({1, min(args.page, pages)}):
+            offset_ms, offset_queries, offset_page = timed(client, f'{base}&page={page}', args.repeats)
+
+            if page == 1:
+                cursor_ms, cursor_queries, cursor_page = offset_ms, offset_queries, offset_page
+            else:
+                # مؤشر الصفحة المطلوبة = next_cursor للصفحة التي قبلها (خارج القياس)
+                previous = client.get(f'{base}&page={page - 1}').get_json()
+                cursor_ms, cursor_queries, cursor_page = timed(
+                    client, f"{base}&cursor={previous['next_cursor']}", args.repeats
+                )
+
+            if [u['id'] for u in offset_page['users']] != [u['id'] for u in cursor_page['users']]:
+                mismatches.append(f'{name} page {page}')
+            print(f"{name:<15} {page:>5} {offset_ms:>10.2f} {offset_queries:>8} {cursor_ms:>10.2f} "
+                  f"{cursor_queries:>8} {offset_ms / max(cursor_ms, 1e-6):>7.1f}x")
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(database)
+
+    if mismatches:
+        print(f"\n❌ صفحات المؤشر لا تطابق صفحات OFFSET: {', '.join(mismatches)}")
+        return 1
+
+    print("\n✅ صفحات المؤشر تطابق صفحات OFFSET")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
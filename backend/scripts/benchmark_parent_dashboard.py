@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+قياس أداء لوحة تحكم ولي الأمر
+Parent dashboard benchmark - verifies that the number of SQL queries issued by
+the dashboard does not grow with the number of children
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import date, datetime, timedelta
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from src.models.user import (
+    db, User, Student, Teacher, Parent, ParentStudent, Grade, Attendance,
+    BehaviorNote, Tuition, AIInsight
+)
+from src.routes.parent import parent_bp
+from src.services.query_metrics import init_query_metrics, QUERY_COUNT_HEADER
+
+
+def create_benchmark_app(database_url):
+    """إنشاء تطبيق مصغر يحتوي على مسارات ولي الأمر فقط"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'benchmark-secret-key'
+    app.config['TESTING'] = True
+    app.config['QUERY_METRICS_ENABLED'] = True
+    app.config['QUERY_BUDGET_STRICT'] = True
+
+    db.init_app(app)
+    init_query_metrics(app, db)
+    app.register_blueprint(parent_bp, url_prefix='/api/parent')
+    return app
+
+
+def seed_family(children_count, records_per_child, family_index):
+    """إنشاء ولي أمر مع عدد محدد من الأبناء وسجلاتهم"""
+    teacher_user = User(
+        username=f'bench_teacher_{family_index}', email=f'teacher{family_index}@bench.local',
+        password_hash='x', role='teacher', name='معلم القياس'
+    )
+    parent_user = User(
+        username=f'bench_parent_{family_index}', email=f'parent{family_index}@bench.local',
+        password_hash='x', role='parent', name='ولي أمر القياس'
+    )
+    db.session.add_all([teacher_user, parent_user])
+    db.session.flush()
+
+    teacher = Teacher(user_id=teacher_user.id, teacher_id=f'BT{family_index:05d}')
+    parent = Parent(user_id=parent_user.id, relationship='father')
+    db.session.add_all([teacher, parent])
+    db.session.flush()
+
+    statuses = ['present', 'present', 'present', 'absent', 'late', 'excused']
+    subjects = ['الرياضيات', 'الفيزياء', 'الكيمياء', 'اللغة العربية']
+    now = datetime.utcnow()
+
+    for child_index in range(children_count):
+        student_user = User(
+            username=f'bench_student_{family_index}_{child_index}',
+            email=f'student{family_index}_{child_index}@bench.local',
+            password_hash='x', role='student', name=f'طالب {child_index}'
+        )
+        db.session.add(student_user)
+        db.session.flush()
+
+        student = Student(
+            user_id=student_user.id,
+            student_id=f'BS{family_index:03d}{child_index:03d}',
+            class_name='3أ'
+        )
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(ParentStudent(parent_id=parent.id, student_id=student.id))
+
+        records = []
+        for i in range(records_per_child):
+            records.append(Grade(
+                student_id=student.id, teacher_id=teacher.id,
+                subject=subjects[i % len(subjects)], grade=50 + (i * 7) % 50,
+                grade_type='exam', date_recorded=now - timedelta(days=i)
+            ))
+            records.append(Attendance(
+                student_id=student.id, teacher_id=teacher.id,
+                date=date.today() - timedelta(days=i), status=statuses[i % len(statuses)]
+            ))
+            if i % 5 == 0:
+                records.append(BehaviorNote(
+                    student_id=student.id, teacher_id=teacher.id,
+                    note_type='positive' if i % 2 else 'negative', note='ملاحظة',
+                    date_recorded=now - timedelta(days=i)
+                ))
+                records.append(AIInsight(
+                    student_id=student.id, insight_type='performance_analysis',
+                    content='تحليل', generated_at=now - timedelta(days=i)
+                ))
+        records.append(Tuition(
+            student_id=student.id, academic_year='2024-2025', total_amount=1000,
+            paid_amount=250, due_date=date.today()
+        ))
+        db.session.add_all(records)
+
+    db.session.commit()
+    return parent_user.id
+
+
+def measure(app, parent_user_id, repeats):
+    """قياس عدد الاستعلامات والزمن لطلب واحد من لوحة التحكم"""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = parent_user_id
+        sess['user_role'] = 'parent'
+
+    timings = []
+    query_count = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get('/api/parent/dashboard')
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'dashboard returned {response.status_code}: {response.get_json()}')
+        query_count = int(response.headers[QUERY_COUNT_HEADER])
+
+    timings.sort()
+    return query_count, timings[len(timings) // 2]
+
+
+def main():
+    """تشغيل القياس لعدد متزايد من الأبناء"""
+    parser = argparse.ArgumentParser(description='Parent dashboard query-count benchmark')
+    parser.add_argument('--children', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--records', type=int, default=200, help='grades/attendance rows per child')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--database-url', default='sqlite://')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(args.database_url)
+    with app.app_context():
+        db.create_all()
+
+    print(f"{'children':>10} {'queries':>10} {'median ms':>12}")
+    query_counts = set()
+    for family_index, children_count in enumerate(args.children):
+        with app.app_context():
+            parent_user_id = seed_family(children_count, args.records, family_index)
+        query_count, median_ms = measure(app, parent_user_id, args.repeats)
+        query_counts.add(query_count)
+        print(f"{children_count:>10} {query_count:>10} {median_ms:>12.2f}")
+
+    if len(query_counts) != 1:
+        print("❌ عدد الاستعلامات يزداد مع عدد الأبناء")
+        return 1
+
+    print("✅ عدد الاستعلامات ثابت بغض النظر عن عدد الأبناء")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+قياس البحث عن المستخدمين: LIKE مقابل فهرس البحث
+User search benchmark - fills a file-backed database with 100k users whose
+Arabic names are written with mixed hamza / taa marbuta / diacritic variants,
+then times /api/admin/users?search= through the search index and through the
+LIKE fallback, checking the index returns exactly the users whose normalized
+name, username or email contains every search term
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+from benchmark_pagination import ADMIN_PASSWORD, timed
+
+QUERIES = ['احمد', 'أحمد الموسوي', 'فاطمه', 'حسين الحسيني', 'الجبور', 'زينب علي', 'user_4242', 'نور']
+
+# كتابات بديلة شائعة للاسم نفسه كما يدخلها المستخدمون
+VARIANTS = [
+    ('أ', 'ا'), ('إ', 'ا'), ('ة', 'ه'), ('ى', 'ي'),
+    ('فاطمة', 'فاطِمة'), ('محمد', 'مُحَمَّد'), ('علي', 'عليّ'),
+]
+
+
+def spelled(name, rng):
+    """الاسم بكتابة بديلة أحياناً"""
+    for original, variant in VARIANTS:
+        if original in name and rng.random() < 0.3:
+            name = name.replace(original, variant)
+    return name
+
+
+def seed_users(count, seed_value):
+    """إدراج جماعي لمستخدمين بأسماء عربية ثم بناء الفهرس مرة واحدة"""
+    from sqlalchemy import insert
+    from src.models.user import db, User
+    from src.services.user_search import UserSearchIndex
+    from generate_dataset import person_name
+
+    rng = random.Random(seed_value)
+    roles = ['student'] * 6 + ['parent'] * 3 + ['teacher']
+    rows = [
+        {'username': f'user_{i}', 'email': f'user_{i}@bench.local', 'password_hash': 'x',
+         'role': rng.choice(roles), 'name': spelled(person_name(rng), rng), 'is_active': True}
+        for i in range(count)
+    ]
+    for start in range(0, len(rows), 5000):
+        db.session.execute(insert(User), rows[start:start + 5000])
+
+    admin = User(username='bench_admin', email='bench_admin@bench.local', role='admin', name='مدير القياس')
+    admin.set_password(ADMIN_PASSWORD)
+    db.session.add(admin)
+    # الإدراج الجماعي لا يطلق أحداث ORM
+    indexed = UserSearchIndex.rebuild()
+    db.session.commit()
+    return indexed
+
+
+def expected_matches(search):
+    """المعرفات المتوقعة بمطابقة نصية للوثائق الموحدة في بايثون"""
+    from src.models.user import User
+    from src.services.user_search import normalize_arabic, user_document
+
+    terms = normalize_arabic(search).split()
+    return {
+        user.id for user in User.query.with_entities(User.id, User.name, User.username, User.email)
+        if all(term in user_document(user.name, user.username, user.email) for term in terms)
+    }
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='LIKE vs search index benchmark for /api/admin/users?search=')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(prefix='thanawiya-search-'), 'users.db')
+    os.environ['TEST_DATABASE_URL'] = f'sqlite:///{database}'
+
+    from src.main import create_app
+    from src.models.user import db
+    from src.services import user_search
+
+    app = create_app('testing')
+    app.config['QUERY_BUDGET_STRICT'] = False
+    app.logger.setLevel('ERROR')
+
+    with app.app_context():
+        started = time.perf_counter()
+        indexed = seed_users(args.users, args.seed)
+        print(f"تم إنشاء وفهرسة {indexed:,} مستخدم في {time.perf_counter() - started:.1f} ثانية\n")
+        engine = db.engine
+        expected = {search: expected_matches(search) for search in QUERIES}
+
+    client = app.test_client()
+    response = client.post('/api/login', json={'username': 'bench_admin', 'password': ADMIN_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed: {response.status_code}')
+
+    print(f"{'search':<14} {'LIKE ms':>9} {'found':>7} {'index ms':>9} {'found':>7} {'speedup':>8}")
+    mismatches = []
+    for search in QUERIES:
+        url = f'/api/admin/users?per_page=20&search={search}'
+
+        user_search._available[engine] = False  # مسار LIKE الاحتياطي
+        like_ms, _, like_page = timed(client, url, args.repeats)
+        user_search._available[engine] = True
+        index_ms, _, index_page = timed(client, url, args.repeats)
+
+        returned = {user['id'] for user in index_page['users']}
+        if index_page['total'] != len(expected[search]) or not returned <= expected[search]:
+            mismatches.append(search)
+        print(f"{search:<14} {like_ms:>9.2f} {like_page['total']:>7} {index_ms:>9.2f} {index_page['total']:>7} "
+              f"{like_ms / max(index_ms, 1e-6):>7.1f}x")
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    os.remove(database)
+
+    if mismatches:
+        print(f"\n❌ نتائج الفهرس لا تطابق المطابقة الموحدة: {', '.join(mismatches)}")
+        return 1
+
+    print("\n✅ نتائج الفهرس تطابق المطابقة الموحدة (LIKE لا يجد الكتابات البديلة)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+قياس أداء توليد أسماء المستخدمين
+Username generation benchmark - compares the old per-user lookup loop with the
+batch allocator and checks uniqueness when several worker processes allocate
+at the same time
+"""
+
+import os
+import sys
+import time
+import secrets
+import string
+import argparse
+import tempfile
+from multiprocessing import Pool
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from sqlalchemy import event, insert, func
+from src.models.user import db, User
+from src.models.extended_models import UsernameAllocator
+
+NAMES = ['أحمد علي', 'محمد حسن', 'فاطمة كريم', 'زينب عباس', 'علي حسين', 'Sara Ahmed']
+ROLES = ['student', 'student', 'student', 'parent']
+
+
+def create_benchmark_app(database_url):
+    """إنشاء تطبيق مصغر لقاعدة بيانات القياس"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(app)
+    return app
+
+
+def legacy_generate_username(base_name, role):
+    """نسخة من الخوارزمية القديمة: لاحقة عشوائية ثم استعلام لكل محاولة"""
+    cleaned_name = ''.join(e for e in base_name if e.isalnum())[:10]
+    role_prefix = {'student': 'st', 'teacher': 'tr', 'parent': 'pr', 'admin': 'ad'}.get(role, 'us')
+    suffix = ''.join(secrets.choice(string.digits) for _ in range(4))
+    username = f"{role_prefix}_{cleaned_name}_{suffix}".lower()
+
+    counter = 1
+    original_username = username
+    while User.query.filter_by(username=username).first():
+        username = f"{original_username}_{counter}"
+        counter += 1
+    return username
+
+
+def build_entries(count, offset=0):
+    """قائمة (الاسم، الدور) للقياس"""
+    return [
+        (NAMES[(offset + i) % len(NAMES)], ROLES[(offset + i) % len(ROLES)])
+        for i in range(count)
+    ]
+
+
+def insert_users(usernames, tag):
+    """حفظ المستخدمين حتى تكون عمليات التحقق من التكرار واقعية"""
+    db.session.execute(insert(User), [
+        {
+            'username': username, 'email': f'{tag}_{i}_{username}@bench.local',
+            'password_hash': 'x', 'role': 'student', 'name': 'bench'
+        }
+        for i, username in enumerate(usernames)
+    ])
+    db.session.commit()
+
+
+def run_batches(generate, entries, batch_size, tag):
+    """توليد الأسماء على دفعات وحفظ كل دفعة"""
+    usernames = []
+    for start in range(0, len(entries), batch_size):
+        batch = generate(entries[start:start + batch_size])
+        insert_users(batch, f'{tag}{start}')
+        usernames.extend(batch)
+    return usernames
+
+
+def measure(app, label, generate, entries, batch_size):
+    """قياس الزمن وعدد الاستعلامات لطريقة توليد واحدة"""
+    statements = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('INSERT INTO USER '):
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', count_query)
+        try:
+            started = time.perf_counter()
+            usernames = run_batches(generate, entries, batch_size, label)
+            elapsed = time.perf_counter() - started
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_query)
+
+    duplicates = len(usernames) - len(set(usernames))
+    print(f"{label:>10} {len(usernames):>10} {len(statements):>10} {elapsed:>10.2f} {duplicates:>12}")
+    return duplicates
+
+
+def worker_allocate(args):
+    """عملية مستقلة تحجز أسماء من نفس قاعدة البيانات"""
+    database_url, worker_index, count, batch_size = args
+    app = create_benchmark_app(database_url)
+    with app.app_context():
+        entries = build_entries(count, offset=worker_index)
+        return run_batches(UsernameAllocator.allocate, entries, batch_size, f'w{worker_index}_')
+
+
+def check_concurrency(workers, count, batch_size):
+    """تشغيل عدة عمليات بالتوازي على ملف SQLite مشترك والتحقق من عدم التكرار"""
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'usernames.db')}"
+        app = create_benchmark_app(database_url)
+        with app.app_context():
+            db.create_all()
+
+        per_worker = count // workers
+        started = time.perf_counter()
+        with Pool(workers) as pool:
+            results = pool.map(
+                worker_allocate,
+                [(database_url, i, per_worker, batch_size) for i in range(workers)]
+            )
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            stored = db.session.query(func.count(User.id)).scalar()
+            distinct = db.session.query(func.count(func.distinct(User.username))).scalar()
+
+    generated = sum(len(usernames) for usernames in results)
+    print(f"{workers} عمليات: {generated} اسم في {elapsed:.2f} ثانية، {distinct} اسم فريد من {stored}")
+    return generated == stored == distinct
+
+
+def main():
+    """تشغيل القياس"""
+    parser = argparse.ArgumentParser(description='Username allocation benchmark')
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    entries = build_entries(args.count)
+
+    print(f"{'method':>10} {'usernames':>10} {'queries':>10} {'seconds':>10} {'duplicates':>12}")
+    duplicates = 0
+    if not args.skip_legacy:
+        app = create_benchmark_app('sqlite://')
+        with app.app_context():
+            db.create_all()
+        # الخوارزمية القديمة لا ترى إلا الأسماء المحفوظة، لذا يُحفظ كل مستخدم على حدة
+        duplicates += measure(
+            app, 'legacy',
+            lambda batch: [legacy_generate_username(name, role) for name, role in batch],
+            entries, 1
+        )
+
+    app = create_benchmark_app('sqlite://')
+    with app.app_context():
+        db.create_all()
+    duplicates += measure(app, 'allocator', UsernameAllocator.allocate, entries, args.batch_size)
+
+    concurrent_ok = check_concurrency(args.workers, args.count, args.batch_size)
+
+    if duplicates or not concurrent_ok:
+        print("❌ تم توليد أسماء مستخدمين مكررة")
+        return 1
+
+    print("✅ جميع أسماء المستخدمين فريدة")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+سكريبت إعادة بناء ملخصات الطلاب
+Student summary rebuild - recomputes student_summaries from the raw grade,
+attendance and behavior rows, for every student or a given list. Run it after
+bulk imports that bypass ORM events, or to repair drift (migration 008
+backfills existing students itself)
+
+    python scripts/rebuild_student_summaries.py [--student-ids 12 15 40]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
+
+from src.models.user import db
+from src.services.student_summary import StudentSummaryService
+from src.main import create_app
+
+
+def main():
+    """تشغيل إعادة البناء"""
+    parser = argparse.ArgumentParser(description='Rebuild materialized student summaries')
+    parser.add_argument('--student-ids', type=int, nargs='+', help='rebuild only these students')
+    args = parser.parse_args()
+
+    app = create_app(os.environ.get('FLASK_ENV', 'production'))
+    with app.app_context():
+        started = time.perf_counter()
+        try:
+            rebuilt = StudentSummaryService.rebuild(args.student_ids)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ فشل إعادة بناء الملخصات: {e}")
+            return 1
+
+    print(f"✅ تم بناء ملخصات {rebuilt} طالب في {time.perf_counter() - started:.2f} ثانية")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
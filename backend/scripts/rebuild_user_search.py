@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+سكريبت إعادة بناء فهرس البحث عن المستخدمين
+User search index rebuild - recreates the normalized search document of
+every user (SQLite FTS5 / PostgreSQL pg_trgm). Run it after the migration,
+after bulk inserts that bypass ORM events, or when the normalization changes
+
+    python scripts/rebuild_user_search.py
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
+
+from src.models.user import db
+from src.services.user_search import UserSearchIndex, SUPPORTED_DIALECTS
+from src.main import create_app
+
+
+def main():
+    """تشغيل إعادة البناء"""
+    app = create_app(os.environ.get('FLASK_ENV', 'production'))
+    with app.app_context():
+        if db.engine.dialect.name not in SUPPORTED_DIALECTS:
+            print(f"❌ فهرس البحث غير مدعوم على {db.engine.dialect.name}")
+            return 1
+
+        started = time.perf_counter()
+        try:
+            indexed = UserSearchIndex.rebuild()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ فشل إعادة بناء فهرس البحث: {e}")
+            return 1
+
+    print(f"✅ تمت فهرسة {indexed} مستخدم في {time.perf_counter() - started:.2f} ثانية")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
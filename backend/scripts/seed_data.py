@@ -12,8 +12,9 @@ from datetime import date, datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from src.models.user import db, User
-from src.models.extended_models import AcademicYear, Subject
+from src.models.extended_models import AcademicYear, Subject, generate_random_password
 from src.services.user_creation import UserCreationService
+from src.services.password_hashing import hash_passwords
 from src import create_app
 
 
@@ -226,16 +227,6 @@ def create_sample_users():
         }
     ]
     
-    for teacher_data in teachers_data:
-        result = UserCreationService.create_teacher_with_credentials(**teacher_data)
-        if result['success']:
-            creds = result['credentials']
-            print(f"✅ معلم: {teacher_data['name']}")
-            print(f"   اسم المستخدم: {creds['username']}")
-            print(f"   كلمة المرور: {creds['password']}")
-        else:
-            print(f"❌ فشل في إنشاء المعلم {teacher_data['name']}: {result['error']}")
-    
     # Create sample students
     students_data = [
         {
@@ -254,16 +245,6 @@ def create_sample_users():
         }
     ]
     
-    for student_data in students_data:
-        result = UserCreationService.create_student_with_credentials(**student_data)
-        if result['success']:
-            creds = result['credentials']
-            print(f"✅ طالب: {student_data['name']}")
-            print(f"   اسم المستخدم: {creds['username']}")
-            print(f"   كلمة المرور: {creds['password']}")
-        else:
-            print(f"❌ فشل في إنشاء الطالب {student_data['name']}: {result['error']}")
-    
     # Create sample parents
     parents_data = [
         {
@@ -275,6 +256,33 @@ def create_sample_users():
         }
     ]
     
+    # تجزئة كلمات مرور جميع المستخدمين دفعة واحدة على كل أنوية المعالج
+    all_users_data = teachers_data + students_data + parents_data
+    passwords = [generate_random_password() for _ in all_users_data]
+    for user_data, password, password_hash in zip(all_users_data, passwords, hash_passwords(passwords)):
+        user_data['password'] = password
+        user_data['password_hash'] = password_hash
+    
+    for teacher_data in teachers_data:
+        result = UserCreationService.create_teacher_with_credentials(**teacher_data)
+        if result['success']:
+            creds = result['credentials']
+            print(f"✅ معلم: {teacher_data['name']}")
+            print(f"   اسم المستخدم: {creds['username']}")
+            print(f"   كلمة المرور: {creds['password']}")
+        else:
+            print(f"❌ فشل في إنشاء المعلم {teacher_data['name']}: {result['error']}")
+    
+    for student_data in students_data:
+        result = UserCreationService.create_student_with_credentials(**student_data)
+        if result['success']:
+            creds = result['credentials']
+            print(f"✅ طالب: {student_data['name']}")
+            print(f"   اسم المستخدم: {creds['username']}")
+            print(f"   كلمة المرور: {creds['password']}")
+        else:
+            print(f"❌ فشل في إنشاء الطالب {student_data['name']}: {result['error']}")
+    
     for parent_data in parents_data:
         result = UserCreationService.create_parent_with_credentials(**parent_data)
         if result['success']:
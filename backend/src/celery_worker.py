@@ -0,0 +1,18 @@
+"""
+نقطة تشغيل عامل Celery لمهام الذكاء الاصطناعي
+Celery worker entry point for AI jobs
+
+    celery -A src.celery_worker.celery worker --loglevel=info
+"""
+
+import os
+import sys
+
+# main.py imports `config` as a top-level module
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.main import create_app
+from src.services.ai_jobs import make_celery
+
+app = create_app(os.environ.get('FLASK_ENV', 'production'))
+celery = make_celery(app)
@@ -15,6 +15,52 @@ class Config:
     # File Upload Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
+    EXCEL_IMPORT_CHUNK_SIZE = int(os.environ.get('EXCEL_IMPORT_CHUNK_SIZE', 500))
+    IMPORT_JOB_STALE_AFTER = int(os.environ.get('IMPORT_JOB_STALE_AFTER', 3600))  # seconds without progress, 0 disables
+
+    # Password Hashing Configuration
+    PASSWORD_HASH_PROFILE = os.environ.get('PASSWORD_HASH_PROFILE', 'strong')  # strong, fast (tests only)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))  # 0 = all cores
+
+    # AI Batch Analysis Configuration
+    AI_BATCH_CONCURRENCY = int(os.environ.get('AI_BATCH_CONCURRENCY', 5))
+    AI_REQUESTS_PER_MINUTE = int(os.environ.get('AI_REQUESTS_PER_MINUTE', 60))
+    AI_INSIGHT_CACHE_TTL = int(os.environ.get('AI_INSIGHT_CACHE_TTL', 24 * 60 * 60))  # seconds, 0 disables
+
+    # AI Job Queue Configuration (celery, or thread for single-node installs)
+    AI_JOB_BACKEND = os.environ.get('AI_JOB_BACKEND', 'thread')
+    AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', 2))
+    AI_JOB_STALE_AFTER = int(os.environ.get('AI_JOB_STALE_AFTER', 3600))  # seconds a job may stay running, 0 disables
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Query Metrics (X-DB-Query-Count / X-DB-Time-Ms headers, N+1 warnings, @query_budget)
+    # Off by default: the headers expose database timings to every client
+    QUERY_METRICS_ENABLED = os.environ.get('QUERY_METRICS_ENABLED', 'false').lower() == 'true'
+    QUERY_METRICS_LOG = os.environ.get('QUERY_METRICS_LOG', 'false').lower() == 'true'
+    QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 10))
+    QUERY_BUDGET_STRICT = False  # raise instead of logging when a budget is exceeded
+
+    # Request Profiling (paths matching PROFILE_PATH_PATTERN, or admin requests with X-Profile header)
+    PROFILING_ENABLED = os.environ.get('ENABLE_PROFILING', 'false').lower() == 'true'
+    PROFILER = os.environ.get('PROFILER', 'sampling')  # sampling (.folded), cprofile (.prof)
+    PROFILE_PATH_PATTERN = os.environ.get('PROFILE_PATH_PATTERN', '')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join('logs', 'profiles'))
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 100))
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005))  # seconds
+
+    # Dashboard Response Cache (redis; memory is a per-process LRU, correct only with a single worker)
+    DASHBOARD_CACHE_ENABLED = os.environ.get('DASHBOARD_CACHE_ENABLED', 'true').lower() == 'true'
+    DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'redis')  # redis, memory
+    DASHBOARD_CACHE_REDIS_URL = os.environ.get('DASHBOARD_CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))  # seconds
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 2048))  # LRU only
+    SCHOOL_STATS_TTL = int(os.environ.get('SCHOOL_STATS_TTL', 30))  # seconds; /api/admin/stats
+
+    # Keyset Pagination (?total=cached keeps COUNT(*) results per filter for this many seconds)
+    PAGINATION_TOTAL_TTL = int(os.environ.get('PAGINATION_TOTAL_TTL', 60))
+
+    # JSON Encoding (orjson when installed, otherwise stdlib json)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')  # orjson, stdlib
 
     # Session Configuration
     SESSION_COOKIE_SECURE = True
@@ -25,6 +71,9 @@ class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///dev_app.db'
+    QUERY_METRICS_ENABLED = os.environ.get('QUERY_METRICS_ENABLED', 'true').lower() == 'true'
+    DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND', 'memory')  # single-process dev server
+    QUERY_METRICS_LOG = os.environ.get('QUERY_METRICS_LOG', 'true').lower() == 'true'
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -35,8 +84,13 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_PROFILE = 'fast'
+    PASSWORD_HASH_WORKERS = 1
+    QUERY_METRICS_ENABLED = True
+    QUERY_BUDGET_STRICT = True
+    DASHBOARD_CACHE_BACKEND = 'memory'  # keep tests independent of a local Redis
 
 config = {
     'development': DevelopmentConfig,
@@ -16,6 +16,11 @@ from config import config
 
 # Import database
 from src.models.user import db
+from src.services.query_metrics import init_query_metrics
+from src.services.request_profiler import init_request_profiler
+from src.services.dashboard_cache import init_dashboard_cache
+from src.services.json_provider import init_json_provider
+from src.services.user_search import init_user_search
 
 # Import routes
 from src.routes.auth import auth_bp
@@ -23,6 +28,7 @@ from src.routes.student import student_bp
 from src.routes.parent import parent_bp
 from src.routes.excel import excel_bp
 from src.routes.admin import admin_bp
+from src.routes.teacher import teacher_bp
 
 # Try to import AI routes
 AI_AVAILABLE = False
@@ -40,6 +46,9 @@ def create_app(config_name='default'):
     # Load configuration
     app.config.from_object(config[config_name])
 
+    # JSON encoding for jsonify / request.get_json (orjson when installed)
+    init_json_provider(app)
+
     # Initialize database
     db.init_app(app)
 
@@ -71,6 +80,15 @@ def create_app(config_name='default'):
         app.logger.setLevel(logging.INFO)
         app.logger.info('Application startup')
 
+    # Per-request query count / DB time instrumentation
+    init_query_metrics(app, db)
+
+    # Opt-in request profiling (no hooks are registered unless enabled)
+    init_request_profiler(app)
+
+    # Dashboard response cache (invalidated on grade/attendance/... commits)
+    init_dashboard_cache(app)
+
     # Register blueprints with error handling
     try:
         app.register_blueprint(auth_bp, url_prefix='/api')
@@ -78,6 +96,7 @@ def create_app(config_name='default'):
         app.register_blueprint(parent_bp, url_prefix='/api')
         app.register_blueprint(excel_bp, url_prefix='/api')
         app.register_blueprint(admin_bp, url_prefix='/api/admin')
+        app.register_blueprint(teacher_bp, url_prefix='/api/teacher')
 
         if AI_AVAILABLE:
             app.register_blueprint(ai_bp, url_prefix='/api')
@@ -141,6 +160,8 @@ def create_app(config_name='default'):
         try:
             db.create_all()
             app.logger.info('Database tables created successfully')
+            # FTS5 / pg_trgm tables are not part of the model metadata
+            init_user_search(app)
         except Exception as e:
             app.logger.error(f'Error creating database tables: {e}')
             raise
@@ -1,9 +1,13 @@
 from datetime import datetime, date
+from bisect import bisect_right
 import secrets
 import string
-from sqlalchemy import func
+from sqlalchemy import func, select, insert, exists, literal, cast, String
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from src import db
-from src.models.user import User, Student, Teacher, Parent
+from src.models.serialization import SerializableMixin, DEFAULT_PROFILE
+from src.models.user import User, Student, Teacher, Parent, ParentStudent
 
 
 def generate_random_password(length=8):
@@ -12,36 +16,29 @@ def generate_random_password(length=8):
     return ''.join(secrets.choice(characters) for _ in range(length))
 
 
+ROLE_PREFIXES = {
+    'student': 'st',
+    'teacher': 'tr',
+    'parent': 'pr',
+    'admin': 'ad'
+}
+
+# Sequence numbers start above the 4-digit random suffixes used by older
+# usernames, so allocated names never collide with them.
+USERNAME_SEQUENCE_START = 10000
+
+
 def generate_username(base_name, role):
     """Generate unique username based on name and role."""
-    # Clean and format base name
-    cleaned_name = ''.join(e for e in base_name if e.isalnum())[:10]
-    
-    # Add role prefix
-    role_prefix = {
-        'student': 'st',
-        'teacher': 'tr', 
-        'parent': 'pr',
-        'admin': 'ad'
-    }.get(role, 'us')
-    
-    # Generate random suffix
-    suffix = ''.join(secrets.choice(string.digits) for _ in range(4))
-    
-    username = f"{role_prefix}_{cleaned_name}_{suffix}".lower()
-    
-    # Ensure uniqueness
-    from src.models.user import User
-    counter = 1
-    original_username = username
-    while User.query.filter_by(username=username).first():
-        username = f"{original_username}_{counter}"
-        counter += 1
-    
-    return username
+    return UsernameAllocator.allocate([(base_name, role)])[0]
 
 
-class UserCredentials(db.Model):
+def generate_usernames(entries):
+    """Generate unique usernames for many (base_name, role) pairs."""
+    return UsernameAllocator.allocate(entries)
+
+
+class UserCredentials(SerializableMixin, db.Model):
     """جدول لحفظ بيانات تسجيل الدخول المُنشأة تلقائياً"""
     __tablename__ = 'user_credentials'
     
@@ -58,7 +55,12 @@ class UserCredentials(db.Model):
     
     user = db.relationship('User', backref=db.backref('credentials', uselist=False))
     
-    def to_dict(self):
+    SERIALIZATION_PROFILES = {
+        'summary': {'user': 'summary'},
+        'detail': {'user': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -70,7 +72,7 @@ class UserCredentials(db.Model):
             'viewed_at': self.viewed_at.isoformat() if self.viewed_at else None,
             'delivered_to_user': self.delivered_to_user,
             'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None,
-            'user': self.user.to_dict() if self.user else None
+            **self.serialize_relations(profile)
         }
 
 
@@ -96,7 +98,7 @@ class AcademicYear(db.Model):
         }
 
 
-class Classroom(db.Model):
+class Classroom(SerializableMixin, db.Model):
     """الفصول الدراسية"""
     __tablename__ = 'classrooms'
     
@@ -116,6 +118,11 @@ class Classroom(db.Model):
     academic_year = db.relationship('AcademicYear', backref='classrooms')
     homeroom_teacher = db.relationship('Teacher', backref='homeroom_classes')
     
+    SERIALIZATION_PROFILES = {
+        'summary': {'enrollments': None},
+        'detail': {'academic_year': 'detail', 'homeroom_teacher': 'detail', 'enrollments': None}
+    }
+    
     @property
     def enrolled_count(self):
         return len(self.enrollments)
@@ -124,7 +131,7 @@ class Classroom(db.Model):
     def available_spots(self):
         return self.capacity - self.enrolled_count
     
-    def to_dict(self):
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'name': self.name,
@@ -140,8 +147,7 @@ class Classroom(db.Model):
             'room_number': self.room_number,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'academic_year': self.academic_year.to_dict() if self.academic_year else None,
-            'homeroom_teacher': self.homeroom_teacher.to_dict() if self.homeroom_teacher else None
+            **self.serialize_relations(profile)
         }
 
 
@@ -176,7 +182,7 @@ class Subject(db.Model):
         }
 
 
-class Course(db.Model):
+class Course(SerializableMixin, db.Model):
     """ربط المادة بالفصل والمعلم"""
     __tablename__ = 'courses'
     
@@ -193,7 +199,12 @@ class Course(db.Model):
     subject = db.relationship('Subject', backref='courses')
     teacher = db.relationship('Teacher', backref='courses')
     
-    def to_dict(self):
+    SERIALIZATION_PROFILES = {
+        'summary': {'subject': 'summary'},
+        'detail': {'classroom': 'detail', 'subject': 'detail', 'teacher': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         import json
         return {
             'id': self.id,
@@ -204,13 +215,11 @@ class Course(db.Model):
             'credit_hours': self.credit_hours,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'classroom': self.classroom.to_dict() if self.classroom else None,
-            'subject': self.subject.to_dict() if self.subject else None,
-            'teacher': self.teacher.to_dict() if self.teacher else None
+            **self.serialize_relations(profile)
         }
 
 
-class Enrollment(db.Model):
+class Enrollment(SerializableMixin, db.Model):
     """تسجيل الطلاب في الفصول"""
     __tablename__ = 'enrollments'
     
@@ -225,9 +234,17 @@ class Enrollment(db.Model):
     student = db.relationship('Student', backref='enrollments')
     
     # Unique constraint to prevent duplicate enrollments
-    __table_args__ = (db.UniqueConstraint('classroom_id', 'student_id', name='unique_enrollment'),)
+    __table_args__ = (
+        db.UniqueConstraint('classroom_id', 'student_id', name='unique_enrollment'),
+        db.Index('idx_enrollments_student_status', 'student_id', 'status'),
+    )
     
-    def to_dict(self):
+    SERIALIZATION_PROFILES = {
+        'summary': {'classroom': 'summary', 'student': 'summary'},
+        'detail': {'classroom': 'detail', 'student': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'classroom_id': self.classroom_id,
@@ -235,12 +252,11 @@ class Enrollment(db.Model):
             'enrollment_date': self.enrollment_date.isoformat() if self.enrollment_date else None,
             'status': self.status,
             'notes': self.notes,
-            'classroom': self.classroom.to_dict() if self.classroom else None,
-            'student': self.student.to_dict() if self.student else None
+            **self.serialize_relations(profile)
         }
 
 
-class Assignment(db.Model):
+class Assignment(SerializableMixin, db.Model):
     """الواجبات"""
     __tablename__ = 'assignments'
     
@@ -257,7 +273,12 @@ class Assignment(db.Model):
     
     course = db.relationship('Course', backref='assignments')
     
-    def to_dict(self):
+    SERIALIZATION_PROFILES = {
+        'summary': {'course': 'summary'},
+        'detail': {'course': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         import json
         return {
             'id': self.id,
@@ -270,11 +291,11 @@ class Assignment(db.Model):
             'assigned_date': self.assigned_date.isoformat() if self.assigned_date else None,
             'attachments': json.loads(self.attachments_json) if self.attachments_json else [],
             'is_active': self.is_active,
-            'course': self.course.to_dict() if self.course else None
+            **self.serialize_relations(profile)
         }
 
 
-class GradeSystem(db.Model):
+class GradeSystem(SerializableMixin, db.Model):
     """نظام الدرجات المرن - يومي، أسبوعي، شهري"""
     __tablename__ = 'grade_systems'
     
@@ -296,7 +317,12 @@ class GradeSystem(db.Model):
     course = db.relationship('Course', backref='grade_systems')
     creator = db.relationship('Teacher', backref='created_grade_systems')
     
-    def to_dict(self):
+    SERIALIZATION_PROFILES = {
+        'summary': {'course': 'summary'},
+        'detail': {'course': 'detail', 'creator': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'course_id': self.course_id,
@@ -310,12 +336,32 @@ class GradeSystem(db.Model):
             'auto_publish': self.auto_publish,
             'created_by': self.created_by,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'course': self.course.to_dict() if self.course else None,
-            'creator': self.creator.to_dict() if self.creator else None
+            **self.serialize_relations(profile)
         }
 
 
-class StudentGrade(db.Model):
+# الحد الأدنى للنسبة المئوية لكل درجة حرفية (تصاعدياً)؛ ما دون أولها F
+GRADE_LETTER_THRESHOLDS = [55, 60, 65, 70, 75, 80, 85, 90]
+GRADE_LETTERS = ['F', 'D', 'D+', 'C', 'C+', 'B', 'B+', 'A', 'A+']
+
+
+def grade_letter(percentage):
+    """الدرجة الحرفية لنسبة مئوية"""
+    return GRADE_LETTERS[bisect_right(GRADE_LETTER_THRESHOLDS, percentage)]
+
+
+# إشعارات الدرجات المنشورة لأولياء الأمور (نفس النص في المسار الفردي والجماعي)
+GRADE_NOTIFICATION_TYPE = 'grade'
+GRADE_NOTIFICATION_TITLE = 'تم نشر درجة جديدة'
+
+
+def grade_percentages(scores, max_score):
+    """النسب المئوية والدرجات الحرفية لقائمة درجات بنفس الدرجة القصوى (إدخال جماعي)"""
+    percentages = [round((score / max_score) * 100, 2) for score in scores]
+    return percentages, [grade_letter(percentage) for percentage in percentages]
+
+
+class StudentGrade(SerializableMixin, db.Model):
     """درجات الطلاب المحسنة"""
     __tablename__ = 'student_grades'
     
@@ -344,6 +390,13 @@ class StudentGrade(db.Model):
     assignment = db.relationship('Assignment', backref='student_grades')
     recorder = db.relationship('Teacher', backref='grades_recorded')
     
+    __table_args__ = (db.Index('idx_student_grades_student_published', 'student_id', 'is_published', 'recorded_at'),)
+    
+    SERIALIZATION_PROFILES = {
+        'summary': {'grade_system': 'summary'},
+        'detail': {'student': 'detail', 'grade_system': 'detail', 'assignment': 'detail', 'recorder': 'detail'}
+    }
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # حساب النسبة المئوية وتحديد الدرجة الحرفية تلقائياً
@@ -353,27 +406,12 @@ class StudentGrade(db.Model):
     
     def calculate_grade_letter(self):
         """حساب الدرجة الحرفية بناءً على النسبة المئوية"""
-        if self.percentage >= 90:
-            return 'A+'
-        elif self.percentage >= 85:
-            return 'A'
-        elif self.percentage >= 80:
-            return 'B+'
-        elif self.percentage >= 75:
-            return 'B'
-        elif self.percentage >= 70:
-            return 'C+'
-        elif self.percentage >= 65:
-            return 'C'
-        elif self.percentage >= 60:
-            return 'D+'
-        elif self.percentage >= 55:
-            return 'D'
-        else:
-            return 'F'
+        return grade_letter(self.percentage)
     
     def publish_grade(self):
         """نشر الدرجة وإرسال إشعار لولي الأمر"""
+        if self.id is None:
+            db.session.flush()  # درجة جديدة: علاقاتها (نظام الدرجات، الطالب) لا تُحمَّل قبل إدراجها
         self.is_published = True
         self.published_at = datetime.utcnow()
         
@@ -382,11 +420,55 @@ class StudentGrade(db.Model):
             self.create_parent_notification()
     
     def create_parent_notification(self):
-        """إنشاء إشعار لولي الأمر عن الدرجة الجديدة"""
-        # سيتم تنفيذ هذا في نظام الإشعارات لاحقاً
-        pass
-    
-    def to_dict(self):
+        """إنشاء إشعار لكل ولي أمر مرتبط بالطالب عن الدرجة المنشورة"""
+        import json
+        links = self.student.parents
+        if not links:
+            return
+        for link in links:
+            db.session.add(Notification(
+                user_id=link.parent.user_id, type=GRADE_NOTIFICATION_TYPE, title=GRADE_NOTIFICATION_TITLE,
+                body=f'{self.student.user.name} - {self.grade_system.name}',
+                data_json=json.dumps({'student_grade_id': self.id, 'student_id': self.student_id})
+            ))
+        self.parent_notified = True
+        self.parent_notified_at = datetime.utcnow()
+    
+    @classmethod
+    def parent_notification_due(cls):
+        """
+        شرط SQL للعبارات الجماعية (UPDATE/INSERT): نظام الدرجات يطلب إشعار أولياء الأمور
+        وللطالب ولي أمر مرتبط - نفس شروط create_parent_notification
+        """
+        grades = cls.__table__
+        return exists().where(
+            GradeSystem.id == grades.c.grade_system_id, GradeSystem.notify_parents.is_(True)
+        ) & exists().where(ParentStudent.student_id == grades.c.student_id)
+    
+    @classmethod
+    def parent_notifications_insert(cls, criterion, created_at):
+        """
+        INSERT ... SELECT واحد: إشعار لكل ولي أمر عن كل درجة مطابقة لـ criterion معلَّمة parent_notified،
+        بنفس نص create_parent_notification وبياناته
+        """
+        grades = cls.__table__
+        data = (
+            literal('{"student_grade_id": ') + cast(grades.c.id, String) +
+            literal(', "student_id": ') + cast(grades.c.student_id, String) + literal('}')
+        )
+        rows = select(
+            Parent.user_id, literal(GRADE_NOTIFICATION_TYPE), literal(GRADE_NOTIFICATION_TITLE),
+            User.name + literal(' - ') + GradeSystem.name, data, literal('normal'), literal(False), literal(created_at)
+        ).select_from(grades).join(
+            GradeSystem, GradeSystem.id == grades.c.grade_system_id
+        ).join(Student, Student.id == grades.c.student_id).join(User, User.id == Student.user_id).join(
+            ParentStudent, ParentStudent.student_id == grades.c.student_id
+        ).join(Parent, Parent.id == ParentStudent.parent_id).where(criterion, grades.c.parent_notified.is_(True))
+        return insert(Notification.__table__).from_select(
+            ['user_id', 'type', 'title', 'body', 'data_json', 'priority', 'is_read', 'created_at'], rows
+        )
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'student_id': self.student_id,
@@ -404,14 +486,11 @@ class StudentGrade(db.Model):
             'parent_notified': self.parent_notified,
             'parent_notified_at': self.parent_notified_at.isoformat() if self.parent_notified_at else None,
             'notes': self.notes,
-            'student': self.student.to_dict() if self.student else None,
-            'grade_system': self.grade_system.to_dict() if self.grade_system else None,
-            'assignment': self.assignment.to_dict() if self.assignment else None,
-            'recorder': self.recorder.to_dict() if self.recorder else None
+            **self.serialize_relations(profile)
         }
 
 
-class AttendanceRecord(db.Model):
+class AttendanceRecord(SerializableMixin, db.Model):
     """سجل الحضور المحسن"""
     __tablename__ = 'attendance_records'
     
@@ -433,7 +512,18 @@ class AttendanceRecord(db.Model):
     course = db.relationship('Course', backref='attendance_records')
     recorder = db.relationship('Teacher', backref='attendance_records')
     
-    def to_dict(self):
+    # One record per student, day and period: the conflict target of bulk attendance upserts
+    __table_args__ = (
+        db.Index('uq_attendance_records_student_date_period', 'student_id', 'attendance_date', 'period', unique=True),
+        db.Index('idx_attendance_records_classroom_date', 'classroom_id', 'attendance_date'),
+    )
+    
+    SERIALIZATION_PROFILES = {
+        'summary': {'course': 'summary'},
+        'detail': {'classroom': 'detail', 'student': 'detail', 'course': 'detail', 'recorder': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'classroom_id': self.classroom_id,
@@ -447,14 +537,11 @@ class AttendanceRecord(db.Model):
             'notes': self.notes,
             'recorded_by': self.recorded_by,
             'recorded_at': self.recorded_at.isoformat() if self.recorded_at else None,
-            'classroom': self.classroom.to_dict() if self.classroom else None,
-            'student': self.student.to_dict() if self.student else None,
-            'course': self.course.to_dict() if self.course else None,
-            'recorder': self.recorder.to_dict() if self.recorder else None
+            **self.serialize_relations(profile)
         }
 
 
-class Notification(db.Model):
+class Notification(SerializableMixin, db.Model):
     """نظام الإشعارات"""
     __tablename__ = 'notifications'
     
@@ -472,11 +559,18 @@ class Notification(db.Model):
     
     user = db.relationship('User', backref='notifications')
     
+    __table_args__ = (db.Index('idx_notifications_user_read', 'user_id', 'is_read', 'created_at'),)
+    
+    SERIALIZATION_PROFILES = {
+        'summary': {},
+        'detail': {'user': 'detail'}
+    }
+    
     def mark_as_read(self):
         self.is_read = True
         self.read_at = datetime.utcnow()
     
-    def to_dict(self):
+    def to_dict(self, profile=DEFAULT_PROFILE):
         import json
         return {
             'id': self.id,
@@ -490,5 +584,332 @@ class Notification(db.Model):
             'read_at': self.read_at.isoformat() if self.read_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-            'user': self.user.to_dict() if self.user else None
+            **self.serialize_relations(profile)
+        }
+
+
+class ImportJob(db.Model):
+    """عمليات استيراد ملفات Excel ومتابعة تقدمها"""
+    __tablename__ = 'import_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    import_type = db.Column(db.String(20), nullable=False)  # students, classes
+    filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='pending')  # pending, processing, completed, failed
+    total_rows = db.Column(db.Integer)  # تقديري من أبعاد الورقة
+    processed_rows = db.Column(db.Integer, default=0)
+    success_count = db.Column(db.Integer, default=0)
+    error_count = db.Column(db.Integer, default=0)
+    errors_json = db.Column(db.Text)  # أول الأخطاء فقط كـ JSON
+    preview_json = db.Column(db.Text)  # أول الصفوف الصحيحة كـ JSON للمعاينة
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # آخر تقدم: لكشف المهام العالقة
+    finished_at = db.Column(db.DateTime)
+    
+    creator = db.relationship('User', backref='import_jobs')
+    
+    __table_args__ = (db.Index('idx_import_jobs_created_by', 'created_by'),)
+    
+    @property
+    def progress_percentage(self):
+        if not self.total_rows:
+            return 100.0 if self.status == 'completed' else 0.0
+        return round(min(self.processed_rows / self.total_rows, 1) * 100, 2)
+    
+    def to_dict(self):
+        import json
+        return {
+            'id': self.id,
+            'import_type': self.import_type,
+            'filename': self.filename,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'success_count': self.success_count,
+            'error_count': self.error_count,
+            'progress_percentage': self.progress_percentage,
+            'errors': json.loads(self.errors_json) if self.errors_json else [],
+            'preview': json.loads(self.preview_json) if self.preview_json else [],
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
         }
+
+
+
+class AIJob(db.Model):
+    """مهام الذكاء الاصطناعي غير المتزامنة، والجدول نفسه هو الطابور عند عدم توفر Celery"""
+    __tablename__ = 'ai_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(30), nullable=False)  # performance, report, risk, recommendations, batch
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'))
+    params_json = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
+    result_json = db.Column(db.Text)
+    error = db.Column(db.Text)
+    total_items = db.Column(db.Integer, default=1)
+    processed_items = db.Column(db.Integer, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    creator = db.relationship('User', backref='ai_jobs')
+    
+    __table_args__ = (
+        db.Index('idx_ai_jobs_status', 'status'),
+        db.Index('idx_ai_jobs_created_by', 'created_by'),
+    )
+    
+    def to_dict(self):
+        import json
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'student_id': self.student_id,
+            'params': json.loads(self.params_json) if self.params_json else {},
+            'status': self.status,
+            'result': json.loads(self.result_json) if self.result_json else None,
+            'error': self.error,
+            'total_items': self.total_items,
+            'processed_items': self.processed_items,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class StudentRiskScore(db.Model):
+    """آخر تقييم محلي لمخاطر الطالب (بدون ذكاء اصطناعي)، صف واحد لكل طالب"""
+    __tablename__ = 'student_risk_scores'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False, unique=True)
+    risk_score = db.Column(db.Integer, nullable=False)
+    risk_level = db.Column(db.String(10), nullable=False)  # low, medium, high
+    academic_decline = db.Column(db.Boolean, default=False)
+    poor_attendance = db.Column(db.Boolean, default=False)
+    behavioral_issues = db.Column(db.Boolean, default=False)
+    grade_trend = db.Column(db.String(20), default='stable')  # declining, stable, improving
+    attendance_rate = db.Column(db.Float, default=0)
+    negative_behavior_ratio = db.Column(db.Float, default=0)
+    scored_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    student = db.relationship('Student', backref=db.backref('risk_score', uselist=False))
+    
+    __table_args__ = (db.Index('idx_student_risk_scores_risk_level', 'risk_level'),)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'risk_score': self.risk_score,
+            'risk_level': self.risk_level,
+            'risk_factors': {
+                'academic_decline': self.academic_decline,
+                'poor_attendance': self.poor_attendance,
+                'behavioral_issues': self.behavioral_issues,
+                'grade_trend': self.grade_trend,
+                'attendance_rate': self.attendance_rate,
+                'negative_behavior_ratio': self.negative_behavior_ratio
+            },
+            'scored_at': self.scored_at.isoformat() if self.scored_at else None
+        }
+
+class StudentSummary(db.Model):
+    """ملخص إحصائيات الطالب، يُحدَّث تدريجياً مع كل درجة أو سجل حضور أو ملاحظة سلوك (صف واحد لكل طالب)"""
+    __tablename__ = 'student_summaries'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    
+    # الدرجات: المجاميع الكلية، وتفاصيل كل مادة في subject_grades
+    # {subject: {count, sum, min, max, first, first_key, latest, latest_key}}؛ المفتاح [date_recorded, id]
+    grade_count = db.Column(db.Integer, nullable=False, default=0)
+    grade_sum = db.Column(db.Float, nullable=False, default=0)
+    grade_min = db.Column(db.Float)
+    grade_max = db.Column(db.Float)
+    subject_grades = db.Column(db.JSON, nullable=False, default=dict)
+    last_grade_at = db.Column(db.DateTime)
+    
+    # الحضور: عدد السجلات لكل حالة
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    attendance_present = db.Column(db.Integer, nullable=False, default=0)
+    attendance_absent = db.Column(db.Integer, nullable=False, default=0)
+    attendance_late = db.Column(db.Integer, nullable=False, default=0)
+    attendance_excused = db.Column(db.Integer, nullable=False, default=0)
+    last_attendance_date = db.Column(db.Date)
+    
+    # السلوك: عدد الملاحظات لكل نوع
+    behavior_count = db.Column(db.Integer, nullable=False, default=0)
+    behavior_positive = db.Column(db.Integer, nullable=False, default=0)
+    behavior_negative = db.Column(db.Integer, nullable=False, default=0)
+    behavior_neutral = db.Column(db.Integer, nullable=False, default=0)
+    last_behavior_at = db.Column(db.DateTime)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    student = db.relationship('Student', backref=db.backref('summary', uselist=False))
+    
+    @property
+    def grade_average(self):
+        return self.grade_sum / self.grade_count if self.grade_count else 0
+    
+    @property
+    def attendance_percentage(self):
+        return self.attendance_present / self.attendance_count * 100 if self.attendance_count else 0
+    
+    def grade_statistics(self):
+        """الإحصائيات الكلية ولكل مادة بنفس شكل StudentStatisticsService.subject_statistics"""
+        subjects = {}
+        for subject, stats in (self.subject_grades or {}).items():
+            subjects[subject] = {
+                'average': round(stats['sum'] / stats['count'], 2) if stats['count'] else 0,
+                'count': stats['count'],
+                'minimum': stats['min'],
+                'maximum': stats['max'],
+                'latest': stats['latest'],
+                'trend': 'improving' if stats['count'] >= 2 and stats['latest'] > stats['first'] else 'stable'
+            }
+        overall = {
+            'average': round(self.grade_average, 2),
+            'maximum': self.grade_max if self.grade_max is not None else 0,
+            'minimum': self.grade_min if self.grade_min is not None else 0,
+            'total_count': self.grade_count
+        }
+        return overall, subjects
+    
+    def attendance_statistics(self):
+        """إحصائيات الحضور بنفس شكل StudentStatisticsService.attendance_counts"""
+        return {
+            'total_days': self.attendance_count,
+            'present_days': self.attendance_present,
+            'absent_days': self.attendance_absent,
+            'late_days': self.attendance_late,
+            'excused_days': self.attendance_excused,
+            'attendance_percentage': round(self.attendance_percentage, 2)
+        }
+    
+    def behavior_statistics(self):
+        return {
+            'total_notes': self.behavior_count,
+            'positive': self.behavior_positive,
+            'negative': self.behavior_negative,
+            'neutral': self.behavior_neutral
+        }
+    
+    def to_dict(self):
+        grades, subjects = self.grade_statistics()
+        return {
+            'student_id': self.student_id,
+            'grades': grades,
+            'subjects': subjects,
+            'attendance': self.attendance_statistics(),
+            'behavior': self.behavior_statistics(),
+            'last_grade_at': self.last_grade_at.isoformat() if self.last_grade_at else None,
+            'last_attendance_date': self.last_attendance_date.isoformat() if self.last_attendance_date else None,
+            'last_behavior_at': self.last_behavior_at.isoformat() if self.last_behavior_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class UsernameSequence(db.Model):
+    """عداد أسماء المستخدمين لكل دور، يُحجز منه على دفعات"""
+    __tablename__ = 'username_sequences'
+    
+    prefix = db.Column(db.String(10), primary_key=True)  # st, tr, pr, ad
+    last_value = db.Column(db.Integer, nullable=False, default=USERNAME_SEQUENCE_START)
+
+
+class UsernameAllocator:
+    """Allocate unique usernames from a per-role sequence stored in the database.
+
+    Numbers are reserved in blocks with a single atomic UPDATE, so concurrent
+    workers never receive the same number (gaps are allowed).
+    """
+    
+    EXISTING_CHECK_CHUNK = 900
+    
+    @staticmethod
+    def clean_name(base_name):
+        """Keep the first 10 alphanumeric characters of a name."""
+        return ''.join(e for e in base_name if e.isalnum())[:10]
+    
+    @classmethod
+    def reserve(cls, prefix, count):
+        """Reserve `count` consecutive numbers for a prefix and return the first.
+
+        The counter is bumped in its own short transaction, so its row lock is
+        not held while the caller hashes passwords and inserts accounts.
+        Numbers reserved by a caller that later rolls back are skipped.
+        """
+        engine = db.session.get_bind()
+        if engine.dialect.name == 'sqlite':
+            # SQLite has a single writer: a second connection would wait for
+            # the caller's own lock, and the whole database is serialized anyway
+            return cls._reserve(db.session, prefix, count)
+        with Session(bind=engine) as session, session.begin():
+            return cls._reserve(session, prefix, count)
+    
+    @staticmethod
+    def _reserve(session, prefix, count):
+        table = UsernameSequence.__table__
+        for _ in range(2):
+            result = session.execute(
+                table.update().where(table.c.prefix == prefix).values(
+                    last_value=table.c.last_value + count
+                )
+            )
+            if result.rowcount:
+                last_value = session.execute(
+                    select(table.c.last_value).where(table.c.prefix == prefix)
+                ).scalar_one()
+                return last_value - count + 1
+            
+            # First use of this prefix: create its row, tolerating a concurrent insert
+            try:
+                with session.begin_nested():
+                    session.execute(
+                        table.insert().values(prefix=prefix, last_value=USERNAME_SEQUENCE_START)
+                    )
+            except IntegrityError:
+                pass
+        raise RuntimeError(f'Could not reserve usernames for prefix {prefix}')
+    
+    @classmethod
+    def allocate(cls, entries):
+        """Allocate one username per (base_name, role) pair."""
+        usernames = [None] * len(entries)
+        pending = {}
+        for index, (_, role) in enumerate(entries):
+            pending.setdefault(ROLE_PREFIXES.get(role, 'us'), []).append(index)
+        
+        while pending:
+            candidates = {}
+            for prefix, indexes in pending.items():
+                first = cls.reserve(prefix, len(indexes))
+                for offset, index in enumerate(indexes):
+                    name = cls.clean_name(entries[index][0])
+                    candidates[index] = (prefix, f"{prefix}_{name}_{first + offset}".lower())
+            
+            # Guard against manually chosen usernames that happen to match
+            names = [username for _, username in candidates.values()]
+            existing = set()
+            for i in range(0, len(names), cls.EXISTING_CHECK_CHUNK):
+                chunk = names[i:i + cls.EXISTING_CHECK_CHUNK]
+                existing.update(
+                    username for (username,) in db.session.query(User.username).filter(
+                        User.username.in_(chunk)
+                    )
+                )
+            
+            pending = {}
+            for index, (prefix, username) in candidates.items():
+                if username in existing:
+                    pending.setdefault(prefix, []).append(index)
+                else:
+                    usernames[index] = username
+        
+        return usernames
@@ -0,0 +1,68 @@
+"""
+ملفات التسلسل للنماذج
+Serialization profiles - every model that embeds related objects in to_dict
+declares, per profile, which relationships are serialized and with which nested
+profile. The same declaration produces the matching selectinload/joinedload
+options, so a list endpoint that serializes with a profile loads exactly the
+relationships it is about to read in a fixed number of queries
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+SUMMARY = 'summary'
+DETAIL = 'detail'
+PROFILES = (SUMMARY, DETAIL)
+DEFAULT_PROFILE = DETAIL
+
+
+class SerializableMixin:
+    """
+    SERIALIZATION_PROFILES = {profile: {relationship: nested_profile}}
+    nested_profile = None يعني تحميل العلاقة مسبقاً دون تضمينها (تستخدمها خاصية محسوبة)
+    """
+
+    SERIALIZATION_PROFILES = {}
+
+    @classmethod
+    def profile_relations(cls, profile):
+        """العلاقات المضمنة في ملف التسلسل"""
+        if profile not in PROFILES:
+            raise ValueError(f'Unknown serialization profile: {profile}')
+        return cls.SERIALIZATION_PROFILES.get(profile, {})
+
+    def serialize_relations(self, profile):
+        """تسلسل العلاقات المعرفة في الملف لتُدمج في to_dict"""
+        data = {}
+        for name, nested in self.profile_relations(profile).items():
+            if nested is None:
+                continue
+            value = getattr(self, name)
+            if value is None:
+                data[name] = None
+            elif isinstance(value, SerializableMixin):
+                data[name] = value.to_dict(nested)
+            else:
+                data[name] = value.to_dict()
+        return data
+
+    @classmethod
+    def loader_options(cls, profile=DEFAULT_PROFILE, path=None):
+        """
+        خيارات التحميل المسبق المطابقة للملف: joinedload للعلاقات المفردة وselectinload للمجموعات.
+        path خيار تحميل سابق تُربط به الخيارات عند تسلسل النموذج عبر علاقة من نموذج آخر.
+        """
+        options = []
+        relationships = inspect(cls).relationships
+        for name, nested in cls.profile_relations(profile).items():
+            relationship = relationships[name]
+            attribute = getattr(cls, name)
+            loader = selectinload if relationship.uselist else joinedload
+            option = getattr(path, loader.__name__)(attribute) if path is not None else loader(attribute)
+
+            target = relationship.mapper.class_
+            nested_options = []
+            if nested is not None and issubclass(target, SerializableMixin):
+                nested_options = target.loader_options(nested, option)
+            options.extend(nested_options or [option])
+        return options
@@ -1,10 +1,11 @@
 from datetime import datetime, date, time
 from sqlalchemy import func
 from src import db
+from src.models.serialization import SerializableMixin, DEFAULT_PROFILE
 from src.models.user import User, Student, Teacher
 from src.models.extended_models import Course, Assignment, AttendanceRecord, StudentGrade
 
-class Exam(db.Model):
+class Exam(SerializableMixin, db.Model):
     """نموذج الامتحانات والاختبارات"""
     __tablename__ = 'exams'
     
@@ -35,6 +36,11 @@ class Exam(db.Model):
     classroom = db.relationship('Classroom', backref='exams')
     teacher = db.relationship('Teacher', backref='exams')
     
+    SERIALIZATION_PROFILES = {
+        'summary': {'subject': 'summary'},
+        'detail': {'subject': 'detail', 'classroom': 'detail', 'teacher': 'detail'}
+    }
+    
     @property
     def duration_minutes(self):
         """حساب مدة الامتحان بالدقائق"""
@@ -49,7 +55,7 @@ class Exam(db.Model):
         """التحقق مما إذا كان الامتحان قادماً"""
         return self.exam_date >= date.today()
     
-    def to_dict(self):
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'title': self.title,
@@ -71,12 +77,10 @@ class Exam(db.Model):
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'is_upcoming': self.is_upcoming,
-            'subject': self.subject.to_dict() if self.subject else None,
-            'classroom': self.classroom.to_dict() if self.classroom else None,
-            'teacher': self.teacher.to_dict() if self.teacher else None
+            **self.serialize_relations(profile)
         }
 
-class ClassSchedule(db.Model):
+class ClassSchedule(SerializableMixin, db.Model):
     """نموذج جدول الحصص اليومي"""
     __tablename__ = 'class_schedules'
     
@@ -99,6 +103,11 @@ class ClassSchedule(db.Model):
     course = db.relationship('Course', backref='schedule')
     teacher = db.relationship('Teacher', backref='schedule')
     
+    SERIALIZATION_PROFILES = {
+        'summary': {'course': 'summary', 'teacher': 'summary'},
+        'detail': {'classroom': 'detail', 'course': 'detail', 'teacher': 'detail'}
+    }
+    
     @property
     def day_name(self):
         """اسم اليوم بالعربية"""
@@ -120,7 +129,7 @@ class ClassSchedule(db.Model):
             return (end_seconds - start_seconds) // 60
         return 0
     
-    def to_dict(self):
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'classroom_id': self.classroom_id,
@@ -136,9 +145,7 @@ class ClassSchedule(db.Model):
             'location': self.location,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'classroom': self.classroom.to_dict() if self.classroom else None,
-            'course': self.course.to_dict() if self.course else None,
-            'teacher': self.teacher.to_dict() if self.teacher else None
+            **self.serialize_relations(profile)
         }
 
 class SchoolDay(db.Model):
@@ -168,7 +175,7 @@ class SchoolDay(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
-class AssignmentSubmission(db.Model):
+class AssignmentSubmission(SerializableMixin, db.Model):
     """نموذج تسليم الواجبات"""
     __tablename__ = 'assignment_submissions'
     
@@ -192,6 +199,13 @@ class AssignmentSubmission(db.Model):
     student = db.relationship('Student', backref='assignment_submissions')
     teacher = db.relationship('Teacher', foreign_keys=[graded_by], backref='graded_submissions')
     
+    __table_args__ = (db.Index('idx_assignment_submissions_student_assignment', 'student_id', 'assignment_id'),)
+    
+    SERIALIZATION_PROFILES = {
+        'summary': {'assignment': 'summary'},
+        'detail': {'assignment': 'detail', 'student': 'detail', 'teacher': 'detail'}
+    }
+    
     @property
     def is_late(self):
         """التحقق مما إذا كان التسليم متأخراً"""
@@ -199,7 +213,7 @@ class AssignmentSubmission(db.Model):
             return self.submission_date > self.assignment.due_date
         return False
     
-    def to_dict(self):
+    def to_dict(self, profile=DEFAULT_PROFILE):
         import json
         return {
             'id': self.id,
@@ -214,12 +228,10 @@ class AssignmentSubmission(db.Model):
             'graded_by': self.graded_by,
             'graded_at': self.graded_at.isoformat() if self.graded_at else None,
             'is_late': self.is_late,
-            'assignment': self.assignment.to_dict() if self.assignment else None,
-            'student': self.student.to_dict() if self.student else None,
-            'teacher': self.teacher.to_dict() if self.teacher else None
+            **self.serialize_relations(profile)
         }
 
-class StudentDashboardSettings(db.Model):
+class StudentDashboardSettings(SerializableMixin, db.Model):
     """إعدادات لوحة تحكم الطالب"""
     __tablename__ = 'student_dashboard_settings'
     
@@ -243,7 +255,12 @@ class StudentDashboardSettings(db.Model):
     # Relations
     student = db.relationship('Student', backref=db.backref('dashboard_settings', uselist=False))
     
-    def to_dict(self):
+    SERIALIZATION_PROFILES = {
+        'summary': {},
+        'detail': {'student': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'student_id': self.student_id,
@@ -257,5 +274,5 @@ class StudentDashboardSettings(db.Model):
             'notifications_enabled': self.notifications_enabled,
             'email_notifications': self.email_notifications,
             'last_updated': self.last_updated.isoformat() if self.last_updated else None,
-            'student': self.student.to_dict() if self.student else None
+            **self.serialize_relations(profile)
         }
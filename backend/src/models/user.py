@@ -1,5 +1,7 @@
 from src import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.models.serialization import SerializableMixin, DEFAULT_PROFILE, SUMMARY
+from werkzeug.security import check_password_hash
+from src.services.password_hashing import hash_password, needs_rehash
 from datetime import datetime
 
 # Import extended models to ensure they are registered
@@ -12,7 +14,7 @@ try:
 except ImportError:
     pass  # Will be imported after first migration
 
-class User(db.Model):
+class User(SerializableMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -20,17 +22,33 @@ class User(db.Model):
     role = db.Column(db.String(20), nullable=False)  # student, parent, teacher, admin
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(20))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # keyset sort key: never NULL
     is_active = db.Column(db.Boolean, default=True)
 
+    # Keyset pagination orderings for the admin user list (see src/services/pagination.py)
+    __table_args__ = (
+        db.Index('idx_user_role_id', 'role', 'id'),
+        db.Index('idx_user_created_at_id', 'created_at', 'id'),
+    )
+
+    # ملف summary: ما تحتاجه القوائم لعرض صاحب السجل (دون البريد والهاتف وحالة الحساب)
+    SUMMARY_FIELDS = ('id', 'username', 'name', 'role')
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-    def to_dict(self):
-        return {
+    def upgrade_password_hash(self, password):
+        """إعادة تجزئة كلمة مرور صحيحة خُزنت بملف أضعف من الحالي؛ يعيد True إن تغيرت"""
+        if not needs_rehash(self.password_hash):
+            return False
+        self.password_hash = hash_password(password)
+        return True
+
+    def to_dict(self, profile=DEFAULT_PROFILE):
+        data = {
             'id': self.id,
             'username': self.username,
             'email': self.email,
@@ -38,10 +56,14 @@ class User(db.Model):
             'name': self.name,
             'phone': self.phone,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            **self.serialize_relations(profile)
         }
+        if profile == SUMMARY:
+            return {field: data[field] for field in self.SUMMARY_FIELDS}
+        return data
 
-class Student(db.Model):
+class Student(SerializableMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     student_id = db.Column(db.String(20), unique=True, nullable=False)
@@ -52,7 +74,17 @@ class Student(db.Model):
     
     user = db.relationship('User', backref=db.backref('student_profile', uselist=False))
     
-    def to_dict(self):
+    __table_args__ = (
+        db.Index('idx_student_user_id', 'user_id'),
+        db.Index('idx_student_class_name', 'class_name'),
+    )
+    
+    SERIALIZATION_PROFILES = {
+        'summary': {'user': 'summary'},
+        'detail': {'user': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -61,10 +93,10 @@ class Student(db.Model):
             'date_of_birth': self.date_of_birth.isoformat() if self.date_of_birth else None,
             'address': self.address,
             'emergency_contact': self.emergency_contact,
-            'user': self.user.to_dict() if self.user else None
+            **self.serialize_relations(profile)
         }
 
-class Teacher(db.Model):
+class Teacher(SerializableMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     teacher_id = db.Column(db.String(20), unique=True, nullable=False)
@@ -75,7 +107,14 @@ class Teacher(db.Model):
     
     user = db.relationship('User', backref=db.backref('teacher_profile', uselist=False))
     
-    def to_dict(self):
+    __table_args__ = (db.Index('idx_teacher_user_id', 'user_id'),)
+    
+    SERIALIZATION_PROFILES = {
+        'summary': {'user': 'summary'},
+        'detail': {'user': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         import json
         return {
             'id': self.id,
@@ -85,10 +124,10 @@ class Teacher(db.Model):
             'classes': json.loads(self.classes) if self.classes else [],
             'qualification': self.qualification,
             'hire_date': self.hire_date.isoformat() if self.hire_date else None,
-            'user': self.user.to_dict() if self.user else None
+            **self.serialize_relations(profile)
         }
 
-class Parent(db.Model):
+class Parent(SerializableMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     occupation = db.Column(db.String(100))
@@ -96,13 +135,20 @@ class Parent(db.Model):
     
     user = db.relationship('User', backref=db.backref('parent_profile', uselist=False))
     
-    def to_dict(self):
+    __table_args__ = (db.Index('idx_parent_user_id', 'user_id'),)
+    
+    SERIALIZATION_PROFILES = {
+        'summary': {'user': 'summary'},
+        'detail': {'user': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'user_id': self.user_id,
             'occupation': self.occupation,
             'relationship': self.relationship,
-            'user': self.user.to_dict() if self.user else None
+            **self.serialize_relations(profile)
         }
 
 class ParentStudent(db.Model):
@@ -112,6 +158,11 @@ class ParentStudent(db.Model):
     
     parent = db.relationship('Parent', backref='children')
     student = db.relationship('Student', backref='parents')
+    
+    __table_args__ = (
+        db.Index('idx_parent_student_parent_student', 'parent_id', 'student_id'),
+        db.Index('idx_parent_student_student_id', 'student_id'),
+    )
 
 class Grade(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -128,6 +179,8 @@ class Grade(db.Model):
     student = db.relationship('Student', backref='grades')
     teacher = db.relationship('Teacher', backref='grades_given')
     
+    __table_args__ = (db.Index('idx_grade_student_date', 'student_id', 'date_recorded'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -156,6 +209,11 @@ class Attendance(db.Model):
     student = db.relationship('Student', backref='attendance_records')
     teacher = db.relationship('Teacher', backref='attendance_taken')
     
+    __table_args__ = (
+        db.Index('idx_attendance_student_date', 'student_id', 'date'),
+        db.Index('idx_attendance_student_status', 'student_id', 'status'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -181,6 +239,8 @@ class BehaviorNote(db.Model):
     student = db.relationship('Student', backref='behavior_notes')
     teacher = db.relationship('Teacher', backref='behavior_notes_given')
     
+    __table_args__ = (db.Index('idx_behavior_note_student_date', 'student_id', 'date_recorded'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -205,6 +265,8 @@ class Tuition(db.Model):
     
     student = db.relationship('Student', backref='tuition_records')
     
+    __table_args__ = (db.Index('idx_tuition_student_created', 'student_id', 'created_at'),)
+    
     @property
     def remaining_amount(self):
         return self.total_amount - self.paid_amount
@@ -244,7 +306,7 @@ class Payment(db.Model):
             'notes': self.notes
         }
 
-class Announcement(db.Model):
+class Announcement(SerializableMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -256,7 +318,12 @@ class Announcement(db.Model):
     
     creator = db.relationship('User', backref='announcements')
     
-    def to_dict(self):
+    SERIALIZATION_PROFILES = {
+        'summary': {'creator': 'summary'},
+        'detail': {'creator': 'detail'}
+    }
+    
+    def to_dict(self, profile=DEFAULT_PROFILE):
         return {
             'id': self.id,
             'title': self.title,
@@ -266,7 +333,7 @@ class Announcement(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'is_active': self.is_active,
             'priority': self.priority,
-            'creator': self.creator.to_dict() if self.creator else None
+            **self.serialize_relations(profile)
         }
 
 class AIInsight(db.Model):
@@ -277,9 +344,15 @@ class AIInsight(db.Model):
     confidence_score = db.Column(db.Float)  # 0-1 confidence level
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    cache_key = db.Column(db.String(64))  # SHA-256 of model + type + request
     
     student = db.relationship('Student', backref='ai_insights')
     
+    __table_args__ = (
+        db.Index('idx_ai_insight_cache_key', 'cache_key'),
+        db.Index('idx_ai_insight_student_active_generated', 'student_id', 'is_active', 'generated_at'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
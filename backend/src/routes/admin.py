@@ -1,21 +1,44 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from src.models.user import db, User, Student, Teacher, Parent
 from src.routes.auth import require_auth, require_role
+from src.services.user_creation import UserCreationService
+from src.services.pagination import KeysetPaginator, TotalCounter, InvalidCursor, TOTAL_MODES, MAX_PAGE_SIZE
+from src.services.user_search import UserSearchIndex
+from src.services.school_stats import cached_school_stats
+from src.services.query_metrics import query_budget
 import json
 from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__)
 
+# Stable orderings for user listing; each ends with the primary key
+USER_SORTS = {
+    'role': KeysetPaginator('role', [User.role, User.id]),
+    'created_at': KeysetPaginator('created_at', [User.created_at, User.id]),
+}
+RELEVANCE_SORT = 'relevance'  # search results ranked by the user search index (?page= only)
+
 @admin_bp.route('/users', methods=['GET'])
 @require_auth
 @require_role('admin')
 def get_all_users():
-    """Get all users with pagination and filtering"""
+    """Get all users with pagination (?page=N, or ?cursor= from next_cursor) and filtering"""
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         role_filter = request.args.get('role')
         search = request.args.get('search', '')
+        cursor = request.args.get('cursor')
+        sort = request.args.get('sort', RELEVANCE_SORT if search else 'role')
+        total_mode = request.args.get('total', 'none')  # cursor pages only; ?page= always counts
+        
+        if sort not in USER_SORTS and sort != RELEVANCE_SORT:
+            return jsonify({'error': f'sort يجب أن يكون أحد: {", ".join([*USER_SORTS, RELEVANCE_SORT])}'}), 400
+        if total_mode not in TOTAL_MODES:
+            return jsonify({'error': f'total يجب أن يكون أحد: {", ".join(TOTAL_MODES)}'}), 400
+        if sort == RELEVANCE_SORT and cursor:
+            return jsonify({'error': 'الترتيب حسب الصلة لا يدعم المؤشر؛ استخدم page'}), 400
+        paginator = USER_SORTS.get(sort, USER_SORTS['role'])
         
         query = User.query
         
@@ -23,8 +46,11 @@ def get_all_users():
         if role_filter:
             query = query.filter(User.role == role_filter)
         
-        # Apply search filter
-        if search:
+        # Apply search filter (search index when available, otherwise LIKE scans)
+        matches = UserSearchIndex.matches(search) if search else None
+        if matches is not None:
+            query = query.join(matches, matches.c.user_id == User.id)
+        elif search:
             query = query.filter(
                 db.or_(
                     User.name.contains(search),
@@ -33,7 +59,28 @@ def get_all_users():
                 )
             )
         
-        # Paginate results
+        if cursor:
+            # Keyset pagination: no COUNT and no OFFSET scan, however deep the page
+            users, next_cursor = paginator.page(query, per_page, cursor)
+            total = TotalCounter.count(
+                query, total_mode, ('users', role_filter, search),
+                current_app.config.get('PAGINATION_TOTAL_TTL', 60),
+                table=None if role_filter or search else User.__table__.name
+            )
+            return jsonify({
+                'users': [user.to_dict() for user in users],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+                'total': total,
+                'per_page': max(min(per_page, MAX_PAGE_SIZE), 1),
+                'sort': sort
+            }), 200
+        
+        # Paginate results (same ordering as the cursor pages, so next_cursor continues from here)
+        if sort == RELEVANCE_SORT and matches is not None:
+            query = query.order_by(matches.c.rank, User.id)
+        else:
+            query = paginator.order_by(query)
         users = query.paginate(
             page=page, 
             per_page=per_page, 
@@ -45,9 +92,16 @@ def get_all_users():
             'total': users.total,
             'pages': users.pages,
             'current_page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'next_cursor': (
+                paginator.encode_cursor(users.items[-1])
+                if users.has_next and users.items and sort != RELEVANCE_SORT else None
+            ),
+            'sort': sort
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
 
@@ -143,6 +197,28 @@ def create_user():
         db.session.rollback()
         return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
 
+@admin_bp.route('/students/bulk', methods=['POST'])
+@require_auth
+@require_role('admin')
+def bulk_create_students():
+    """Create many students with their parents and login credentials"""
+    try:
+        data = request.get_json() or {}
+        rows = data.get('students')
+        
+        if not isinstance(rows, list) or not rows:
+            return jsonify({'error': 'قائمة الطلاب مطلوبة'}), 400
+        
+        result = UserCreationService.bulk_create_students_with_parents(rows)
+        
+        return jsonify({
+            'message': f'تم إنشاء {result["created_students"]} طالب و {result["created_parents"]} ولي أمر',
+            **result
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
+
 @admin_bp.route('/users/<int:user_id>', methods=['GET'])
 @require_auth
 @require_role('admin')
@@ -297,22 +373,14 @@ def activate_user(user_id):
         return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
 
 @admin_bp.route('/stats', methods=['GET'])
+@query_budget(4)
 @require_auth
 @require_role('admin')
 def get_stats():
-    """Get system statistics"""
+    """Get system statistics (cached; recomputed after relevant writes or SCHOOL_STATS_TTL)"""
     try:
-        stats = {
-            'total_users': User.query.count(),
-            'active_users': User.query.filter_by(is_active=True).count(),
-            'students': User.query.filter_by(role='student').count(),
-            'teachers': User.query.filter_by(role='teacher').count(),
-            'parents': User.query.filter_by(role='parent').count(),
-            'admins': User.query.filter_by(role='admin').count()
-        }
-        
-        return jsonify(stats), 200
-        
+        return cached_school_stats()
+
     except Exception as e:
         return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
 
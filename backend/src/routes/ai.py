@@ -1,12 +1,34 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from src.models.user import db, Student, Parent, ParentStudent, AIInsight
 from src.routes.auth import require_auth
-from src.services.ai_service import AIService
+from src.models.extended_models import AIJob
+from src.services.ai_service import AIService, BATCH_ANALYSIS_TYPES
+from src.services.ai_jobs import AIJobService
+from src.services.dashboard_service import DashboardAggregationService
+from src.services.risk_scoring import RiskScoringService, RISK_LEVELS
+from src.services.query_metrics import query_budget
 from datetime import datetime
 
 ai_bp = Blueprint('ai', __name__)
 ai_service = AIService()
 
+def wants_async():
+    """هل طلب العميل التنفيذ في الخلفية (?async=1)"""
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def submit_ai_job(job_type, student_id=None, params=None):
+    """إرسال مهمة للتنفيذ في الخلفية وإرجاع رقمها فوراً"""
+    result = AIJobService.submit(job_type, student_id=student_id, params=params, created_by=session['user_id'])
+    if not result['success']:
+        return jsonify({'error': result['error']}), 500
+    
+    job = result['job']
+    return jsonify({
+        'message': 'تم إرسال الطلب للمعالجة في الخلفية',
+        'job': job,
+        'status_url': f'/api/ai-jobs/{job["id"]}'
+    }), 202
+
 @ai_bp.route('/analyze-student/<int:student_id>', methods=['POST'])
 @require_auth
 def analyze_student_performance(student_id):
@@ -31,6 +53,9 @@ def analyze_student_performance(student_id):
         elif user_role not in ['teacher', 'admin']:
             return jsonify({'error': 'غير مصرح'}), 403
         
+        if wants_async():
+            return submit_ai_job('performance', student_id)
+        
         # تحليل أداء الطالب
         analysis_result = ai_service.analyze_student_performance(student_id)
         
@@ -71,6 +96,9 @@ def generate_comprehensive_report(student_id):
         elif user_role not in ['teacher', 'admin']:
             return jsonify({'error': 'غير مصرح'}), 403
         
+        if wants_async():
+            return submit_ai_job('report', student_id)
+        
         # إنتاج التقرير الشامل
         report_result = ai_service.generate_comprehensive_report(student_id)
         
@@ -100,6 +128,9 @@ def assess_academic_risk(student_id):
         if user_role not in ['teacher', 'admin']:
             return jsonify({'error': 'غير مصرح - هذه الخدمة متاحة للمعلمين والإدارة فقط'}), 403
         
+        if wants_async():
+            return submit_ai_job('risk', student_id)
+        
         # تقييم المخاطر
         risk_result = ai_service.predict_academic_risk(student_id)
         
@@ -141,6 +172,9 @@ def generate_personalized_recommendations(student_id):
         elif user_role not in ['teacher', 'admin']:
             return jsonify({'error': 'غير مصرح'}), 403
         
+        if wants_async():
+            return submit_ai_job('recommendations', student_id)
+        
         # إنتاج التوصيات الشخصية
         recommendations_result = ai_service.generate_personalized_recommendations(student_id)
         
@@ -254,55 +288,105 @@ def batch_analyze_students():
         if not student_ids:
             return jsonify({'error': 'قائمة الطلاب مطلوبة'}), 400
         
-        results = []
-        
-        for student_id in student_ids:
-            try:
-                if analysis_type == 'performance':
-                    result = ai_service.analyze_student_performance(student_id)
-                elif analysis_type == 'risk':
-                    result = ai_service.predict_academic_risk(student_id)
-                elif analysis_type == 'recommendations':
-                    result = ai_service.generate_personalized_recommendations(student_id)
-                else:
-                    continue
-                
-                if result:
-                    results.append({
-                        'student_id': student_id,
-                        'success': True,
-                        'result': result
-                    })
-                else:
-                    results.append({
-                        'student_id': student_id,
-                        'success': False,
-                        'error': 'فشل في التحليل'
-                    })
-                    
-            except Exception as e:
-                results.append({
-                    'student_id': student_id,
-                    'success': False,
-                    'error': str(e)
-                })
+        if analysis_type not in BATCH_ANALYSIS_TYPES:
+            return jsonify({'error': 'نوع التحليل غير صحيح'}), 400
+        
+        if wants_async():
+            return submit_ai_job('batch', params={'student_ids': student_ids, 'analysis_type': analysis_type})
+        
+        # جلب البيانات دفعة واحدة ثم إرسال طلبات النموذج بالتوازي
+        results = ai_service.batch_analyze(
+            student_ids,
+            analysis_type,
+            concurrency=current_app.config.get('AI_BATCH_CONCURRENCY', 5),
+            requests_per_minute=current_app.config.get('AI_REQUESTS_PER_MINUTE')
+        )
         
         successful_analyses = len([r for r in results if r['success']])
         
         return jsonify({
-            'message': f'تم تحليل {successful_analyses} من أصل {len(student_ids)} طالب',
+            'message': f'تم تحليل {successful_analyses} من أصل {len(results)} طالب',
             'results': results,
             'summary': {
-                'total_students': len(student_ids),
+                'total_students': len(results),
                 'successful_analyses': successful_analyses,
-                'failed_analyses': len(student_ids) - successful_analyses
+                'failed_analyses': len(results) - successful_analyses
             }
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
 
+@ai_bp.route('/risk-screening', methods=['POST'])
+@require_auth
+def run_risk_screening():
+    """تقييم مخاطر صف أو المدرسة كاملة محلياً دون استدعاء النموذج"""
+    try:
+        user_role = session['user_role']
+        
+        if user_role not in ['teacher', 'admin']:
+            return jsonify({'error': 'غير مصرح'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        class_name = data.get('class_name')
+        explain_levels = data.get('explain_levels', ['high'])
+        
+        if user_role != 'admin' and not class_name:
+            return jsonify({'error': 'اسم الصف مطلوب'}), 400
+        
+        if any(level not in RISK_LEVELS for level in explain_levels):
+            return jsonify({'error': 'مستوى المخاطر غير صحيح'}), 400
+        
+        result = RiskScoringService.screen(class_name=class_name, flag_levels=explain_levels)
+        if not result['success']:
+            return jsonify({'error': result['error']}), 500
+        
+        response = {
+            'message': f'تم تقييم {result["scored_students"]} طالب',
+            'risk_distribution': result['risk_distribution'],
+            'flagged_student_ids': result['flagged_student_ids']
+        }
+        
+        # النموذج يُستخدم فقط لشرح حالات الطلاب المحددين، في الخلفية
+        if data.get('explain') and result['flagged_student_ids']:
+            job = AIJobService.submit('batch', params={
+                'student_ids': result['flagged_student_ids'],
+                'analysis_type': 'risk'
+            }, created_by=session['user_id'])
+            if not job['success']:
+                return jsonify({'error': job['error']}), 500
+            response['explanation_job'] = job['job']
+            response['status_url'] = f'/api/ai-jobs/{job["job"]["id"]}'
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
+
+@ai_bp.route('/ai-jobs/<int:job_id>', methods=['GET'])
+@require_auth
+def get_ai_job(job_id):
+    """متابعة حالة مهمة ذكاء اصطناعي والحصول على نتيجتها"""
+    try:
+        job = AIJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'المهمة غير موجودة'}), 404
+        
+        # صاحب المهمة أو المعلمين والإدارة فقط
+        if job.created_by != session['user_id'] and session['user_role'] not in ['teacher', 'admin']:
+            return jsonify({'error': 'غير مصرح للوصول'}), 403
+        
+        # مهمة توقف عاملها: تظهر فاشلة بدلاً من running إلى الأبد
+        if job.status == 'running' and AIJobService.expire_stale(current_app.config.get('AI_JOB_STALE_AFTER', 3600)):
+            db.session.commit()
+        
+        return jsonify({'job': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
+
 @ai_bp.route('/class-insights/<class_name>', methods=['GET'])
+@query_budget(4)
 @require_auth
 def get_class_insights(class_name):
     """الحصول على رؤى الصف الدراسي"""
@@ -313,44 +397,11 @@ def get_class_insights(class_name):
         if user_role not in ['teacher', 'admin']:
             return jsonify({'error': 'غير مصرح'}), 403
         
-        # الحصول على طلاب الصف
-        students = Student.query.filter_by(class_name=class_name).all()
+        class_insights = DashboardAggregationService.class_insights(class_name)
         
-        if not students:
+        if class_insights is None:
             return jsonify({'error': 'لا توجد طلاب في هذا الصف'}), 404
         
-        class_insights = {
-            'class_name': class_name,
-            'total_students': len(students),
-            'students_with_insights': 0,
-            'risk_distribution': {'low': 0, 'medium': 0, 'high': 0},
-            'recent_insights': []
-        }
-        
-        # جمع الرؤى لكل طالب
-        for student in students:
-            student_insights = AIInsight.query.filter_by(
-                student_id=student.id, 
-                is_active=True
-            ).order_by(AIInsight.generated_at.desc()).limit(3).all()
-            
-            if student_insights:
-                class_insights['students_with_insights'] += 1
-                
-                # إضافة الرؤى الحديثة
-                for insight in student_insights:
-                    insight_data = insight.to_dict()
-                    insight_data['student_name'] = student.user.name
-                    insight_data['student_id_display'] = student.student_id
-                    class_insights['recent_insights'].append(insight_data)
-        
-        # ترتيب الرؤى حسب التاريخ
-        class_insights['recent_insights'].sort(
-            key=lambda x: x['generated_at'], 
-            reverse=True
-        )
-        class_insights['recent_insights'] = class_insights['recent_insights'][:20]
-        
         return jsonify(class_insights), 200
         
     except Exception as e:
@@ -22,6 +22,10 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'الحساب غير نشط'}), 401
         
+        # كلمات المرور المخزنة بملف التجزئة السريع تُرقّى عند أول دخول ناجح
+        if user.upgrade_password_hash(password):
+            db.session.commit()
+        
         # Store user session
         session['user_id'] = user.id
         session['user_role'] = user.role
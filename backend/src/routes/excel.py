@@ -1,21 +1,37 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, session, current_app, url_for
 import openpyxl
 from openpyxl.styles import Font, Alignment
 import io
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
+from src import db
+from src.models.extended_models import ImportJob
+from src.routes.auth import require_auth
+from src.services.excel_import import ExcelImportService, IMPORT_TYPES, ACTIVE_STATUSES, DEFAULT_CHUNK_SIZE
+from src.services.user_creation import UserCreationService
 
 excel_bp = Blueprint('excel', __name__)
 
 ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+IMPORT_ROLES = ('admin', 'teacher')
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def create_student_accounts(rows):
+    """إنشاء حسابات دفعة من الطلاب: (عدد الطلاب المنشئين، رسائل الأخطاء)"""
+    result = UserCreationService.bulk_create_students_with_parents(rows)
+    return result['created_students'], result['errors']
+
 @excel_bp.route('/upload-excel', methods=['POST'])
+@require_auth
 def upload_excel():
+    """رفع ملف Excel وإنشاء مهمة استيراد تُعالج في الخلفية (202 مع رقم المهمة)"""
     try:
+        if session.get('user_role') not in IMPORT_ROLES:
+            return jsonify({'error': 'غير مصرح للوصول'}), 403
+        
         if 'file' not in request.files:
             return jsonify({'error': 'لم يتم اختيار ملف'}), 400
         
@@ -28,211 +44,64 @@ def upload_excel():
         if not allowed_file(file.filename):
             return jsonify({'error': 'نوع الملف غير مدعوم. يرجى استخدام ملفات Excel (.xlsx أو .xls)'}), 400
         
-        # قراءة ملف Excel
-        try:
-            workbook = openpyxl.load_workbook(file)
-            worksheet = workbook.active
-        except Exception as e:
-            return jsonify({'error': f'خطأ في قراءة ملف Excel: {str(e)}'}), 400
-        
-        if upload_type == 'students':
-            return process_students_excel(worksheet)
-        elif upload_type == 'classes':
-            return process_classes_excel(worksheet)
-        else:
+        if upload_type not in IMPORT_TYPES:
             return jsonify({'error': 'نوع الرفع غير صحيح'}), 400
+        
+        # إنشاء حسابات الطلاب وأولياء الأمور مباشرة أثناء الاستيراد (للمدير فقط)
+        chunk_handler = None
+        if request.form.get('create_accounts', '').lower() in ('1', 'true', 'yes'):
+            if upload_type != 'students':
+                return jsonify({'error': 'إنشاء الحسابات متاح لملفات الطلاب فقط'}), 400
+            if session.get('user_role') != 'admin':
+                return jsonify({'error': 'غير مصرح للوصول'}), 403
+            chunk_handler = create_student_accounts
+        
+        # قراءة الملف بشكل متدفق وعلى دفعات في الخلفية مع حفظ التقدم بعد كل دفعة
+        result = ExcelImportService.submit(
+            file,
+            upload_type,
+            chunk_handler=chunk_handler,
+            chunk_size=current_app.config.get('EXCEL_IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            filename=secure_filename(file.filename) or file.filename,
+            created_by=session['user_id']
+        )
+        
+        if not result['success']:
+            return jsonify({'error': result['error']}), 400
+        
+        job = result['job']
+        return jsonify({
+            'success': True,
+            'type': upload_type,
+            'job_id': job['id'],
+            'import_job': job,
+            'status_url': url_for('excel.get_import_job', job_id=job['id'])
+        }), 202
             
     except Exception as e:
         return jsonify({'error': f'خطأ في معالجة الملف: {str(e)}'}), 500
 
-def process_students_excel(worksheet):
-    """معالجة ملف Excel للطلاب"""
-    required_columns = [
-        'الاسم الكامل', 'رقم الهوية', 'تاريخ الميلاد', 'الصف', 'الشعبة',
-        'اسم ولي الأمر', 'رقم هاتف ولي الأمر', 'العنوان', 'الجنس', 'البناية'
-    ]
-    
-    # قراءة الصف الأول للحصول على أسماء الأعمدة
-    headers = []
-    for cell in worksheet[1]:
-        if cell.value:
-            headers.append(str(cell.value).strip())
-        else:
-            headers.append('')
-    
-    # التحقق من وجود الأعمدة المطلوبة
-    missing_columns = [col for col in required_columns if col not in headers]
-    if missing_columns:
-        return jsonify({
-            'error': f'الأعمدة التالية مفقودة: {", ".join(missing_columns)}'
-        }), 400
-    
-    # إنشاء خريطة للأعمدة
-    column_map = {}
-    for i, header in enumerate(headers):
-        if header in required_columns:
-            column_map[header] = i
-    
-    students_data = []
-    errors = []
-    
-    # قراءة البيانات من الصف الثاني فما فوق
-    for row_num in range(2, worksheet.max_row + 1):
-        try:
-            row = worksheet[row_num]
-            
-            # استخراج البيانات
-            name = str(row[column_map['الاسم الكامل']].value or '').strip()
-            student_id = str(row[column_map['رقم الهوية']].value or '').strip()
-            
-            if not name or not student_id:
-                errors.append(f'الصف {row_num}: الاسم أو رقم الهوية مفقود')
-                continue
-            
-            # تحويل تاريخ الميلاد
-            birth_date = None
-            birth_cell = row[column_map['تاريخ الميلاد']].value
-            if birth_cell:
-                try:
-                    if isinstance(birth_cell, str):
-                        birth_date = datetime.strptime(birth_cell, '%d/%m/%Y').date()
-                    elif hasattr(birth_cell, 'date'):
-                        birth_date = birth_cell.date()
-                    else:
-                        birth_date = birth_cell
-                except:
-                    errors.append(f'الصف {row_num}: تنسيق تاريخ الميلاد غير صحيح')
-                    continue
-            
-            grade = str(row[column_map['الصف']].value or '').strip()
-            section = str(row[column_map['الشعبة']].value or '').strip()
-            parent_name = str(row[column_map['اسم ولي الأمر']].value or '').strip()
-            parent_phone = str(row[column_map['رقم هاتف ولي الأمر']].value or '').strip()
-            address = str(row[column_map['العنوان']].value or '').strip()
-            gender = str(row[column_map['الجنس']].value or '').strip()
-            building = str(row[column_map['البناية']].value or '').strip()
-            
-            student_data = {
-                'name': name,
-                'student_id': student_id,
-                'birth_date': birth_date.isoformat() if birth_date else None,
-                'grade': grade,
-                'section': section,
-                'parent_name': parent_name,
-                'parent_phone': parent_phone,
-                'address': address,
-                'gender': gender,
-                'building': building,
-                'is_french': 'فرنسي' in section.lower(),
-                'created_at': datetime.now().isoformat()
-            }
-            
-            students_data.append(student_data)
-            
-        except Exception as e:
-            errors.append(f'الصف {row_num}: خطأ في معالجة البيانات - {str(e)}')
-    
-    success_count = len(students_data)
-    
-    response_data = {
-        'success': True,
-        'count': success_count,
-        'type': 'students',
-        'data': students_data,
-        'errors': errors
-    }
-    
-    if errors:
-        response_data['warning'] = f'تم رفع {success_count} طالب بنجاح، مع {len(errors)} خطأ'
-    
-    return jsonify(response_data)
-
-def process_classes_excel(worksheet):
-    """معالجة ملف Excel للشعب"""
-    required_columns = [
-        'اسم الشعبة', 'الصف', 'النوع', 'المرحلة الدراسية', 
-        'عدد الطلاب المتوقع', 'البناية', 'المعلم المسؤول'
-    ]
-    
-    # قراءة الصف الأول للحصول على أسماء الأعمدة
-    headers = []
-    for cell in worksheet[1]:
-        if cell.value:
-            headers.append(str(cell.value).strip())
-        else:
-            headers.append('')
-    
-    # التحقق من وجود الأعمدة المطلوبة
-    missing_columns = [col for col in required_columns if col not in headers]
-    if missing_columns:
-        return jsonify({
-            'error': f'الأعمدة التالية مفقودة: {", ".join(missing_columns)}'
-        }), 400
-    
-    # إنشاء خريطة للأعمدة
-    column_map = {}
-    for i, header in enumerate(headers):
-        if header in required_columns:
-            column_map[header] = i
-    
-    classes_data = []
-    errors = []
-    
-    # قراءة البيانات من الصف الثاني فما فوق
-    for row_num in range(2, worksheet.max_row + 1):
-        try:
-            row = worksheet[row_num]
-            
-            # استخراج البيانات
-            name = str(row[column_map['اسم الشعبة']].value or '').strip()
-            grade = str(row[column_map['الصف']].value or '').strip()
-            
-            if not name or not grade:
-                errors.append(f'الصف {row_num}: اسم الشعبة أو الصف مفقود')
-                continue
-            
-            class_type = str(row[column_map['النوع']].value or '').strip()
-            stage = str(row[column_map['المرحلة الدراسية']].value or '').strip()
-            expected_students = row[column_map['عدد الطلاب المتوقع']].value or 0
-            building = str(row[column_map['البناية']].value or '').strip()
-            teacher = str(row[column_map['المعلم المسؤول']].value or '').strip()
-            
-            try:
-                expected_students = int(expected_students)
-            except:
-                expected_students = 0
-            
-            class_data = {
-                'name': name,
-                'grade': grade,
-                'type': class_type,
-                'stage': stage,
-                'expected_students': expected_students,
-                'building': building,
-                'teacher': teacher,
-                'is_french': 'فرنسي' in class_type.lower(),
-                'created_at': datetime.now().isoformat()
-            }
-            
-            classes_data.append(class_data)
-            
-        except Exception as e:
-            errors.append(f'الصف {row_num}: خطأ في معالجة البيانات - {str(e)}')
-    
-    success_count = len(classes_data)
-    
-    response_data = {
-        'success': True,
-        'count': success_count,
-        'type': 'classes',
-        'data': classes_data,
-        'errors': errors
-    }
-    
-    if errors:
-        response_data['warning'] = f'تم رفع {success_count} شعبة بنجاح، مع {len(errors)} خطأ'
-    
-    return jsonify(response_data)
+@excel_bp.route('/import-jobs/<int:job_id>', methods=['GET'])
+@require_auth
+def get_import_job(job_id):
+    """متابعة تقدم عملية استيراد (لمنشئها أو للمدير)"""
+    try:
+        job = ImportJob.query.get(job_id)
+        if not job:
+            return jsonify({'error': 'عملية الاستيراد غير موجودة'}), 404
+        
+        if job.created_by != session['user_id'] and session.get('user_role') != 'admin':
+            return jsonify({'error': 'غير مصرح للوصول'}), 403
+        
+        # مهمة توقف خيطها أو عمليتها: تظهر فاشلة بدلاً من processing إلى الأبد
+        stale_after = current_app.config.get('IMPORT_JOB_STALE_AFTER', 3600)
+        if job.status in ACTIVE_STATUSES and ExcelImportService.expire_stale(stale_after):
+            db.session.commit()
+        
+        return jsonify({'import_job': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
 
 @excel_bp.route('/download-template/<template_type>', methods=['GET'])
 def download_template(template_type):
@@ -1,12 +1,17 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, Parent, Student, ParentStudent, Grade, Attendance, BehaviorNote, Tuition, Payment, AIInsight
 from src.routes.auth import require_auth, require_role
-from datetime import datetime, date
+from src.services.dashboard_service import DashboardAggregationService
+from src.services.query_metrics import query_budget
+from src.services.dashboard_cache import cached_dashboard
+from datetime import datetime, date, timedelta
 from sqlalchemy import func, and_
 
 parent_bp = Blueprint('parent', __name__)
 
-@parent_bp.route('/dashboard', methods=['GET'])
+# /api/dashboard هو لوحة الطالب (student_bp مسجل قبل parent_bp)
+@parent_bp.route('/parent/dashboard', methods=['GET'])
+@query_budget(10)
 @require_auth
 def get_parent_dashboard():
     try:
@@ -16,66 +21,29 @@ def get_parent_dashboard():
         if not parent:
             return jsonify({'error': 'ملف ولي الأمر غير موجود'}), 404
         
-        # Get children
-        children_relations = ParentStudent.query.filter_by(parent_id=parent.id).all()
-        children_data = []
-        
-        for relation in children_relations:
-            student = relation.student
-            
-            # Get latest grades
-            recent_grades = Grade.query.filter_by(student_id=student.id).order_by(Grade.date_recorded.desc()).limit(5).all()
-            
-            # Calculate average grade
-            all_grades = Grade.query.filter_by(student_id=student.id).all()
-            avg_grade = sum(grade.grade for grade in all_grades) / len(all_grades) if all_grades else 0
-            
-            # Get attendance statistics
-            attendance_records = Attendance.query.filter_by(student_id=student.id).all()
-            total_days = len(attendance_records)
-            present_days = len([a for a in attendance_records if a.status == 'present'])
-            attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-            
-            # Get recent behavior notes
-            recent_behavior = BehaviorNote.query.filter_by(student_id=student.id).order_by(BehaviorNote.date_recorded.desc()).limit(3).all()
-            
-            # Get tuition information
-            current_tuition = Tuition.query.filter_by(student_id=student.id).order_by(Tuition.created_at.desc()).first()
-            
-            # Get AI insights
-            ai_insights = AIInsight.query.filter_by(student_id=student.id, is_active=True).order_by(AIInsight.generated_at.desc()).limit(3).all()
-            
-            child_data = {
-                'student': student.to_dict(),
-                'recent_grades': [grade.to_dict() for grade in recent_grades],
-                'average_grade': round(avg_grade, 2),
-                'attendance': {
-                    'total_days': total_days,
-                    'present_days': present_days,
-                    'percentage': round(attendance_percentage, 2)
-                },
-                'recent_behavior': [note.to_dict() for note in recent_behavior],
-                'tuition': current_tuition.to_dict() if current_tuition else None,
-                'ai_insights': [insight.to_dict() for insight in ai_insights]
-            }
-            children_data.append(child_data)
-        
-        dashboard_data = {
-            'parent': parent.to_dict(),
-            'children': children_data,
-            'summary': {
-                'total_children': len(children_data),
-                'children_with_good_attendance': len([c for c in children_data if c['attendance']['percentage'] >= 90]),
-                'children_with_high_grades': len([c for c in children_data if c['average_grade'] >= 85])
+        # Get children and their statistics in a fixed number of grouped queries
+        children = DashboardAggregationService.get_parent_children(parent.id)
+        
+        def build():
+            children_data = DashboardAggregationService.build_children_overview(children)
+            return {
+                'parent': parent.to_dict(),
+                'children': children_data,
+                'summary': {
+                    'total_children': len(children_data),
+                    'children_with_good_attendance': len([c for c in children_data if c['attendance']['percentage'] >= 90]),
+                    'children_with_high_grades': len([c for c in children_data if c['average_grade'] >= 85])
+                }
             }
-        }
         
-        return jsonify(dashboard_data), 200
+        # Cached per parent and invalidated whenever any child's data changes
+        return cached_dashboard('parent', [child.id for child in children], build, parent.id)
         
     except Exception as e:
         return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
 
 @parent_bp.route('/children', methods=['GET'])
+@query_budget(4)
 @require_auth
 def get_children():
     try:
@@ -85,12 +53,8 @@ def get_children():
         if not parent:
             return jsonify({'error': 'ملف ولي الأمر غير موجود'}), 404
         
-        children_relations = ParentStudent.query.filter_by(parent_id=parent.id).all()
-        children_data = []
-        
-        for relation in children_relations:
-            student = relation.student
-            children_data.append(student.to_dict())
+        children = DashboardAggregationService.get_parent_children(parent.id)
+        children_data = [student.to_dict('summary') for student in children]
         
         return jsonify({'children': children_data}), 200
         
@@ -206,7 +170,7 @@ def get_child_attendance(student_id):
         attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
         
         # Get recent absences with details
-        recent_absences = [a for a in attendance_records if a.status in ['absent', 'late'] and a.date >= (date.today() - datetime.timedelta(days=30))]
+        recent_absences = [a for a in attendance_records if a.status in ['absent', 'late'] and a.date >= (date.today() - timedelta(days=30))]
         
         return jsonify({
             'attendance': attendance_data,
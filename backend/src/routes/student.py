@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, Student, Grade, Attendance, BehaviorNote, Tuition, AIInsight
 from src.routes.auth import require_auth, require_role
+from src.services.statistics_service import StudentStatisticsService
+from src.services.student_summary import StudentSummaryService
+from src.services.query_metrics import query_budget
+from src.services.dashboard_cache import cached_dashboard
 from datetime import datetime, date
 from sqlalchemy import func, and_
 
 student_bp = Blueprint('student', __name__)
 
+MAX_RECENT_GRADES = 100
+
 @student_bp.route('/dashboard', methods=['GET'])
+@query_budget(8)
 @require_auth
 def get_student_dashboard():
     try:
@@ -16,45 +23,47 @@ def get_student_dashboard():
         if not student:
             return jsonify({'error': 'ملف الطالب غير موجود'}), 404
         
-        # Get grades
-        grades = Grade.query.filter_by(student_id=student.id).all()
-        grades_data = [grade.to_dict() for grade in grades]
-        
-        # Calculate average grade
-        if grades:
-            avg_grade = sum(grade.grade for grade in grades) / len(grades)
-        else:
-            avg_grade = 0
-        
-        # Get attendance
-        attendance_records = Attendance.query.filter_by(student_id=student.id).all()
-        total_days = len(attendance_records)
-        present_days = len([a for a in attendance_records if a.status == 'present'])
-        attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-        
-        # Get behavior notes
-        behavior_notes = BehaviorNote.query.filter_by(student_id=student.id).order_by(BehaviorNote.date_recorded.desc()).limit(10).all()
-        behavior_data = [note.to_dict() for note in behavior_notes]
-        
-        # Get AI insights
-        ai_insights = AIInsight.query.filter_by(student_id=student.id, is_active=True).order_by(AIInsight.generated_at.desc()).limit(5).all()
-        insights_data = [insight.to_dict() for insight in ai_insights]
-        
-        dashboard_data = {
-            'student': student.to_dict(),
-            'grades': grades_data,
-            'average_grade': round(avg_grade, 2),
-            'attendance': {
-                'total_days': total_days,
-                'present_days': present_days,
-                'absent_days': total_days - present_days,
-                'percentage': round(attendance_percentage, 2)
-            },
-            'behavior_notes': behavior_data,
-            'ai_insights': insights_data
-        }
-        
-        return jsonify(dashboard_data), 200
+        # جزء من مفتاح الذاكرة المؤقتة، لذا يُحصر في مدى صغير
+        recent_grades_limit = max(min(request.args.get('grades_limit', 20, type=int), MAX_RECENT_GRADES), 1)
+
+        def build():
+            # Grade and attendance statistics come from the materialized summary; only recent grades are loaded
+            summary = StudentSummaryService.get(student.id)
+            grade_stats, _ = summary.grade_statistics()
+            grades = Grade.query.filter_by(student_id=student.id).order_by(
+                Grade.date_recorded.desc(), Grade.id.desc()
+            ).limit(recent_grades_limit).all()
+            grades_data = [grade.to_dict() for grade in grades]
+        
+            attendance_stats = summary.attendance_statistics()
+            total_days = attendance_stats['total_days']
+            present_days = attendance_stats['present_days']
+        
+            # Get behavior notes
+            behavior_notes = BehaviorNote.query.filter_by(student_id=student.id).order_by(BehaviorNote.date_recorded.desc()).limit(10).all()
+            behavior_data = [note.to_dict() for note in behavior_notes]
+        
+            # Get AI insights
+            ai_insights = AIInsight.query.filter_by(student_id=student.id, is_active=True).order_by(AIInsight.generated_at.desc()).limit(5).all()
+            insights_data = [insight.to_dict() for insight in ai_insights]
+        
+            dashboard_data = {
+                'student': student.to_dict(),
+                'grades': grades_data,
+                'total_grades': grade_stats['total_count'],
+                'average_grade': grade_stats['average'],
+                'attendance': {
+                    'total_days': total_days,
+                    'present_days': present_days,
+                    'absent_days': total_days - present_days,
+                    'percentage': attendance_stats['attendance_percentage']
+                },
+                'behavior_notes': behavior_data,
+                'ai_insights': insights_data
+            }
+            return dashboard_data
+
+        return cached_dashboard('student', [student.id], build, recent_grades_limit)
         
     except Exception as e:
         return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
@@ -74,50 +83,36 @@ def get_student_grades():
         semester = request.args.get('semester')
         grade_type = request.args.get('grade_type')
         
-        # Build query
-        query = Grade.query.filter_by(student_id=student.id)
-        
-        if subject:
-            query = query.filter_by(subject=subject)
-        if semester:
-            query = query.filter_by(semester=semester)
-        if grade_type:
-            query = query.filter_by(grade_type=grade_type)
-        
-        grades = query.order_by(Grade.date_recorded.desc()).all()
-        grades_data = [grade.to_dict() for grade in grades]
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
         
-        # Calculate statistics
-        if grades:
-            avg_grade = sum(grade.grade for grade in grades) / len(grades)
-            max_grade = max(grade.grade for grade in grades)
-            min_grade = min(grade.grade for grade in grades)
+        # Unfiltered statistics come from the materialized summary, filtered ones are aggregated in SQL
+        criteria = StudentStatisticsService.grade_filters(student.id, subject, semester, grade_type)
+        if subject or semester or grade_type:
+            statistics, subjects_stats = StudentStatisticsService.subject_statistics(criteria)
+            latest_grades = StudentStatisticsService.latest_grade_per_subject(criteria)
         else:
-            avg_grade = max_grade = min_grade = 0
-        
-        # Group by subject
-        subjects_stats = {}
-        for grade in grades:
-            if grade.subject not in subjects_stats:
-                subjects_stats[grade.subject] = []
-            subjects_stats[grade.subject].append(grade.grade)
-        
-        for subject, grade_list in subjects_stats.items():
-            subjects_stats[subject] = {
-                'average': round(sum(grade_list) / len(grade_list), 2),
-                'count': len(grade_list),
-                'latest': grade_list[0] if grade_list else 0
+            statistics, subjects_stats = StudentSummaryService.get(student.id).grade_statistics()
+            latest_grades = {name: stats['latest'] for name, stats in subjects_stats.items()}
+        
+        for subject_name, subject_stats in subjects_stats.items():
+            subjects_stats[subject_name] = {
+                'average': subject_stats['average'],
+                'count': subject_stats['count'],
+                'latest': latest_grades.get(subject_name, 0)
             }
         
+        # Only the requested page of grades is loaded
+        query = Grade.query.filter(*criteria).order_by(Grade.date_recorded.desc(), Grade.id.desc())
+        grades, pagination = StudentStatisticsService.paginate(
+            query, page, per_page, statistics['total_count']
+        )
+        
         return jsonify({
-            'grades': grades_data,
-            'statistics': {
-                'average': round(avg_grade, 2),
-                'maximum': max_grade,
-                'minimum': min_grade,
-                'total_count': len(grades)
-            },
-            'subjects': subjects_stats
+            'grades': [grade.to_dict() for grade in grades],
+            'statistics': statistics,
+            'subjects': subjects_stats,
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -137,36 +132,30 @@ def get_student_attendance():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        # Build query
-        query = Attendance.query.filter_by(student_id=student.id)
-        
-        if start_date:
-            query = query.filter(Attendance.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-        if end_date:
-            query = query.filter(Attendance.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
         
-        attendance_records = query.order_by(Attendance.date.desc()).all()
-        attendance_data = [record.to_dict() for record in attendance_records]
+        criteria = StudentStatisticsService.attendance_filters(
+            student.id,
+            datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None,
+            datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        )
         
-        # Calculate statistics
-        total_days = len(attendance_records)
-        present_days = len([a for a in attendance_records if a.status == 'present'])
-        absent_days = len([a for a in attendance_records if a.status == 'absent'])
-        late_days = len([a for a in attendance_records if a.status == 'late'])
-        excused_days = len([a for a in attendance_records if a.status == 'excused'])
+        # Status counts come from the materialized summary, or a single GROUP BY query for a date range
+        if start_date or end_date:
+            statistics = StudentStatisticsService.attendance_counts(criteria)
+        else:
+            statistics = StudentSummaryService.get(student.id).attendance_statistics()
         
-        attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+        query = Attendance.query.filter(*criteria).order_by(Attendance.date.desc(), Attendance.id.desc())
+        attendance_records, pagination = StudentStatisticsService.paginate(
+            query, page, per_page, statistics['total_days']
+        )
         
         return jsonify({
-            'attendance': attendance_data,
-            'statistics': {
-                'total_days': total_days,
-                'present_days': present_days,
-                'absent_days': absent_days,
-                'late_days': late_days,
-                'excused_days': excused_days,
-                'attendance_percentage': round(attendance_percentage, 2)
-            }
+            'attendance': [record.to_dict() for record in attendance_records],
+            'statistics': statistics,
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -4,15 +4,15 @@ Student Dashboard Routes - مسارات لوحة تحكم الطالب
 """
 import json
 from flask import Blueprint, request, jsonify, session
-from sqlalchemy.orm import joinedload
 from sqlalchemy import and_, or_, func
 from datetime import datetime, date, timedelta
 from src import db
 from src.models.user import User, Student, Teacher
 from src.models.extended_models import (
     Course, Assignment, AttendanceRecord, StudentGrade, 
-    AcademicYear, Classroom, Subject, Enrollment
+    AcademicYear, Classroom, Subject, Enrollment, GradeSystem
 )
+from src.services.dashboard_cache import cached_dashboard
 from src.models.student_dashboard import (
     Exam, ClassSchedule, SchoolDay, AssignmentSubmission, 
     StudentDashboardSettings
@@ -61,71 +61,77 @@ def get_dashboard_overview():
     
     classroom = enrollment.classroom
     
-    # إحصائيات سريعة
-    today = date.today()
+    def build():
+        # إحصائيات سريعة
+        today = date.today()
     
-    # الامتحانات القادمة
-    upcoming_exams_count = db.session.query(func.count(Exam.id)).filter(
-        and_(
-            Exam.classroom_id == classroom.id,
-            Exam.exam_date >= today,
-            Exam.is_published == True,
-            Exam.is_active == True
-        )
-    ).scalar()
+        # الامتحانات القادمة
+        upcoming_exams_count = db.session.query(func.count(Exam.id)).filter(
+            and_(
+                Exam.classroom_id == classroom.id,
+                Exam.exam_date >= today,
+                Exam.is_published == True,
+                Exam.is_active == True
+            )
+        ).scalar()
     
-    # الواجبات المعلقة
-    pending_assignments = db.session.query(Assignment).join(Course).filter(
-        and_(
-            Course.classroom_id == classroom.id,
-            Assignment.is_active == True,
-            Assignment.due_date >= datetime.now(),
-            ~Assignment.id.in_(
-                db.session.query(AssignmentSubmission.assignment_id).filter(
-                    AssignmentSubmission.student_id == student.id
+        # الواجبات المعلقة
+        pending_assignments = db.session.query(Assignment).join(Course).filter(
+            and_(
+                Course.classroom_id == classroom.id,
+                Assignment.is_active == True,
+                Assignment.due_date >= datetime.now(),
+                ~Assignment.id.in_(
+                    db.session.query(AssignmentSubmission.assignment_id).filter(
+                        AssignmentSubmission.student_id == student.id
+                    )
                 )
             )
-        )
-    ).count()
+        ).count()
     
-    # نسبة الحضور (آخر شهر)
-    last_month = today - timedelta(days=30)
-    total_attendance = db.session.query(func.count(AttendanceRecord.id)).filter(
-        and_(
-            AttendanceRecord.student_id == student.id,
-            AttendanceRecord.attendance_date >= last_month
-        )
-    ).scalar()
+        # نسبة الحضور (آخر شهر)
+        last_month = today - timedelta(days=30)
+        total_attendance = db.session.query(func.count(AttendanceRecord.id)).filter(
+            and_(
+                AttendanceRecord.student_id == student.id,
+                AttendanceRecord.attendance_date >= last_month
+            )
+        ).scalar()
     
-    present_count = db.session.query(func.count(AttendanceRecord.id)).filter(
-        and_(
-            AttendanceRecord.student_id == student.id,
-            AttendanceRecord.attendance_date >= last_month,
-            AttendanceRecord.status == 'present'
-        )
-    ).scalar()
+        present_count = db.session.query(func.count(AttendanceRecord.id)).filter(
+            and_(
+                AttendanceRecord.student_id == student.id,
+                AttendanceRecord.attendance_date >= last_month,
+                AttendanceRecord.status == 'present'
+            )
+        ).scalar()
     
-    attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0
+        attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0
     
-    # آخر الدرجات
-    recent_grades = db.session.query(StudentGrade).filter(
-        and_(
-            StudentGrade.student_id == student.id,
-            StudentGrade.is_published == True
-        )
-    ).order_by(StudentGrade.recorded_at.desc()).limit(5).all()
-    
-    return jsonify({
-        'student_info': student.to_dict(),
-        'classroom': classroom.to_dict(),
-        'overview': {
-            'upcoming_exams_count': upcoming_exams_count,
-            'pending_assignments_count': pending_assignments,
-            'attendance_rate': round(attendance_rate, 1),
-            'recent_grades_count': len(recent_grades)
-        },
-        'recent_grades': [grade.to_dict() for grade in recent_grades]
-    })
+        # آخر الدرجات
+        recent_grades = db.session.query(StudentGrade).options(
+            *StudentGrade.loader_options('summary')
+        ).filter(
+            and_(
+                StudentGrade.student_id == student.id,
+                StudentGrade.is_published == True
+            )
+        ).order_by(StudentGrade.recorded_at.desc()).limit(5).all()
+    
+        return {
+            'student_info': student.to_dict(),
+            'classroom': classroom.to_dict('summary'),
+            'overview': {
+                'upcoming_exams_count': upcoming_exams_count,
+                'pending_assignments_count': pending_assignments,
+                'attendance_rate': round(attendance_rate, 1),
+                'recent_grades_count': len(recent_grades)
+            },
+            'recent_grades': [grade.to_dict('summary') for grade in recent_grades]
+        }
+
+    # الامتحانات والواجبات على مستوى الفصل لا تُبطل الذاكرة؛ تُحدّث عند انتهاء صلاحية العنصر
+    return cached_dashboard('overview', [student.id], build, classroom.id)
 
 @student_dashboard.route('/dashboard/assignments', methods=['GET'])
 def get_student_assignments():
@@ -146,7 +152,9 @@ def get_student_assignments():
         return jsonify({'error': 'Student not enrolled in any class'}), 404
     
     # الحصول على الواجبات مع حالة التسليم
-    assignments_query = db.session.query(Assignment).join(Course).filter(
+    assignments_query = db.session.query(Assignment).options(
+        *Assignment.loader_options('summary')
+    ).join(Course).filter(
         and_(
             Course.classroom_id == enrollment.classroom_id,
             Assignment.is_active == True
@@ -176,20 +184,28 @@ def get_student_assignments():
     
     assignments = assignments_query.all()
     
+    # تسليمات الطالب لهذه الواجبات في استعلام واحد
+    submissions = {}
+    if assignments:
+        submissions = {
+            submission.assignment_id: submission
+            for submission in db.session.query(AssignmentSubmission).options(
+                *AssignmentSubmission.loader_options('summary')
+            ).filter(
+                and_(
+                    AssignmentSubmission.student_id == student.id,
+                    AssignmentSubmission.assignment_id.in_([assignment.id for assignment in assignments])
+                )
+            )
+        }
+    
     # إضافة معلومات التسليم لكل واجب
     assignments_data = []
     for assignment in assignments:
-        assignment_dict = assignment.to_dict()
-        
-        # البحث عن التسليم
-        submission = db.session.query(AssignmentSubmission).filter(
-            and_(
-                AssignmentSubmission.assignment_id == assignment.id,
-                AssignmentSubmission.student_id == student.id
-            )
-        ).first()
+        assignment_dict = assignment.to_dict('summary')
         
-        assignment_dict['submission'] = submission.to_dict() if submission else None
+        submission = submissions.get(assignment.id)
+        assignment_dict['submission'] = submission.to_dict('summary') if submission else None
         assignment_dict['is_submitted'] = submission is not None
         assignment_dict['is_overdue'] = (
             assignment.due_date < datetime.now() if assignment.due_date else False
@@ -221,7 +237,9 @@ def get_student_exams():
         return jsonify({'error': 'Student not enrolled in any class'}), 404
     
     # تصفية الامتحانات
-    exams_query = db.session.query(Exam).filter(
+    exams_query = db.session.query(Exam).options(
+        *Exam.loader_options('summary')
+    ).filter(
         and_(
             Exam.classroom_id == enrollment.classroom_id,
             Exam.is_published == True,
@@ -249,7 +267,7 @@ def get_student_exams():
     exams = exams_query.order_by(Exam.exam_date.asc(), Exam.start_time.asc()).all()
     
     return jsonify({
-        'exams': [exam.to_dict() for exam in exams],
+        'exams': [exam.to_dict('summary') for exam in exams],
         'total_count': len(exams)
     })
 
@@ -272,7 +290,9 @@ def get_student_schedule():
         return jsonify({'error': 'Student not enrolled in any class'}), 404
     
     # الحصول على جدول الحصص
-    schedule = db.session.query(ClassSchedule).filter(
+    schedule = db.session.query(ClassSchedule).options(
+        *ClassSchedule.loader_options('summary')
+    ).filter(
         and_(
             ClassSchedule.classroom_id == enrollment.classroom_id,
             ClassSchedule.is_active == True
@@ -288,7 +308,7 @@ def get_student_schedule():
         day_name = item.day_name
         if day_name not in schedule_by_day:
             schedule_by_day[day_name] = []
-        schedule_by_day[day_name].append(item.to_dict())
+        schedule_by_day[day_name].append(item.to_dict('summary'))
     
     # معلومات الدوام المدرسي
     today_info = db.session.query(SchoolDay).filter(
@@ -310,7 +330,7 @@ def get_student_grades():
     
     # الحصول على الدرجات المنشورة فقط
     grades_query = db.session.query(StudentGrade).options(
-        joinedload(StudentGrade.grade_system).joinedload('course').joinedload('subject')
+        *StudentGrade.loader_options('summary')
     ).filter(
         and_(
             StudentGrade.student_id == student.id,
@@ -318,23 +338,20 @@ def get_student_grades():
         )
     )
     
-    # تصفية حسب المادة
     subject_filter = request.args.get('subject')
+    grade_type = request.args.get('type')
+    if subject_filter or grade_type:
+        grades_query = grades_query.join(StudentGrade.grade_system)
+    
+    # تصفية حسب المادة
     if subject_filter:
-        grades_query = grades_query.join(
-            StudentGrade.grade_system
-        ).join(
-            'course'
-        ).join(
-            'subject'
-        ).filter(Subject.code == subject_filter)
+        grades_query = grades_query.join(GradeSystem.course).join(Course.subject).filter(
+            Subject.code == subject_filter
+        )
     
     # تصفية حسب نوع الدرجة
-    grade_type = request.args.get('type')
     if grade_type:
-        grades_query = grades_query.join(StudentGrade.grade_system).filter(
-            'grade_systems.grade_type' == grade_type
-        )
+        grades_query = grades_query.filter(GradeSystem.grade_type == grade_type)
     
     grades = grades_query.order_by(
         StudentGrade.recorded_date.desc()
@@ -357,7 +374,7 @@ def get_student_grades():
                     'total': 0,
                     'count': 0
                 }
-            subjects_stats[subject_name]['grades'].append(grade.to_dict())
+            subjects_stats[subject_name]['grades'].append(grade.to_dict('summary'))
             subjects_stats[subject_name]['total'] += grade.percentage
             subjects_stats[subject_name]['count'] += 1
         
@@ -374,12 +391,12 @@ def get_student_grades():
         subjects_stats = {}
     
     return jsonify({
-        'grades': [grade.to_dict() for grade in grades],
+        'grades': [grade.to_dict('summary') for grade in grades],
         'statistics': {
             'total_grades': total_grades,
             'average_percentage': round(average_percentage, 2) if total_grades > 0 else 0,
-            'highest_grade': highest_grade.to_dict() if highest_grade else None,
-            'lowest_grade': lowest_grade.to_dict() if lowest_grade else None
+            'highest_grade': highest_grade.to_dict('summary') if highest_grade else None,
+            'lowest_grade': lowest_grade.to_dict('summary') if lowest_grade else None
         },
         'subjects_stats': subjects_stats
     })
@@ -396,7 +413,9 @@ def get_student_attendance():
     start_date = date.today() - timedelta(days=days_back)
     
     # الحصول على سجلات الحضور
-    attendance_records = db.session.query(AttendanceRecord).filter(
+    attendance_records = db.session.query(AttendanceRecord).options(
+        *AttendanceRecord.loader_options('summary')
+    ).filter(
         and_(
             AttendanceRecord.student_id == student.id,
             AttendanceRecord.attendance_date >= start_date
@@ -426,7 +445,7 @@ def get_student_attendance():
         weekly_stats = {}
     
     return jsonify({
-        'attendance_records': [record.to_dict() for record in attendance_records],
+        'attendance_records': [record.to_dict('summary') for record in attendance_records],
         'statistics': {
             'total_days': total_days,
             'present_days': present_days,
@@ -0,0 +1,103 @@
+from flask import Blueprint, request, jsonify, session
+from src.routes.auth import require_auth, require_role
+from src.services.attendance_capture import AttendanceCaptureService, AttendanceCaptureError
+from src.services.user_management import GradeSystemService
+from src.services.query_metrics import query_budget
+from datetime import date
+
+teacher_bp = Blueprint('teacher', __name__)
+
+@teacher_bp.route('/classrooms/<int:classroom_id>/attendance', methods=['POST'])
+@query_budget(4)
+@require_auth
+@require_role('teacher')
+def record_classroom_attendance(classroom_id):
+    """
+    Record one period's attendance for a whole classroom.
+    Body: {"date": "YYYY-MM-DD", "period": "period_1", "course_id": 7 (optional),
+           "records": [[student_id, "absent"], [student_id, "late", "notes"], ...],
+           "default_status": "present" (optional: applied to enrolled students not listed)}
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            attendance_date = date.fromisoformat(data['date']) if data.get('date') else date.today()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'صيغة التاريخ غير صحيحة (YYYY-MM-DD)'}), 400
+
+        course_id = data.get('course_id')
+        if course_id is not None and not isinstance(course_id, int):
+            return jsonify({'error': 'course_id غير صالح'}), 400
+
+        result = AttendanceCaptureService.record_classroom(
+            session['user_id'], classroom_id, attendance_date, data.get('period'), data.get('records', []),
+            default_status=data.get('default_status'), course_id=course_id
+        )
+
+        return jsonify(result), 200
+
+    except AttendanceCaptureError as e:
+        error = {'error': str(e)}
+        if e.details:
+            error.update(e.details)
+        return jsonify(error), e.status
+    except Exception as e:
+        return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
+
+@teacher_bp.route('/grade-systems/<int:grade_system_id>/grades', methods=['POST'])
+@query_budget(5)
+@require_auth
+@require_role('teacher')
+def record_grades(grade_system_id):
+    """
+    Record a whole class's scores for one grade system in one request.
+    Body: {"scores": [[student_id, 87.5], [student_id, 42, "notes"], ...],
+           "assignment_id": 3 (optional), "recorded_date": "YYYY-MM-DD" (optional)}
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            recorded_date = date.fromisoformat(data['recorded_date']) if data.get('recorded_date') else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'صيغة التاريخ غير صحيحة (YYYY-MM-DD)'}), 400
+
+        assignment_id = data.get('assignment_id')
+        if assignment_id is not None and not isinstance(assignment_id, int):
+            return jsonify({'error': 'assignment_id غير صالح'}), 400
+
+        result = GradeSystemService.record_student_grades(
+            grade_system_id, data.get('scores'), session['user_id'],
+            assignment_id=assignment_id, recorded_date=recorded_date
+        )
+        if not result['success']:
+            status = result.pop('status', 400)
+            return jsonify(result), status
+
+        return jsonify(result), 201
+
+    except Exception as e:
+        return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
+
+@teacher_bp.route('/grades/publish', methods=['POST'])
+@query_budget(2)
+@require_auth
+@require_role('teacher')
+def publish_grades():
+    """Publish the caller's unpublished grades among grade_ids (one UPDATE ... RETURNING, one INSERT ... SELECT of notifications)"""
+    try:
+        data = request.get_json() or {}
+        grade_ids = data.get('grade_ids')
+
+        if not isinstance(grade_ids, list) or not grade_ids:
+            return jsonify({'error': 'قائمة grade_ids مطلوبة'}), 400
+
+        result = GradeSystemService.publish_grades(grade_ids, session['user_id'])
+        if not result['success']:
+            return jsonify({'error': f'خطأ في الخادم: {result["error"]}'}), 500
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        return jsonify({'error': f'خطأ في الخادم: {str(e)}'}), 500
@@ -0,0 +1,83 @@
+"""
+ذاكرة مؤقتة لرؤى الذكاء الاصطناعي حسب المحتوى
+Content-addressed AI insight cache - insights are keyed by a hash of the model,
+insight type and full request, reused within a TTL, and invalidated when the
+student's grades, attendance or behavior notes change
+"""
+
+import json
+import hashlib
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session, object_session
+from src.models.user import AIInsight, Grade, Attendance, BehaviorNote
+
+DEFAULT_CACHE_TTL = 24 * 60 * 60  # ثانية
+
+
+def insight_cache_key(model, insight_type, request):
+    """مفتاح SHA-256 للطلب؛ أي تغيير في بيانات الطالب يغير النص وبالتالي المفتاح"""
+    payload = json.dumps([model, insight_type, request], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AIInsightCache:
+    """البحث عن رؤى محفوظة بنفس المفتاح وإبطالها عند تغير بيانات الطالب"""
+
+    @staticmethod
+    def ttl():
+        if has_app_context():
+            return current_app.config.get('AI_INSIGHT_CACHE_TTL', DEFAULT_CACHE_TTL)
+        return DEFAULT_CACHE_TTL
+
+    @classmethod
+    def lookup(cls, cache_keys):
+        """أحدث رؤية صالحة لكل مفتاح (استعلام واحد لعدة مفاتيح)"""
+        ttl = cls.ttl()
+        if not cache_keys or not ttl:
+            return {}
+
+        insights = AIInsight.query.filter(
+            AIInsight.cache_key.in_(set(cache_keys)),
+            AIInsight.is_active == True,
+            AIInsight.generated_at >= datetime.utcnow() - timedelta(seconds=ttl)
+        ).order_by(AIInsight.generated_at).all()
+        return {insight.cache_key: insight for insight in insights}
+
+    @staticmethod
+    def invalidate(student_ids, connection=None):
+        """إبطال الرؤى المحفوظة لطلاب محددين (مثلاً بعد إدراج جماعي لا يطلق أحداث ORM)"""
+        student_ids = list(student_ids)
+        if not student_ids:
+            return
+
+        statement = update(AIInsight).where(
+            AIInsight.student_id.in_(student_ids),
+            AIInsight.cache_key.isnot(None)
+        ).values(cache_key=None)
+
+        if connection is not None:
+            connection.execute(statement)
+        else:
+            from src.models.user import db
+            db.session.execute(statement)
+
+
+def _mark_student_changed(mapper, connection, target):
+    """تسجيل الطالب الذي تغيرت بياناته ليُبطل بعد انتهاء الـ flush"""
+    session = object_session(target)
+    if session is not None and target.student_id is not None:
+        session.info.setdefault('ai_cache_dirty_students', set()).add(target.student_id)
+
+
+def _invalidate_after_flush(session, flush_context):
+    student_ids = session.info.pop('ai_cache_dirty_students', None)
+    if student_ids:
+        AIInsightCache.invalidate(student_ids, connection=session.connection())
+
+
+for _model in (Grade, Attendance, BehaviorNote):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _mark_student_changed)
+event.listen(Session, 'after_flush', _invalidate_after_flush)
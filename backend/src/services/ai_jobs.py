@@ -0,0 +1,197 @@
+"""
+خدمة مهام الذكاء الاصطناعي غير المتزامنة
+AI job service - runs AIService calls outside the web request, on Celery when
+configured or on an in-process thread pool that uses the ai_jobs table as its
+queue
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from src import db
+from src.models.extended_models import AIJob
+from src.services.ai_service import AIService, BATCH_ANALYSIS_TYPES
+
+try:
+    from celery import Celery
+except ImportError:
+    Celery = None
+
+# نوع المهمة -> دالة AIService المقابلة
+JOB_METHODS = {
+    'performance': 'analyze_student_performance',
+    'report': 'generate_comprehensive_report',
+    'risk': 'predict_academic_risk',
+    'recommendations': 'generate_personalized_recommendations'
+}
+JOB_TYPES = tuple(JOB_METHODS) + ('batch',)
+
+CELERY_TASK_NAME = 'ai_jobs.execute'
+
+ai_service = AIService()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers):
+    """مجموعة الخيوط الخاصة بهذه العملية (تُنشأ عند أول مهمة؛ تشاركها مهام استيراد Excel)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-job')
+        return _executor
+
+
+def make_celery(app):
+    """إنشاء تطبيق Celery وتسجيل مهمة تنفيذ مهام الذكاء الاصطناعي (لعملية العامل)"""
+    celery = Celery(app.import_name, broker=app.config['CELERY_BROKER_URL'])
+
+    @celery.task(name=CELERY_TASK_NAME)
+    def execute_ai_job(job_id):
+        with app.app_context():
+            if AIJobService.claim(job_id):
+                AIJobService.run(job_id)
+
+    return celery
+
+
+class AIJobService:
+    """إرسال مهام الذكاء الاصطناعي ومتابعتها"""
+
+    @staticmethod
+    def _use_celery(app):
+        return app.config.get('AI_JOB_BACKEND') == 'celery' and Celery is not None
+
+    @classmethod
+    def submit(cls, job_type, student_id=None, params=None, created_by=None):
+        """حفظ المهمة وإرسالها للتنفيذ، وإرجاعها فوراً دون انتظار النتيجة"""
+        if job_type not in JOB_TYPES:
+            return {'success': False, 'error': 'نوع المهمة غير صحيح'}
+
+        params = params or {}
+        try:
+            # مهام بقيت running بعد توقف عاملها لا يعيدها الطابور أبداً
+            cls.expire_stale(current_app.config.get('AI_JOB_STALE_AFTER', 3600))
+            job = AIJob(
+                job_type=job_type,
+                student_id=student_id,
+                params_json=json.dumps(params, ensure_ascii=False),
+                status='pending',
+                total_items=len(params.get('student_ids', [])) if job_type == 'batch' else 1,
+                processed_items=0,
+                created_by=created_by
+            )
+            db.session.add(job)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'error': f'خطأ في إنشاء المهمة: {str(e)}'}
+
+        app = current_app._get_current_object()
+        if cls._use_celery(app):
+            celery = app.extensions.get('ai_jobs_celery')
+            if celery is None:
+                celery = app.extensions['ai_jobs_celery'] = Celery(
+                    app.import_name, broker=app.config['CELERY_BROKER_URL']
+                )
+            celery.send_task(CELERY_TASK_NAME, args=[job.id])
+        else:
+            get_executor(app.config.get('AI_JOB_WORKERS', 2)).submit(cls._drain, app)
+
+        return {'success': True, 'job': job.to_dict()}
+
+    @staticmethod
+    def expire_stale(timeout):
+        """تحويل المهام العالقة في running منذ أكثر من timeout ثانية إلى failed"""
+        if not timeout:
+            return 0
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(AIJob).where(
+                AIJob.status == 'running', AIJob.started_at < now - timedelta(seconds=timeout)
+            ).values(status='failed', error='انتهت مهلة التنفيذ: توقف العامل قبل إكمال المهمة', finished_at=now)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def claim(job_id):
+        """حجز مهمة معلقة بشكل ذري حتى لا ينفذها عاملان"""
+        result = db.session.execute(
+            update(AIJob).where(
+                AIJob.id == job_id, AIJob.status == 'pending'
+            ).values(status='running', started_at=datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    @classmethod
+    def claim_next(cls):
+        """حجز أقدم مهمة معلقة من الجدول، أو None إذا كان الطابور فارغاً"""
+        while True:
+            job_id = db.session.query(AIJob.id).filter(
+                AIJob.status == 'pending'
+            ).order_by(AIJob.id).limit(1).scalar()
+            if job_id is None:
+                return None
+            if cls.claim(job_id):
+                return job_id
+
+    @classmethod
+    def _drain(cls, app):
+        """تنفيذ المهام المعلقة واحدة تلو الأخرى (بما فيها مهام متبقية من تشغيل سابق)"""
+        with app.app_context():
+            try:
+                while True:
+                    job_id = cls.claim_next()
+                    if job_id is None:
+                        return
+                    cls.run(job_id)
+            except Exception as e:
+                app.logger.error(f'AI job worker error: {e}')
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def run(job_id):
+        """تنفيذ مهمة محجوزة وحفظ نتيجتها"""
+        job = AIJob.query.get(job_id)
+        if not job:
+            return
+
+        params = json.loads(job.params_json) if job.params_json else {}
+        try:
+            if job.job_type == 'batch':
+                analysis_type = params.get('analysis_type', 'performance')
+                if analysis_type not in BATCH_ANALYSIS_TYPES:
+                    raise ValueError('نوع التحليل غير صحيح')
+
+                def on_result(_):
+                    job.processed_items = (job.processed_items or 0) + 1
+                    db.session.commit()
+
+                result = ai_service.batch_analyze(
+                    params.get('student_ids', []),
+                    analysis_type,
+                    concurrency=current_app.config.get('AI_BATCH_CONCURRENCY', 5),
+                    requests_per_minute=current_app.config.get('AI_REQUESTS_PER_MINUTE'),
+                    on_result=on_result
+                )
+            else:
+                result = getattr(ai_service, JOB_METHODS[job.job_type])(job.student_id)
+                if not result:
+                    raise RuntimeError('فشل في التحليل')
+                job.processed_items = 1
+
+            job.result_json = json.dumps(result, ensure_ascii=False)
+            job.status = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.error = str(e)
+
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
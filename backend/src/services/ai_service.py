@@ -1,62 +1,244 @@
+import os
+import time
+import threading
 import openai
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
 from src.models.user import Student, Grade, Attendance, BehaviorNote, AIInsight, db
+from src.services.ai_cache import AIInsightCache, insight_cache_key
+from src.services.student_summary import StudentSummaryService
+from src.services.risk_rules import (
+    RISK_WINDOW_DAYS, RECENT_GRADES, GRADE_TREND_MARGIN, POOR_ATTENDANCE_RATE, BEHAVIOR_NEGATIVE_RATIO,
+    RISK_WEIGHTS, HIGH_RISK_SCORE, MEDIUM_RISK_SCORE
+)
 from sqlalchemy import func
 
+DEFAULT_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
+
+SYSTEM_PROMPTS = {
+    'performance': "أنت مستشار تعليمي خبير متخصص في تحليل أداء الطلاب. قم بتحليل البيانات المقدمة وقدم رؤى عملية ومفيدة باللغة العربية.",
+    'report': "أنت مستشار تعليمي خبير. قم بإنشاء تقرير شامل ومفصل عن أداء الطالب يتضمن التحليل والتوصيات والخطة العملية للتحسين. استخدم اللغة العربية الفصحى.",
+    'risk': "أنت خبير في تقييم المخاطر الأكاديمية. قم بتحليل البيانات وتحديد مستوى المخاطر مع تقديم توصيات للتدخل المبكر باللغة العربية.",
+    'recommendations': "أنت مستشار تعليمي متخصص في وضع خطط التحسين الشخصية. قدم توصيات عملية ومحددة وقابلة للتطبيق باللغة العربية."
+}
+
+# أنواع التحليل المتاحة في التحليل المجمع
+BATCH_ANALYSIS_TYPES = ('performance', 'risk', 'recommendations')
+
+# تقييم المخاطر وحده يقرأ السجلات الخام (آخر 3 أشهر)؛ بقية الأنواع تقرأ StudentSummary
+RECENT_RECORDS_TYPES = ('risk',)
+
+# نوع التحليل -> insight_type المحفوظ في AIInsight
+INSIGHT_TYPES = {
+    'performance': 'performance_analysis',
+    'report': 'comprehensive_report',
+    'risk': 'risk_assessment',
+    'recommendations': 'personalized_recommendations'
+}
+
+
+class RateLimiter:
+    """توزيع الطلبات بالتساوي بحيث لا تتجاوز حداً معيناً في الدقيقة عبر عدة خيوط"""
+    
+    def __init__(self, requests_per_minute=None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class AIService:
-    def __init__(self):
-        # OpenAI client is already configured via environment variables
-        self.client = openai.OpenAI()
+    def __init__(self, client=None, model=None):
+        # يمكن تمرير عميل بديل (مثلاً عميل وهمي محلي)، وإلا يُنشأ عميل OpenAI عند أول استخدام
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.model = model or DEFAULT_MODEL
+    
+    @property
+    def client(self):
+        """عميل OpenAI، يُنشأ عند الحاجة فقط (الإعدادات من متغيرات البيئة)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = openai.OpenAI()
+        return self._client
+    
+    def _complete(self, request):
+        """استدعاء نموذج المحادثة وإرجاع نص الرد"""
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": request['system']},
+                {"role": "user", "content": request['prompt']}
+            ],
+            max_tokens=request['max_tokens'],
+            temperature=request['temperature']
+        )
+        return response.choices[0].message.content
+    
+    def _load_records(self, student_ids, analysis_type):
+        """
+        جلب الطلاب وملخصاتهم باستعلامين، ومعهما سجلات آخر 3 أشهر (ثلاثة استعلامات
+        مجمعة) لأنواع التحليل التي تحتاجها فقط.
+        يُرجع {student_id: (student, summary, recent)} حيث recent = (grades, attendance, behavior) أو None.
+        """
+        students = Student.query.options(joinedload(Student.user)).filter(
+            Student.id.in_(student_ids)
+        ).all()
+        if not students:
+            return {}
+        
+        summaries = StudentSummaryService.get_many([student.id for student in students])
+        recent = None
+        if analysis_type in RECENT_RECORDS_TYPES:
+            since = datetime.utcnow() - timedelta(days=RISK_WINDOW_DAYS)
+            recent = {student.id: ([], [], []) for student in students}
+            for position, marker, cutoff in ((0, Grade.date_recorded, since),
+                                             (1, Attendance.date, since.date()),
+                                             (2, BehaviorNote.date_recorded, since)):
+                model = marker.class_
+                # بترتيب التاريخ كما في RiskScoringService: "آخر 3 درجات" نفسها للدرجات المسجلة بأثر رجعي
+                rows = model.query.filter(model.student_id.in_(recent), marker >= cutoff).order_by(marker, model.id)
+                for row in rows:
+                    recent[row.student_id][position].append(row)
+        
+        return {
+            student.id: (student, summaries[student.id], recent[student.id] if recent else None)
+            for student in students
+        }
+    
+    def _attach_cache(self, analysis_type, pending):
+        """
+        حساب مفتاح كل طلب والبحث عن رؤى محفوظة بنفس المفتاح (استعلام واحد).
+        pending: {student_id: (request, context)}. تُعاد المحتويات الموجودة
+        {student_id: content} ويُضاف المفتاح والرؤية المحفوظة إلى context.
+        """
+        for request, context in pending.values():
+            context['cache_key'] = insight_cache_key(self.model, INSIGHT_TYPES[analysis_type], request)
+        
+        cached = AIInsightCache.lookup([context['cache_key'] for _, context in pending.values()])
+        hits = {}
+        for student_id, (_, context) in pending.items():
+            insight = cached.get(context['cache_key'])
+            if insight and insight.student_id == student_id:
+                context['cached_insight'] = insight
+                hits[student_id] = insight.content
+        return hits
+    
+    def _store_insight(self, student_id, insight_type, content, confidence_score, context=None):
+        """حفظ نتيجة الذكاء الاصطناعي في قاعدة البيانات (أو إرجاع الرؤية المحفوظة مسبقاً)"""
+        context = context or {}
+        if context.get('cached_insight'):
+            return context['cached_insight']
+        
+        insight = AIInsight(
+            student_id=student_id,
+            insight_type=insight_type,
+            content=content,
+            confidence_score=confidence_score,
+            generated_at=datetime.utcnow(),
+            cache_key=context.get('cache_key')
+        )
+        db.session.add(insight)
+        db.session.commit()
+        return insight
+    
+    # ---- بناء الطلبات وحفظ النتائج لكل نوع تحليل ----
+    
+    def _build_performance_request(self, student, summary, recent):
+        student_data = self._prepare_student_data(student, summary)
+        request = {
+            'system': SYSTEM_PROMPTS['performance'],
+            'prompt': self._create_analysis_prompt(student_data),
+            'max_tokens': 1500,
+            'temperature': 0.7
+        }
+        return request, {'student_data': student_data}
+    
+    def _finish_performance(self, student, content, context):
+        insight = self._store_insight(student.id, INSIGHT_TYPES['performance'], content, 0.85, context)
+        return {
+            'analysis': content,
+            'student_data': context['student_data'],
+            'insight_id': insight.id
+        }
+    
+    def _build_risk_request(self, student, summary, recent):
+        # البيانات الحديثة فقط (آخر 3 أشهر، مُرشحة عند التحميل)
+        risk_factors = self._analyze_risk_factors(*recent)
+        request = {
+            'system': SYSTEM_PROMPTS['risk'],
+            'prompt': self._create_risk_assessment_prompt(student, risk_factors),
+            'max_tokens': 1000,
+            'temperature': 0.5
+        }
+        return request, {'risk_factors': risk_factors}
+    
+    def _finish_risk(self, student, content, context):
+        risk_factors = context['risk_factors']
+        risk_level = self._determine_risk_level(risk_factors)
+        self._store_insight(student.id, INSIGHT_TYPES['risk'], content, 0.80, context)
+        return {
+            'risk_level': risk_level,
+            'assessment': content,
+            'risk_factors': risk_factors,
+            'recommendations': self._get_risk_recommendations(risk_level)
+        }
+    
+    def _build_recommendations_request(self, student, summary, recent):
+        strengths_weaknesses = self._strengths_weaknesses(summary)
+        request = {
+            'system': SYSTEM_PROMPTS['recommendations'],
+            'prompt': self._create_recommendations_prompt(student, strengths_weaknesses),
+            'max_tokens': 1200,
+            'temperature': 0.7
+        }
+        return request, {'strengths_weaknesses': strengths_weaknesses}
+    
+    def _finish_recommendations(self, student, content, context):
+        strengths_weaknesses = context['strengths_weaknesses']
+        self._store_insight(student.id, INSIGHT_TYPES['recommendations'], content, 0.85, context)
+        return {
+            'recommendations': content,
+            'strengths': strengths_weaknesses['strengths'],
+            'weaknesses': strengths_weaknesses['weaknesses'],
+            'action_plan': self._create_action_plan(strengths_weaknesses)
+        }
+    
+    def _analysis_steps(self, analysis_type):
+        """دالتا البناء والحفظ لنوع التحليل"""
+        return (
+            getattr(self, f'_build_{analysis_type}_request'),
+            getattr(self, f'_finish_{analysis_type}')
+        )
+    
+    def _run_single(self, analysis_type, student_id):
+        """تنفيذ تحليل واحد: جمع البيانات، استدعاء النموذج (عند عدم وجوده في الذاكرة المؤقتة)، حفظ النتيجة"""
+        records = self._load_records([student_id], analysis_type).get(student_id)
+        if not records:
+            return None
+        
+        build, finish = self._analysis_steps(analysis_type)
+        request, context = build(*records)
+        hits = self._attach_cache(analysis_type, {student_id: (request, context)})
+        content = hits[student_id] if student_id in hits else self._complete(request)
+        return finish(records[0], content, context)
     
     def analyze_student_performance(self, student_id):
         """تحليل شامل لأداء الطالب باستخدام الذكاء الاصطناعي"""
         try:
-            student = Student.query.get(student_id)
-            if not student:
-                return None
-            
-            # جمع البيانات
-            grades = Grade.query.filter_by(student_id=student_id).all()
-            attendance_records = Attendance.query.filter_by(student_id=student_id).all()
-            behavior_notes = BehaviorNote.query.filter_by(student_id=student_id).all()
-            
-            # تحضير البيانات للتحليل
-            student_data = self._prepare_student_data(student, grades, attendance_records, behavior_notes)
-            
-            # إنشاء prompt للذكاء الاصطناعي
-            prompt = self._create_analysis_prompt(student_data)
-            
-            # استدعاء OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "أنت مستشار تعليمي خبير متخصص في تحليل أداء الطلاب. قم بتحليل البيانات المقدمة وقدم رؤى عملية ومفيدة باللغة العربية."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.7
-            )
-            
-            analysis_result = response.choices[0].message.content
-            
-            # حفظ النتيجة في قاعدة البيانات
-            insight = AIInsight(
-                student_id=student_id,
-                insight_type='performance_analysis',
-                content=analysis_result,
-                confidence_score=0.85,
-                generated_at=datetime.utcnow()
-            )
-            db.session.add(insight)
-            db.session.commit()
-            
-            return {
-                'analysis': analysis_result,
-                'student_data': student_data,
-                'insight_id': insight.id
-            }
-            
+            return self._run_single('performance', student_id)
         except Exception as e:
             print(f"خطأ في تحليل أداء الطالب: {str(e)}")
             return None
@@ -68,40 +250,22 @@ class AIService:
             if not student:
                 return None
             
-            # جمع البيانات الشاملة
-            grades = Grade.query.filter_by(student_id=student_id).all()
-            attendance_records = Attendance.query.filter_by(student_id=student_id).all()
-            behavior_notes = BehaviorNote.query.filter_by(student_id=student_id).all()
-            
             # حساب الإحصائيات
-            stats = self._calculate_statistics(grades, attendance_records, behavior_notes)
-            
-            # إنشاء prompt للتقرير الشامل
-            prompt = self._create_report_prompt(student, stats)
-            
-            # استدعاء OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "أنت مستشار تعليمي خبير. قم بإنشاء تقرير شامل ومفصل عن أداء الطالب يتضمن التحليل والتوصيات والخطة العملية للتحسين. استخدم اللغة العربية الفصحى."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.6
-            )
-            
-            report_content = response.choices[0].message.content
+            stats = self._calculate_statistics(StudentSummaryService.get(student_id))
+            
+            # إنشاء prompt للتقرير الشامل واستدعاء النموذج
+            request = {
+                'system': SYSTEM_PROMPTS['report'],
+                'prompt': self._create_report_prompt(student, stats),
+                'max_tokens': 2000,
+                'temperature': 0.6
+            }
+            context = {}
+            hits = self._attach_cache('report', {student_id: (request, context)})
+            report_content = hits[student_id] if student_id in hits else self._complete(request)
             
             # حفظ التقرير
-            insight = AIInsight(
-                student_id=student_id,
-                insight_type='comprehensive_report',
-                content=report_content,
-                confidence_score=0.90,
-                generated_at=datetime.utcnow()
-            )
-            db.session.add(insight)
-            db.session.commit()
+            self._store_insight(student_id, INSIGHT_TYPES['report'], report_content, 0.90, context)
             
             return {
                 'report': report_content,
@@ -121,68 +285,7 @@ class AIService:
     def predict_academic_risk(self, student_id):
         """تقييم مخاطر الأداء الأكاديمي"""
         try:
-            student = Student.query.get(student_id)
-            if not student:
-                return None
-            
-            # جمع البيانات الحديثة (آخر 3 أشهر)
-            three_months_ago = datetime.utcnow() - timedelta(days=90)
-            
-            recent_grades = Grade.query.filter(
-                Grade.student_id == student_id,
-                Grade.date_recorded >= three_months_ago
-            ).all()
-            
-            recent_attendance = Attendance.query.filter(
-                Attendance.student_id == student_id,
-                Attendance.date >= three_months_ago.date()
-            ).all()
-            
-            recent_behavior = BehaviorNote.query.filter(
-                BehaviorNote.student_id == student_id,
-                BehaviorNote.date_recorded >= three_months_ago
-            ).all()
-            
-            # تحليل المخاطر
-            risk_factors = self._analyze_risk_factors(recent_grades, recent_attendance, recent_behavior)
-            
-            # إنشاء prompt لتقييم المخاطر
-            prompt = self._create_risk_assessment_prompt(student, risk_factors)
-            
-            # استدعاء OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "أنت خبير في تقييم المخاطر الأكاديمية. قم بتحليل البيانات وتحديد مستوى المخاطر مع تقديم توصيات للتدخل المبكر باللغة العربية."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.5
-            )
-            
-            risk_assessment = response.choices[0].message.content
-            
-            # تحديد مستوى المخاطر
-            risk_level = self._determine_risk_level(risk_factors)
-            
-            # حفظ التقييم
-            insight = AIInsight(
-                student_id=student_id,
-                insight_type='risk_assessment',
-                content=risk_assessment,
-                confidence_score=0.80,
-                generated_at=datetime.utcnow()
-            )
-            db.session.add(insight)
-            db.session.commit()
-            
-            return {
-                'risk_level': risk_level,
-                'assessment': risk_assessment,
-                'risk_factors': risk_factors,
-                'recommendations': self._get_risk_recommendations(risk_level)
-            }
-            
+            return self._run_single('risk', student_id)
         except Exception as e:
             print(f"خطأ في تقييم المخاطر الأكاديمية: {str(e)}")
             return None
@@ -190,79 +293,83 @@ class AIService:
     def generate_personalized_recommendations(self, student_id):
         """إنتاج توصيات شخصية للطالب"""
         try:
-            student = Student.query.get(student_id)
-            if not student:
-                return None
-            
-            # تحليل نقاط القوة والضعف
-            strengths_weaknesses = self._analyze_strengths_weaknesses(student_id)
-            
-            # إنشاء prompt للتوصيات الشخصية
-            prompt = self._create_recommendations_prompt(student, strengths_weaknesses)
-            
-            # استدعاء OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "أنت مستشار تعليمي متخصص في وضع خطط التحسين الشخصية. قدم توصيات عملية ومحددة وقابلة للتطبيق باللغة العربية."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1200,
-                temperature=0.7
-            )
-            
-            recommendations = response.choices[0].message.content
-            
-            # حفظ التوصيات
-            insight = AIInsight(
-                student_id=student_id,
-                insight_type='personalized_recommendations',
-                content=recommendations,
-                confidence_score=0.85,
-                generated_at=datetime.utcnow()
-            )
-            db.session.add(insight)
-            db.session.commit()
-            
-            return {
-                'recommendations': recommendations,
-                'strengths': strengths_weaknesses['strengths'],
-                'weaknesses': strengths_weaknesses['weaknesses'],
-                'action_plan': self._create_action_plan(strengths_weaknesses)
-            }
-            
+            return self._run_single('recommendations', student_id)
         except Exception as e:
             print(f"خطأ في إنتاج التوصيات الشخصية: {str(e)}")
             return None
     
-    def _prepare_student_data(self, student, grades, attendance_records, behavior_notes):
-        """تحضير بيانات الطالب للتحليل"""
-        # حساب المعدل العام
-        avg_grade = sum(grade.grade for grade in grades) / len(grades) if grades else 0
-        
-        # حساب نسبة الحضور
-        total_days = len(attendance_records)
-        present_days = len([a for a in attendance_records if a.status == 'present'])
-        attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+    def batch_analyze(self, student_ids, analysis_type='performance', concurrency=5,
+                      requests_per_minute=None, on_result=None):
+        """
+        تحليل مجموعة من الطلاب بالتوازي.
         
-        # تحليل السلوك
-        positive_behavior = len([n for n in behavior_notes if n.note_type == 'positive'])
-        negative_behavior = len([n for n in behavior_notes if n.note_type == 'negative'])
-        
-        # تجميع الدرجات حسب المادة
-        subjects_performance = {}
-        for grade in grades:
-            if grade.subject not in subjects_performance:
-                subjects_performance[grade.subject] = []
-            subjects_performance[grade.subject].append(grade.grade)
-        
-        for subject in subjects_performance:
-            grades_list = subjects_performance[subject]
-            subjects_performance[subject] = {
-                'average': sum(grades_list) / len(grades_list),
-                'count': len(grades_list),
-                'trend': 'improving' if len(grades_list) >= 2 and grades_list[0] > grades_list[-1] else 'stable'
-            }
+        تُجلب بيانات جميع الطلاب مسبقاً باستعلامات مجمعة، ثم تُرسل طلبات النموذج
+        عبر مجموعة خيوط محدودة العدد مع حد للطلبات في الدقيقة. تُحفظ كل نتيجة
+        فور اكتمالها (في الخيط الحالي) ويُستدعى on_result(result) إن وجد.
+        الطلاب الذين لديهم رؤية محفوظة بنفس مفتاح الطلب لا يُستدعى النموذج لهم.
+        """
+        if analysis_type not in BATCH_ANALYSIS_TYPES:
+            raise ValueError(f'نوع التحليل غير مدعوم: {analysis_type}')
+        
+        build, finish = self._analysis_steps(analysis_type)
+        student_ids = list(dict.fromkeys(student_ids))
+        records = self._load_records(student_ids, analysis_type)
+        
+        results = {}
+        
+        def record_result(student_id, result):
+            results[student_id] = result
+            if on_result:
+                on_result(result)
+        
+        pending = {}
+        for student_id in student_ids:
+            if student_id not in records:
+                record_result(student_id, {
+                    'student_id': student_id, 'success': False, 'error': 'الطالب غير موجود'
+                })
+                continue
+            pending[student_id] = build(*records[student_id])
+        
+        # النتائج المحفوظة مسبقاً لا تحتاج استدعاء النموذج
+        for student_id, content in self._attach_cache(analysis_type, pending).items():
+            request, context = pending.pop(student_id)
+            result = finish(records[student_id][0], content, context)
+            record_result(student_id, {'student_id': student_id, 'success': True, 'result': result})
+        
+        if pending:
+            limiter = RateLimiter(requests_per_minute)
+            
+            def call_model(request):
+                limiter.wait()
+                return self._complete(request)
+            
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending)))) as pool:
+                futures = {
+                    pool.submit(call_model, request): student_id
+                    for student_id, (request, _) in pending.items()
+                }
+                for future in as_completed(futures):
+                    student_id = futures[future]
+                    try:
+                        content = future.result()
+                        result = finish(records[student_id][0], content, pending[student_id][1])
+                        record_result(student_id, {'student_id': student_id, 'success': True, 'result': result})
+                    except Exception as e:
+                        db.session.rollback()
+                        record_result(student_id, {'student_id': student_id, 'success': False, 'error': str(e)})
+        
+        return [results[student_id] for student_id in student_ids]
+    
+    def _prepare_student_data(self, student, summary):
+        """تحضير بيانات الطالب للتحليل من الملخص المحفوظ (StudentSummary)"""
+        overall, subjects = summary.grade_statistics()
+        subjects_performance = {
+            subject: {'average': stats['average'], 'count': stats['count'], 'trend': stats['trend']}
+            for subject, stats in subjects.items()
+        }
+        attendance = summary.attendance_statistics()
+        behavior = summary.behavior_statistics()
         
         return {
             'student_info': {
@@ -271,20 +378,20 @@ class AIService:
                 'class': student.class_name
             },
             'academic_performance': {
-                'overall_average': round(avg_grade, 2),
+                'overall_average': overall['average'],
                 'subjects_performance': subjects_performance,
-                'total_grades': len(grades)
+                'total_grades': overall['total_count']
             },
             'attendance': {
-                'percentage': round(attendance_percentage, 2),
-                'total_days': total_days,
-                'present_days': present_days,
-                'absent_days': total_days - present_days
+                'percentage': attendance['attendance_percentage'],
+                'total_days': attendance['total_days'],
+                'present_days': attendance['present_days'],
+                'absent_days': attendance['total_days'] - attendance['present_days']
             },
             'behavior': {
-                'positive_notes': positive_behavior,
-                'negative_notes': negative_behavior,
-                'total_notes': len(behavior_notes)
+                'positive_notes': behavior['positive'],
+                'negative_notes': behavior['negative'],
+                'total_notes': behavior['total_notes']
             }
         }
     
@@ -378,40 +485,29 @@ class AIService:
         6. مؤشرات قياس التقدم
         """
     
-    def _calculate_statistics(self, grades, attendance_records, behavior_notes):
-        """حساب الإحصائيات الشاملة"""
+    def _calculate_statistics(self, summary):
+        """الإحصائيات الشاملة من الملخص المحفوظ (StudentSummary)"""
         # إحصائيات الدرجات
         grade_stats = {
-            'total_grades': len(grades),
-            'average': sum(grade.grade for grade in grades) / len(grades) if grades else 0,
-            'highest': max(grade.grade for grade in grades) if grades else 0,
-            'lowest': min(grade.grade for grade in grades) if grades else 0
+            'total_grades': summary.grade_count,
+            'average': summary.grade_average,
+            'highest': summary.grade_max if summary.grade_max is not None else 0,
+            'lowest': summary.grade_min if summary.grade_min is not None else 0
         }
         
         # إحصائيات الحضور
         attendance_stats = {
-            'total_days': len(attendance_records),
-            'present': len([a for a in attendance_records if a.status == 'present']),
-            'absent': len([a for a in attendance_records if a.status == 'absent']),
-            'late': len([a for a in attendance_records if a.status == 'late']),
-            'percentage': 0
-        }
-        
-        if attendance_stats['total_days'] > 0:
-            attendance_stats['percentage'] = (attendance_stats['present'] / attendance_stats['total_days']) * 100
-        
-        # إحصائيات السلوك
-        behavior_stats = {
-            'total_notes': len(behavior_notes),
-            'positive': len([n for n in behavior_notes if n.note_type == 'positive']),
-            'negative': len([n for n in behavior_notes if n.note_type == 'negative']),
-            'neutral': len([n for n in behavior_notes if n.note_type == 'neutral'])
+            'total_days': summary.attendance_count,
+            'present': summary.attendance_present,
+            'absent': summary.attendance_absent,
+            'late': summary.attendance_late,
+            'percentage': summary.attendance_percentage
         }
         
         return {
             'grades': grade_stats,
             'attendance': attendance_stats,
-            'behavior': behavior_stats
+            'behavior': summary.behavior_statistics()
         }
     
     def _analyze_risk_factors(self, recent_grades, recent_attendance, recent_behavior):
@@ -426,14 +522,15 @@ class AIService:
         }
         
         # تحليل الاتجاه الأكاديمي
-        if len(recent_grades) >= 3:
-            recent_avg = sum(grade.grade for grade in recent_grades[-3:]) / 3
-            older_avg = sum(grade.grade for grade in recent_grades[:-3]) / len(recent_grades[:-3]) if len(recent_grades) > 3 else recent_avg
+        if len(recent_grades) >= RECENT_GRADES:
+            recent, older = recent_grades[-RECENT_GRADES:], recent_grades[:-RECENT_GRADES]
+            recent_avg = sum(grade.grade for grade in recent) / RECENT_GRADES
+            older_avg = sum(grade.grade for grade in older) / len(older) if older else recent_avg
             
-            if recent_avg < older_avg - 5:
+            if recent_avg < older_avg - GRADE_TREND_MARGIN:
                 risk_factors['academic_decline'] = True
                 risk_factors['grade_trend'] = 'declining'
-            elif recent_avg > older_avg + 5:
+            elif recent_avg > older_avg + GRADE_TREND_MARGIN:
                 risk_factors['grade_trend'] = 'improving'
         
         # تحليل الحضور
@@ -442,7 +539,7 @@ class AIService:
             attendance_rate = (present_days / len(recent_attendance)) * 100
             risk_factors['attendance_rate'] = attendance_rate
             
-            if attendance_rate < 85:
+            if attendance_rate < POOR_ATTENDANCE_RATE:
                 risk_factors['poor_attendance'] = True
         
         # تحليل السلوك
@@ -451,25 +548,18 @@ class AIService:
             negative_ratio = (negative_notes / len(recent_behavior)) * 100
             risk_factors['negative_behavior_ratio'] = negative_ratio
             
-            if negative_ratio > 30:
+            if negative_ratio > BEHAVIOR_NEGATIVE_RATIO:
                 risk_factors['behavioral_issues'] = True
         
         return risk_factors
     
     def _determine_risk_level(self, risk_factors):
         """تحديد مستوى المخاطر"""
-        risk_score = 0
+        risk_score = sum(weight for factor, weight in RISK_WEIGHTS.items() if risk_factors[factor])
         
-        if risk_factors['academic_decline']:
-            risk_score += 3
-        if risk_factors['poor_attendance']:
-            risk_score += 2
-        if risk_factors['behavioral_issues']:
-            risk_score += 2
-        
-        if risk_score >= 5:
+        if risk_score >= HIGH_RISK_SCORE:
             return 'high'
-        elif risk_score >= 3:
+        elif risk_score >= MEDIUM_RISK_SCORE:
             return 'medium'
         else:
             return 'low'
@@ -499,33 +589,24 @@ class AIService:
         
         return recommendations.get(risk_level, [])
     
-    def _analyze_strengths_weaknesses(self, student_id):
-        """تحليل نقاط القوة والضعف"""
-        grades = Grade.query.filter_by(student_id=student_id).all()
-        attendance_records = Attendance.query.filter_by(student_id=student_id).all()
-        behavior_notes = BehaviorNote.query.filter_by(student_id=student_id).all()
-        
+    def _strengths_weaknesses(self, summary):
+        """تحليل نقاط القوة والضعف من الملخص المحفوظ (StudentSummary)"""
         strengths = []
         weaknesses = []
         
         # تحليل الأداء الأكاديمي
-        subjects_performance = {}
-        for grade in grades:
-            if grade.subject not in subjects_performance:
-                subjects_performance[grade.subject] = []
-            subjects_performance[grade.subject].append(grade.grade)
-        
-        for subject, grade_list in subjects_performance.items():
-            avg = sum(grade_list) / len(grade_list)
+        for subject, stats in (summary.subject_grades or {}).items():
+            if not stats['count']:
+                continue
+            avg = stats['sum'] / stats['count']
             if avg >= 85:
                 strengths.append(f'أداء ممتاز في مادة {subject}')
             elif avg < 70:
                 weaknesses.append(f'يحتاج تحسين في مادة {subject}')
         
         # تحليل الحضور
-        if attendance_records:
-            present_days = len([a for a in attendance_records if a.status == 'present'])
-            attendance_rate = (present_days / len(attendance_records)) * 100
+        if summary.attendance_count:
+            attendance_rate = summary.attendance_percentage
             
             if attendance_rate >= 95:
                 strengths.append('انتظام ممتاز في الحضور')
@@ -533,13 +614,10 @@ class AIService:
                 weaknesses.append('يحتاج تحسين في الانتظام')
         
         # تحليل السلوك
-        if behavior_notes:
-            positive_notes = len([n for n in behavior_notes if n.note_type == 'positive'])
-            negative_notes = len([n for n in behavior_notes if n.note_type == 'negative'])
-            
-            if positive_notes > negative_notes:
+        if summary.behavior_count:
+            if summary.behavior_positive > summary.behavior_negative:
                 strengths.append('سلوك إيجابي ومشاركة فعالة')
-            elif negative_notes > positive_notes:
+            elif summary.behavior_negative > summary.behavior_positive:
                 weaknesses.append('يحتاج تحسين في السلوك')
         
         return {
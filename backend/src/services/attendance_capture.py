@@ -0,0 +1,175 @@
+"""
+تسجيل حضور الفصل دفعة واحدة
+Classroom attendance capture - a teacher submits one period's attendance for
+a whole classroom as compact (student_id, status) pairs. Membership is checked
+against one Enrollment query and every row is written by a single
+INSERT ... ON CONFLICT DO UPDATE (executemany), so resubmitting a period
+corrects it in place. Core statements bypass ORM events, so the dashboards of
+the affected students and the school stats are invalidated explicitly
+"""
+
+from datetime import datetime
+from sqlalchemy import select, exists, or_, true, delete, insert
+from sqlalchemy.dialects import sqlite, postgresql
+from src.models.user import db, Teacher
+from src.models.extended_models import Classroom, Course, Enrollment, AttendanceRecord
+from src.services.dashboard_cache import DashboardCache
+from src.services.school_stats import SchoolStatsService
+
+ATTENDANCE_STATUSES = ('present', 'absent', 'late', 'excused', 'sick')
+MAX_PERIOD_LENGTH = 20  # طول عمود period
+UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+# الأعمدة التي يستبدلها إعادة إرسال الحصة نفسها
+UPDATED_COLUMNS = ('classroom_id', 'course_id', 'status', 'notes', 'recorded_by', 'recorded_at')
+
+
+class AttendanceCaptureError(ValueError):
+    """طلب حضور غير صالح؛ status هو رمز استجابة HTTP المناسب"""
+
+    def __init__(self, message, status=400, details=None):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class AttendanceCaptureService:
+    """التحقق من طلب حضور الفصل وكتابته بعبارة واحدة"""
+
+    @staticmethod
+    def parse_records(records):
+        """
+        تحويل الأزواج [student_id, status] أو [student_id, status, notes]
+        (أو قواميس بنفس المفاتيح) إلى {student_id: (status, notes)}
+        """
+        if not isinstance(records, list):
+            raise AttendanceCaptureError('records يجب أن تكون قائمة من [student_id, status]')
+
+        parsed = {}
+        for record in records:
+            if isinstance(record, dict):
+                record = [record.get('student_id'), record.get('status'), record.get('notes')]
+            if not isinstance(record, (list, tuple)) or len(record) not in (2, 3):
+                raise AttendanceCaptureError(f'سجل حضور غير صالح: {record}')
+            student_id, status, notes = (*record, None)[:3]
+            if not isinstance(student_id, int) or isinstance(student_id, bool):
+                raise AttendanceCaptureError(f'رقم طالب غير صالح: {student_id}')
+            if status not in ATTENDANCE_STATUSES:
+                raise AttendanceCaptureError(
+                    f'حالة غير صالحة للطالب {student_id}: {status} (المسموح: {", ".join(ATTENDANCE_STATUSES)})'
+                )
+            if student_id in parsed:
+                raise AttendanceCaptureError(f'الطالب {student_id} مكرر في الطلب')
+            parsed[student_id] = (status, notes)
+        return parsed
+
+    @staticmethod
+    def check_teacher(teacher_id, classroom_id, course_id=None):
+        """المعلم مربي الفصل أو يدرّس فيه (والمادة إن حُددت من مواد الفصل) - استعلام واحد"""
+        teaches = exists().where(
+            Course.classroom_id == classroom_id, Course.teacher_id == teacher_id, Course.is_active.is_(True)
+        )
+        course_in_classroom = exists().where(Course.id == course_id, Course.classroom_id == classroom_id)
+        row = db.session.execute(
+            select(
+                Classroom.id,
+                or_(Classroom.homeroom_teacher_id == teacher_id, teaches),
+                course_in_classroom if course_id is not None else true()
+            ).where(Classroom.id == classroom_id)
+        ).first()
+
+        if row is None:
+            raise AttendanceCaptureError('الفصل غير موجود', status=404)
+        if not row[1]:
+            raise AttendanceCaptureError('المعلم لا يدرّس هذا الفصل', status=403)
+        if not row[2]:
+            raise AttendanceCaptureError('المادة لا تتبع هذا الفصل')
+
+    @staticmethod
+    def enrolled_students(classroom_id):
+        """أرقام الطلاب المسجلين حالياً في الفصل (استعلام Enrollment الوحيد)"""
+        return set(db.session.execute(
+            select(Enrollment.student_id).where(
+                Enrollment.classroom_id == classroom_id, Enrollment.status == 'active'
+            )
+        ).scalars())
+
+    @staticmethod
+    def upsert(rows):
+        """كتابة الصفوف بعبارة INSERT ... ON CONFLICT واحدة (حذف ثم إدراج في قواعد أخرى)"""
+        # الجدول لا النموذج: إدراج ORM الجماعي يقسم الصفوف حسب القيم الفارغة إلى عدة عبارات
+        table = AttendanceRecord.__table__
+        dialect_insert = UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+        if dialect_insert is not None:
+            statement = dialect_insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=['student_id', 'attendance_date', 'period'],
+                set_={column: statement.excluded[column] for column in UPDATED_COLUMNS}
+            )
+            db.session.execute(statement, rows)
+            return
+
+        first = rows[0]
+        db.session.execute(delete(table).where(
+            table.c.student_id.in_([row['student_id'] for row in rows]),
+            table.c.attendance_date == first['attendance_date'],
+            table.c.period == first['period']
+        ))
+        db.session.execute(insert(table), rows)
+
+    @classmethod
+    def record_classroom(cls, user_id, classroom_id, attendance_date, period, records,
+                         default_status=None, course_id=None):
+        """
+        تسجيل حضور حصة لفصل كامل. الطلاب غير المذكورين يأخذون default_status إن حُددت
+        (مثلاً present مع إرسال الغائبين فقط). يرفع AttendanceCaptureError عند أي خطأ تحقق.
+        """
+        if not period or not isinstance(period, str) or len(period) > MAX_PERIOD_LENGTH:
+            raise AttendanceCaptureError('period مطلوب (مثل period_1)')
+        if default_status is not None and default_status not in ATTENDANCE_STATUSES:
+            raise AttendanceCaptureError(f'default_status غير صالحة: {default_status}')
+        entries = cls.parse_records(records)
+
+        teacher = Teacher.query.filter_by(user_id=user_id).first()
+        if not teacher:
+            raise AttendanceCaptureError('ملف المعلم غير موجود', status=404)
+        cls.check_teacher(teacher.id, classroom_id, course_id)
+
+        enrolled = cls.enrolled_students(classroom_id)
+        not_enrolled = sorted(set(entries) - enrolled)
+        if not_enrolled:
+            raise AttendanceCaptureError('طلاب غير مسجلين في الفصل', details={'student_ids': not_enrolled})
+        if default_status is not None:
+            for student_id in enrolled - set(entries):
+                entries[student_id] = (default_status, None)
+        if not entries:
+            raise AttendanceCaptureError('لا توجد سجلات حضور')
+
+        recorded_at = datetime.utcnow()
+        rows = [
+            {'classroom_id': classroom_id, 'student_id': student_id, 'course_id': course_id,
+             'attendance_date': attendance_date, 'period': period, 'status': status,
+             'notes': notes, 'recorded_by': teacher.id, 'recorded_at': recorded_at}
+            for student_id, (status, notes) in sorted(entries.items())
+        ]
+        try:
+            cls.upsert(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        DashboardCache.invalidate(entries)
+        SchoolStatsService.invalidate()
+
+        counts = dict.fromkeys(ATTENDANCE_STATUSES, 0)
+        for status, _ in entries.values():
+            counts[status] += 1
+        return {
+            'success': True,
+            'classroom_id': classroom_id,
+            'attendance_date': attendance_date.isoformat(),
+            'period': period,
+            'recorded': len(rows),
+            'counts': counts,
+            'missing_students': sorted(enrolled - set(entries))
+        }
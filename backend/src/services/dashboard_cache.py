@@ -0,0 +1,241 @@
+"""
+ذاكرة مؤقتة لاستجابات لوحات التحكم
+Dashboard response cache - serialized dashboard responses are stored in Redis
+(or, when DASHBOARD_CACHE_BACKEND=memory, an in-process LRU that is only
+correct with a single worker process: other workers never see its
+invalidations) under keys
+that embed a version number for every student they cover. Writes to a
+student's grades, attendance, behavior notes, tuition or AI insights bump that
+student's version when the session commits, so stale entries are never read
+again and simply expire
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from src.models.user import Grade, Attendance, BehaviorNote, Tuition, AIInsight
+from src.models.extended_models import StudentGrade, AttendanceRecord
+from src.models.student_dashboard import AssignmentSubmission
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+CACHE_HEADER = 'X-Cache'
+KEY_PREFIX = 'dashboard'
+VERSION_TTL = 7 * 24 * 60 * 60  # ثانية؛ أطول بكثير من عمر أي استجابة محفوظة
+INVALIDATING_MODELS = (
+    Grade, Attendance, BehaviorNote, StudentGrade, AttendanceRecord, Tuition, AIInsight, AssignmentSubmission
+)
+
+
+def _version_key(student_id):
+    return f'{KEY_PREFIX}:version:{student_id}'
+
+
+class LRUCacheBackend:
+    """ذاكرة داخل العملية بحد أقصى للعناصر وانتهاء صلاحية لكل عنصر"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, student_ids):
+        with self._lock:
+            return [self._versions.get(student_id, 0) for student_id in student_ids]
+
+    def bump(self, student_ids):
+        with self._lock:
+            for student_id in student_ids:
+                self._versions[student_id] = self._versions.get(student_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisCacheBackend:
+    """ذاكرة مشتركة بين العمليات عبر Redis"""
+
+    name = 'redis'
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client.ping()
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+    def versions(self, student_ids):
+        values = self.client.mget([_version_key(student_id) for student_id in student_ids])
+        return [int(value or 0) for value in values]
+
+    def bump(self, student_ids):
+        pipeline = self.client.pipeline(transaction=False)
+        for student_id in student_ids:
+            pipeline.incr(_version_key(student_id))
+            pipeline.expire(_version_key(student_id), VERSION_TTL)
+        pipeline.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f'{KEY_PREFIX}:*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class DashboardCache:
+    """واجهة الذاكرة المؤقتة؛ أي خطأ في الخلفية يُعامل كعدم وجود العنصر ولا يُفشل الطلب"""
+
+    @staticmethod
+    def backend():
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('dashboard_cache')
+
+    @classmethod
+    def key(cls, view, student_ids, *variant):
+        """مفتاح يتضمن رقم إصدار كل طالب تغطيه الاستجابة"""
+        backend = cls.backend()
+        if backend is None:
+            return None
+        student_ids = sorted(set(student_ids))
+        try:
+            versions = backend.versions(student_ids)
+        except Exception as e:
+            current_app.logger.warning(f'Dashboard cache unavailable: {e}')
+            return None
+        students = ','.join(f'{student_id}.{version}' for student_id, version in zip(student_ids, versions))
+        parts = ':'.join(str(part) for part in variant)
+        return f'{KEY_PREFIX}:{view}:{parts}:{students}'
+
+    @classmethod
+    def get(cls, key):
+        backend = cls.backend()
+        if backend is None or key is None:
+            return None
+        try:
+            return backend.get(key)
+        except Exception as e:
+            current_app.logger.warning(f'Dashboard cache read failed: {e}')
+            return None
+
+    @classmethod
+    def set(cls, key, value, ttl=None):
+        backend = cls.backend()
+        if backend is None or key is None:
+            return
+        try:
+            backend.set(key, value, ttl or current_app.config.get('DASHBOARD_CACHE_TTL', 300))
+        except Exception as e:
+            current_app.logger.warning(f'Dashboard cache write failed: {e}')
+
+    @classmethod
+    def invalidate(cls, student_ids):
+        """إبطال لوحات طلاب محددين (مثلاً بعد إدراج جماعي لا يطلق أحداث ORM)"""
+        backend = cls.backend()
+        student_ids = sorted(set(student_ids))
+        if backend is None or not student_ids:
+            return
+        try:
+            backend.bump(student_ids)
+        except Exception as e:
+            current_app.logger.warning(f'Dashboard cache invalidation failed: {e}')
+
+
+def cached_dashboard(view, student_ids, build, *variant, ttl=None):
+    """
+    إرجاع الاستجابة المحفوظة أو بناؤها بـ build() وحفظها.
+    build تُرجع قاموس الاستجابة (حالة 200)؛ يُحفظ النص المسلسل فلا يعاد تسلسله عند الإصابة.
+    """
+    key = DashboardCache.key(view, student_ids, *variant)
+    body = DashboardCache.get(key)
+    status = 'HIT'
+    if body is None:
+        body = current_app.json.dumps(build())
+        DashboardCache.set(key, body, ttl)
+        status = 'MISS' if key else 'BYPASS'
+
+    response = current_app.response_class(body, mimetype='application/json')
+    response.headers[CACHE_HEADER] = status
+    return response
+
+
+def init_dashboard_cache(app):
+    """
+    Redis افتراضياً؛ ذاكرة LRU داخل العملية فقط عند DASHBOARD_CACHE_BACKEND=memory
+    (عملية عامل واحدة). تعذر الاتصال بـ Redis يعطل الذاكرة المؤقتة بدلاً من
+    الرجوع إلى LRU تقدم فيه العمليات الأخرى بيانات قديمة
+    """
+    if not app.config.get('DASHBOARD_CACHE_ENABLED'):
+        return None
+
+    if app.config.get('DASHBOARD_CACHE_BACKEND', 'redis') == 'memory':
+        backend = LRUCacheBackend(app.config.get('DASHBOARD_CACHE_MAX_ENTRIES', 2048))
+    else:
+        url = app.config.get('DASHBOARD_CACHE_REDIS_URL')
+        if not url:
+            app.logger.warning('Dashboard cache disabled: no DASHBOARD_CACHE_REDIS_URL/REDIS_URL')
+            return None
+        if redis is None:
+            app.logger.warning('Dashboard cache disabled: redis package not installed')
+            return None
+        try:
+            backend = RedisCacheBackend(url)
+        except Exception as e:
+            app.logger.warning(f'Dashboard cache disabled: Redis unavailable ({e})')
+            return None
+
+    app.extensions['dashboard_cache'] = backend
+    app.logger.info(f'Dashboard cache enabled ({backend.name})')
+    return backend
+
+
+def _mark_student_changed(mapper, connection, target):
+    """تسجيل الطالب الذي تغيرت بياناته ليُبطل بعد تأكيد المعاملة"""
+    session = object_session(target)
+    if session is not None and target.student_id is not None:
+        session.info.setdefault('dashboard_cache_dirty_students', set()).add(target.student_id)
+
+
+def _invalidate_after_commit(session):
+    # بعد الـ commit لا قبله، حتى لا يعيد طلب متزامن حفظ البيانات القديمة بالإصدار الجديد
+    student_ids = session.info.pop('dashboard_cache_dirty_students', None)
+    if student_ids:
+        DashboardCache.invalidate(student_ids)
+
+
+for _model in INVALIDATING_MODELS:
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _mark_student_changed)
+event.listen(Session, 'after_commit', _invalidate_after_commit)
@@ -0,0 +1,172 @@
+"""
+خدمة تجميع بيانات لوحات التحكم
+Dashboard aggregation service - computes per-child statistics for many
+students in a fixed number of grouped queries
+"""
+
+from sqlalchemy import func
+from src.models.user import (
+    db, User, Student, ParentStudent, Grade, BehaviorNote, Tuition, AIInsight
+)
+from src.models.extended_models import StudentRiskScore
+from src.services.student_summary import StudentSummaryService
+
+
+class DashboardAggregationService:
+    """تجميع إحصائيات عدة طلاب باستعلامات مجمعة بدلاً من استعلام لكل طالب"""
+
+    @staticmethod
+    def get_parent_children(parent_id):
+        """جلب أبناء ولي الأمر مع بيانات المستخدم في استعلام واحد"""
+        return Student.query.options(
+            *Student.loader_options('summary')
+        ).join(
+            ParentStudent, ParentStudent.student_id == Student.id
+        ).filter(
+            ParentStudent.parent_id == parent_id
+        ).order_by(ParentStudent.id).all()
+
+    @staticmethod
+    def latest_per_student(model, order_column, student_ids, limit, *filters):
+        """آخر N سجل لكل طالب باستخدام ROW_NUMBER() OVER (PARTITION BY student_id)"""
+        if not student_ids:
+            return {}
+
+        row_number = func.row_number().over(
+            partition_by=model.student_id,
+            order_by=(order_column.desc(), model.id.desc())
+        ).label('row_number')
+
+        ranked = db.session.query(
+            model.id.label('id'), row_number
+        ).filter(
+            model.student_id.in_(student_ids), *filters
+        ).subquery()
+
+        records = model.query.join(
+            ranked, model.id == ranked.c.id
+        ).filter(
+            ranked.c.row_number <= limit
+        ).order_by(
+            model.student_id, ranked.c.row_number
+        ).all()
+
+        grouped = {student_id: [] for student_id in student_ids}
+        for record in records:
+            grouped[record.student_id].append(record)
+        return grouped
+
+    @classmethod
+    def build_children_overview(cls, students, recent_grades_limit=5,
+                                behavior_limit=3, insights_limit=3):
+        """بناء بيانات لوحة التحكم لجميع الأبناء بعدد ثابت من الاستعلامات"""
+        student_ids = [student.id for student in students]
+
+        summaries = StudentSummaryService.get_many(student_ids)
+        recent_grades = cls.latest_per_student(
+            Grade, Grade.date_recorded, student_ids, recent_grades_limit
+        )
+        recent_behavior = cls.latest_per_student(
+            BehaviorNote, BehaviorNote.date_recorded, student_ids, behavior_limit
+        )
+        latest_tuition = cls.latest_per_student(
+            Tuition, Tuition.created_at, student_ids, 1
+        )
+        ai_insights = cls.latest_per_student(
+            AIInsight, AIInsight.generated_at, student_ids, insights_limit,
+            AIInsight.is_active == True
+        )
+
+        children_data = []
+        for student in students:
+            summary = summaries[student.id]
+            tuition_records = latest_tuition.get(student.id, [])
+
+            children_data.append({
+                'student': student.to_dict(),
+                'recent_grades': [grade.to_dict() for grade in recent_grades.get(student.id, [])],
+                'average_grade': round(summary.grade_average, 2),
+                'attendance': {
+                    'total_days': summary.attendance_count,
+                    'present_days': summary.attendance_present,
+                    'percentage': round(summary.attendance_percentage, 2)
+                },
+                'recent_behavior': [note.to_dict() for note in recent_behavior.get(student.id, [])],
+                'tuition': tuition_records[0].to_dict() if tuition_records else None,
+                'ai_insights': [insight.to_dict() for insight in ai_insights.get(student.id, [])]
+            })
+
+        return children_data
+
+    @staticmethod
+    def class_insights(class_name, per_student=3, limit=20):
+        """
+        رؤى الصف الدراسي بثلاثة استعلامات مهما كان عدد الطلاب: العدادات،
+        وأحدث N رؤى لكل طالب مرتبة على مستوى الصف، وتوزيع المخاطر المحفوظ
+        """
+        total_students, students_with_insights = db.session.query(
+            func.count(func.distinct(Student.id)),
+            func.count(func.distinct(AIInsight.student_id))
+        ).select_from(Student).outerjoin(
+            AIInsight, (AIInsight.student_id == Student.id) & (AIInsight.is_active == True)
+        ).filter(
+            Student.class_name == class_name
+        ).one()
+
+        if not total_students:
+            return None
+
+        row_number = func.row_number().over(
+            partition_by=AIInsight.student_id,
+            order_by=(AIInsight.generated_at.desc(), AIInsight.id.desc())
+        ).label('row_number')
+
+        ranked = db.session.query(
+            AIInsight.id.label('id'), row_number
+        ).join(
+            Student, Student.id == AIInsight.student_id
+        ).filter(
+            Student.class_name == class_name,
+            AIInsight.is_active == True
+        ).subquery()
+
+        rows = db.session.query(
+            AIInsight, User.name, Student.student_id
+        ).join(
+            ranked, AIInsight.id == ranked.c.id
+        ).join(
+            Student, Student.id == AIInsight.student_id
+        ).join(
+            User, User.id == Student.user_id
+        ).filter(
+            ranked.c.row_number <= per_student
+        ).order_by(
+            AIInsight.generated_at.desc(), AIInsight.id.desc()
+        ).limit(limit).all()
+
+        recent_insights = []
+        for insight, student_name, student_number in rows:
+            insight_data = insight.to_dict()
+            insight_data['student_name'] = student_name
+            insight_data['student_id_display'] = student_number
+            recent_insights.append(insight_data)
+
+        # توزيع المخاطر من آخر فحص محلي (student_risk_scores)
+        risk_distribution = {'low': 0, 'medium': 0, 'high': 0}
+        risk_rows = db.session.query(
+            StudentRiskScore.risk_level, func.count(StudentRiskScore.id)
+        ).join(
+            Student, Student.id == StudentRiskScore.student_id
+        ).filter(
+            Student.class_name == class_name
+        ).group_by(StudentRiskScore.risk_level).all()
+        for risk_level, count in risk_rows:
+            risk_distribution[risk_level] = count
+
+        return {
+            'class_name': class_name,
+            'total_students': total_students,
+            'students_with_insights': students_with_insights,
+            'risk_distribution': risk_distribution,
+            'recent_insights': recent_insights
+        }
@@ -0,0 +1,331 @@
+"""
+خدمة استيراد ملفات Excel بشكل متدفق
+Streaming Excel import service - reads worksheets in read-only mode row by row
+and processes them in fixed-size chunks so memory stays bounded. Uploads are
+queued as ImportJob rows and processed on the background job thread pool;
+jobs that stop making progress are failed when their status is read
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from itertools import islice
+import openpyxl
+from flask import current_app
+from sqlalchemy import update, func
+from src import db
+from src.models.extended_models import ImportJob
+from src.services.ai_jobs import get_executor
+
+STUDENT_COLUMNS = [
+    'الاسم الكامل', 'رقم الهوية', 'تاريخ الميلاد', 'الصف', 'الشعبة',
+    'اسم ولي الأمر', 'رقم هاتف ولي الأمر', 'العنوان', 'الجنس', 'البناية'
+]
+
+CLASS_COLUMNS = [
+    'اسم الشعبة', 'الصف', 'النوع', 'المرحلة الدراسية',
+    'عدد الطلاب المتوقع', 'البناية', 'المعلم المسؤول'
+]
+
+ACTIVE_STATUSES = ('pending', 'processing')
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+PREVIEW_ROWS = 50
+
+
+def _text(values, index):
+    """قراءة قيمة خلية كنص منظف"""
+    value = values[index] if index < len(values) else None
+    return str(value if value is not None else '').strip()
+
+
+def parse_student_row(values, column_map, row_num):
+    """تحويل صف من ورقة الطلاب إلى قاموس، أو رفع ValueError برسالة الخطأ"""
+    name = _text(values, column_map['الاسم الكامل'])
+    student_id = _text(values, column_map['رقم الهوية'])
+
+    if not name or not student_id:
+        raise ValueError(f'الصف {row_num}: الاسم أو رقم الهوية مفقود')
+
+    # تحويل تاريخ الميلاد
+    birth_date = None
+    index = column_map['تاريخ الميلاد']
+    birth_cell = values[index] if index < len(values) else None
+    if birth_cell:
+        try:
+            if isinstance(birth_cell, str):
+                birth_date = datetime.strptime(birth_cell.strip(), '%d/%m/%Y').date()
+            elif hasattr(birth_cell, 'date'):
+                birth_date = birth_cell.date()
+            else:
+                birth_date = birth_cell
+        except (ValueError, TypeError):
+            raise ValueError(f'الصف {row_num}: تنسيق تاريخ الميلاد غير صحيح')
+
+    section = _text(values, column_map['الشعبة'])
+
+    return {
+        'name': name,
+        'student_id': student_id,
+        'birth_date': birth_date.isoformat() if birth_date else None,
+        'grade': _text(values, column_map['الصف']),
+        'section': section,
+        'parent_name': _text(values, column_map['اسم ولي الأمر']),
+        'parent_phone': _text(values, column_map['رقم هاتف ولي الأمر']),
+        'address': _text(values, column_map['العنوان']),
+        'gender': _text(values, column_map['الجنس']),
+        'building': _text(values, column_map['البناية']),
+        'is_french': 'فرنسي' in section.lower(),
+        'created_at': datetime.now().isoformat()
+    }
+
+
+def parse_class_row(values, column_map, row_num):
+    """تحويل صف من ورقة الشعب إلى قاموس، أو رفع ValueError برسالة الخطأ"""
+    name = _text(values, column_map['اسم الشعبة'])
+    grade = _text(values, column_map['الصف'])
+
+    if not name or not grade:
+        raise ValueError(f'الصف {row_num}: اسم الشعبة أو الصف مفقود')
+
+    class_type = _text(values, column_map['النوع'])
+    index = column_map['عدد الطلاب المتوقع']
+    expected_students = values[index] if index < len(values) else 0
+
+    try:
+        expected_students = int(expected_students or 0)
+    except (ValueError, TypeError):
+        expected_students = 0
+
+    return {
+        'name': name,
+        'grade': grade,
+        'type': class_type,
+        'stage': _text(values, column_map['المرحلة الدراسية']),
+        'expected_students': expected_students,
+        'building': _text(values, column_map['البناية']),
+        'teacher': _text(values, column_map['المعلم المسؤول']),
+        'is_french': 'فرنسي' in class_type.lower(),
+        'created_at': datetime.now().isoformat()
+    }
+
+
+IMPORT_TYPES = {
+    'students': (STUDENT_COLUMNS, parse_student_row),
+    'classes': (CLASS_COLUMNS, parse_class_row)
+}
+
+
+class ExcelImportService:
+    """استيراد ملفات Excel على دفعات مع حفظ التقدم بعد كل دفعة"""
+
+    @staticmethod
+    def iter_row_chunks(rows, chunk_size, first_row_num=2):
+        """تقسيم صفوف الورقة إلى دفعات من (رقم الصف، القيم)"""
+        numbered = enumerate(rows, start=first_row_num)
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def read_headers(worksheet):
+        """قراءة الصف الأول كأسماء أعمدة"""
+        header_row = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        return [str(value).strip() if value else '' for value in header_row]
+
+    @classmethod
+    def open_workbook(cls, file, upload_type):
+        """
+        فتح الملف للقراءة المتدفقة والتحقق من الأعمدة المطلوبة.
+        يُرجع (workbook, column_map) أو يرفع ValueError برسالة الخطأ.
+        """
+        if upload_type not in IMPORT_TYPES:
+            raise ValueError('نوع الرفع غير صحيح')
+
+        try:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f'خطأ في قراءة ملف Excel: {str(e)}')
+
+        required_columns = IMPORT_TYPES[upload_type][0]
+        headers = cls.read_headers(workbook.active)
+        missing_columns = [col for col in required_columns if col not in headers]
+        if missing_columns:
+            workbook.close()
+            raise ValueError(f'الأعمدة التالية مفقودة: {", ".join(missing_columns)}')
+
+        return workbook, {header: i for i, header in enumerate(headers) if header in required_columns}
+
+    @staticmethod
+    def create_job(workbook, upload_type, filename=None, created_by=None, status='processing'):
+        """إنشاء سجل مهمة الاستيراد (عدد الصفوف تقديري من أبعاد الورقة)"""
+        max_row = workbook.active.max_row
+        job = ImportJob(
+            import_type=upload_type,
+            filename=filename,
+            status=status,
+            total_rows=(max_row - 1) if max_row else None,
+            processed_rows=0,
+            success_count=0,
+            error_count=0,
+            created_by=created_by
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    @classmethod
+    def process(cls, job, workbook, column_map, chunk_handler=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        معالجة صفوف الورقة على دفعات وحفظ تقدم المهمة بعد كل دفعة.
+
+        chunk_handler(rows) يستقبل الصفوف الصحيحة لكل دفعة ويعيد (عدد الصفوف المحفوظة،
+        قائمة برسائل الأخطاء)؛ بدونه تُحسب كل الصفوف الصحيحة ناجحة.
+        """
+        parse_row = IMPORT_TYPES[job.import_type][1]
+        errors = []
+        preview = []
+        rows = workbook.active.iter_rows(min_row=2, values_only=True)
+
+        try:
+            for chunk in cls.iter_row_chunks(rows, chunk_size):
+                valid_rows = []
+                parse_errors = []
+                for row_num, values in chunk:
+                    # تجاهل الصفوف الفارغة تماماً
+                    if not any(value is not None and str(value).strip() for value in values):
+                        continue
+                    try:
+                        valid_rows.append(parse_row(values, column_map, row_num))
+                    except ValueError as e:
+                        parse_errors.append(str(e))
+                    except Exception as e:
+                        parse_errors.append(f'الصف {row_num}: خطأ في معالجة البيانات - {str(e)}')
+
+                saved, handler_errors = len(valid_rows), []
+                if chunk_handler and valid_rows:
+                    saved, handler_errors = chunk_handler(valid_rows)
+                chunk_errors = parse_errors + list(handler_errors or [])
+
+                if len(preview) < PREVIEW_ROWS and valid_rows:
+                    preview.extend(valid_rows[:PREVIEW_ROWS - len(preview)])
+                    job.preview_json = json.dumps(preview, ensure_ascii=False)
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+                # حفظ التقدم بعد كل دفعة ليتمكن العميل من متابعته
+                job.processed_rows += len(chunk)
+                job.error_count += len(chunk_errors)
+                job.success_count += saved
+                job.errors_json = json.dumps(errors, ensure_ascii=False)
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            return {'success': False, 'error': f'خطأ في معالجة الملف: {str(e)}', 'job': job.to_dict()}
+
+        job.status = 'completed'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+        return {
+            'success': True,
+            'job': job.to_dict(),
+            'preview': preview,
+            'errors': errors
+        }
+
+    @classmethod
+    def run(cls, file, upload_type, chunk_handler=None, chunk_size=DEFAULT_CHUNK_SIZE,
+            filename=None, created_by=None):
+        """تشغيل الاستيراد المتدفق في نفس الخيط (سكربتات سطر الأوامر والقياس)"""
+        try:
+            workbook, column_map = cls.open_workbook(file, upload_type)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+
+        try:
+            job = cls.create_job(workbook, upload_type, filename=filename, created_by=created_by)
+            return cls.process(job, workbook, column_map, chunk_handler, chunk_size)
+        finally:
+            workbook.close()
+
+    @classmethod
+    def submit(cls, file, upload_type, chunk_handler=None, chunk_size=DEFAULT_CHUNK_SIZE,
+               filename=None, created_by=None):
+        """
+        حفظ الملف المرفوع مؤقتاً وإنشاء مهمة استيراد معلقة، ثم معالجتها على مجموعة خيوط
+        مهام الخلفية. تُرجع المهمة فوراً ليتابع العميل تقدمها عبر /api/import-jobs/<id>.
+        """
+        if upload_type not in IMPORT_TYPES:
+            return {'success': False, 'error': 'نوع الرفع غير صحيح'}
+
+        app = current_app._get_current_object()
+        upload_folder = app.config.get('UPLOAD_FOLDER') or tempfile.gettempdir()
+        os.makedirs(upload_folder, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(prefix='import-', suffix='.xlsx', dir=upload_folder)
+        with os.fdopen(descriptor, 'wb') as output:
+            shutil.copyfileobj(file, output)
+
+        try:
+            workbook, _ = cls.open_workbook(path, upload_type)
+            try:
+                job = cls.create_job(workbook, upload_type, filename=filename, created_by=created_by,
+                                     status='pending')
+            finally:
+                workbook.close()
+        except Exception as e:
+            db.session.rollback()
+            os.remove(path)
+            return {'success': False, 'error': str(e)}
+
+        # الملف على قرص هذه العملية، لذا تُنفذ المهمة على خيوطها حتى مع AI_JOB_BACKEND=celery
+        get_executor(app.config.get('AI_JOB_WORKERS', 2)).submit(
+            cls._process_file, app, job.id, path, chunk_handler, chunk_size
+        )
+        return {'success': True, 'job': job.to_dict()}
+
+    @staticmethod
+    def expire_stale(timeout):
+        """تحويل المهام المعلقة أو قيد المعالجة دون تقدم منذ أكثر من timeout ثانية إلى failed"""
+        if not timeout:
+            return 0
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(ImportJob).where(
+                ImportJob.status.in_(ACTIVE_STATUSES),
+                func.coalesce(ImportJob.updated_at, ImportJob.created_at) < now - timedelta(seconds=timeout)
+            ).values(status='failed', finished_at=now)
+        )
+        return result.rowcount
+
+    @classmethod
+    def _process_file(cls, app, job_id, path, chunk_handler, chunk_size):
+        """تنفيذ مهمة استيراد معلقة في خيط الخلفية ثم حذف الملف المؤقت"""
+        with app.app_context():
+            try:
+                job = db.session.get(ImportJob, job_id)
+                workbook, column_map = cls.open_workbook(path, job.import_type)
+                try:
+                    job.status = 'processing'
+                    db.session.commit()
+                    cls.process(job, workbook, column_map, chunk_handler, chunk_size)
+                finally:
+                    workbook.close()
+            except Exception as e:
+                app.logger.error(f'Excel import job {job_id} failed: {e}')
+                db.session.rollback()
+                db.session.execute(
+                    update(ImportJob).where(ImportJob.id == job_id)
+                    .values(status='failed', finished_at=datetime.utcnow())
+                )
+                db.session.commit()
+            finally:
+                db.session.remove()
+                os.remove(path)
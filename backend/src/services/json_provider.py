@@ -0,0 +1,92 @@
+"""
+مزود JSON سريع للتطبيق
+Fast JSON provider - jsonify, request.get_json and the dashboard cache go
+through app.json; this replaces Flask's stdlib provider with an orjson-backed
+one that serializes datetimes, dates, times and UUIDs natively and writes
+Arabic text as UTF-8 instead of \\uXXXX escapes. Without orjson (or with
+JSON_PROVIDER=stdlib) a stdlib provider with the same output conventions is
+used
+"""
+
+import decimal
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_PROVIDERS = ('orjson', 'stdlib')
+
+
+def _default(o):
+    """الأنواع التي لا يعرفها المرمز مباشرة (نفس تحويلات Flask لها)"""
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    return DefaultJSONProvider.default(o)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """مزود المكتبة القياسية: UTF-8 دون تهريب وتواريخ بصيغة ISO 8601 كما في orjson"""
+
+    ensure_ascii = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date, time)):
+            return o.isoformat()
+        return _default(o)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """مزود orjson؛ يعود إلى المكتبة القياسية للقيم التي يرفضها orjson (مثل الأعداد الأكبر من 64 بت)"""
+
+    options = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def _option(self, indent=None):
+        option = self.options
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=None):
+        """ترميز إلى bytes مباشرة دون المرور بنص وسيط"""
+        try:
+            return orjson.dumps(obj, default=_default, option=self._option(indent))
+        except TypeError:
+            kwargs = {'indent': indent} if indent else {'separators': (',', ':')}
+            return super().dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, kwargs.get('indent')).decode()
+
+    def loads(self, s, **kwargs):
+        # orjson.JSONDecodeError فرع من json.JSONDecodeError فيبقى سلوك get_json عند الخطأ كما هو
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """تثبيت مزود JSON المحدد في JSON_PROVIDER (orjson افتراضياً إن كان مثبتاً)"""
+    name = app.config.get('JSON_PROVIDER', 'orjson')
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f'Unknown JSON_PROVIDER: {name} (expected one of {", ".join(JSON_PROVIDERS)})')
+    if name == 'orjson' and orjson is None:
+        app.logger.warning('JSON provider: orjson not installed, using stdlib json')
+        name = 'stdlib'
+
+    app.json = OrjsonProvider(app) if name == 'orjson' else StdlibJSONProvider(app)
+    return app.json
@@ -0,0 +1,152 @@
+"""
+ترقيم الصفحات بالمؤشر
+Keyset (cursor) pagination - a page is fetched with
+WHERE (sort key) > (last key of the previous page) ORDER BY sort key LIMIT n,
+so page 500 is the same index seek as page 1 instead of an OFFSET scan over
+every earlier row. Cursors are opaque base64url tokens; totals are optional
+and can be served from a short-lived per-filter cache or a planner estimate
+"""
+
+import json
+import time
+import base64
+import binascii
+import threading
+from datetime import datetime
+from sqlalchemy import tuple_, text
+from src.models.user import db
+
+MAX_PAGE_SIZE = 500
+MAX_CACHED_TOTALS = 1024
+TOTAL_MODES = ('none', 'exact', 'cached', 'estimate')
+
+
+class InvalidCursor(ValueError):
+    """مؤشر تالف أو صادر لترتيب مختلف"""
+
+
+class KeysetPaginator:
+    """ترقيم بترتيب ثابت على أعمدة تنتهي بمفتاح فريد (مثل (role, id))"""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+
+    def order_by(self, query):
+        return query.order_by(*self.columns)
+
+    def encode_cursor(self, row):
+        """مؤشر يحمل اسم الترتيب وقيم مفتاحه لآخر صف في الصفحة"""
+        values = []
+        for column in self.columns:
+            value = getattr(row, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        payload = json.dumps([self.name, values], separators=(',', ':'), ensure_ascii=False)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            name, values = json.loads(payload)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise InvalidCursor('مؤشر الصفحة غير صالح')
+        if name != self.name or not isinstance(values, list) or len(values) != len(self.columns):
+            raise InvalidCursor('مؤشر الصفحة لا يطابق الترتيب المطلوب')
+
+        decoded = []
+        for column, value in zip(self.columns, values):
+            if value is None:
+                raise InvalidCursor('مؤشر الصفحة غير صالح')
+            try:
+                if column.type.python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif not isinstance(value, column.type.python_type):
+                    raise TypeError(value)
+            except (TypeError, ValueError):
+                raise InvalidCursor('مؤشر الصفحة غير صالح')
+            decoded.append(value)
+        return decoded
+
+    def page(self, query, per_page, cursor=None):
+        """صفحة بعد المؤشر: (العناصر، مؤشر الصفحة التالية أو None)"""
+        per_page = max(min(per_page, MAX_PAGE_SIZE), 1)
+        if not cursor:
+            items = self.order_by(query).limit(per_page + 1).all()
+        elif query.session.get_bind().dialect.name == 'postgresql':
+            # PostgreSQL يبحث في الفهرس مباشرة بمقارنة الصفوف (row values)
+            values = self.decode_cursor(cursor)
+            items = self.order_by(
+                query.filter(tuple_(*self.columns) > tuple_(*values))
+            ).limit(per_page + 1).all()
+        else:
+            items = self._seek(query, self.decode_cursor(cursor), per_page + 1)
+        has_more = len(items) > per_page
+        items = items[:per_page]
+        return items, self.encode_cursor(items[-1]) if has_more else None
+
+    def _seek(self, query, values, limit):
+        """
+        (a, b) > (x, y) مفككة إلى (a = x AND b > y) ثم (a > x): SQLite لا يستخدم
+        إلا العمود الأول من الفهرس مع مقارنة الصفوف فيفحص كل صفوف a = x السابقة.
+        كل جزء بحث مستقل في الفهرس، ويتوقف التنفيذ عند اكتمال الصفحة.
+        """
+        items = []
+        for depth in range(len(self.columns) - 1, -1, -1):
+            criteria = [column == value for column, value in zip(self.columns[:depth], values[:depth])]
+            criteria.append(self.columns[depth] > values[depth])
+            items.extend(self.order_by(query.filter(*criteria)).limit(limit - len(items)).all())
+            if len(items) >= limit:
+                break
+        return items
+
+
+class TotalCounter:
+    """إجماليات اختيارية: دقيقة، أو محفوظة لكل مرشح لمدة قصيرة، أو تقدير المخطط (PostgreSQL)"""
+
+    _entries = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def count(cls, query, mode, key, ttl, table=None):
+        if mode == 'none':
+            return None
+        if mode == 'estimate' and table is not None:
+            estimate = cls.estimate(table)
+            if estimate is not None:
+                return estimate
+            mode = 'cached'
+        if mode == 'exact':
+            return cls._count(query)
+
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        total = cls._count(query)
+        with cls._lock:
+            if len(cls._entries) >= MAX_CACHED_TOTALS:
+                cls._entries = {k: v for k, v in cls._entries.items() if v[0] > now}
+                if len(cls._entries) >= MAX_CACHED_TOTALS:
+                    cls._entries.clear()
+            cls._entries[key] = (now + ttl, total)
+        return total
+
+    @staticmethod
+    def _count(query):
+        return query.order_by(None).count()
+
+    @staticmethod
+    def estimate(table):
+        """عدد صفوف الجدول كما يقدره مخطط PostgreSQL (لقوائم غير مصفاة فقط)"""
+        if db.engine.dialect.name != 'postgresql':
+            return None
+        estimate = db.session.execute(
+            text('SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)'), {'table': table}
+        ).scalar()
+        return int(estimate) if estimate is not None and estimate >= 0 else None
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
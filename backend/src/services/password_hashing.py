@@ -0,0 +1,104 @@
+"""
+خدمة تجزئة كلمات المرور
+Password hashing service - configurable hash cost profiles and batch hashing
+across a shared process pool for mass account creation, from any thread
+(request handlers, the Excel import executor, CLI and seed scripts)
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash
+
+# strong: إعداد werkzeug الافتراضي للإنتاج والتطوير، fast: للاختبارات ومولد البيانات فقط
+PASSWORD_HASH_PROFILES = {
+    'strong': 'scrypt',
+    'fast': 'pbkdf2:sha256:1000'
+}
+
+# أقل عدد من كلمات المرور يستحق تكلفة تشغيل عمليات إضافية
+MIN_PARALLEL_BATCH = 8
+
+
+def _setting(key, default):
+    """قراءة إعداد من التطبيق الحالي أو من متغيرات البيئة"""
+    if has_app_context() and key in current_app.config:
+        return current_app.config[key]
+    return os.environ.get(key, default)
+
+
+def hash_method():
+    """طريقة التجزئة حسب ملف التكلفة المحدد (أو اسم طريقة werkzeug مباشرة)"""
+    profile = _setting('PASSWORD_HASH_PROFILE', 'strong')
+    return PASSWORD_HASH_PROFILES.get(profile, profile)
+
+
+def hash_password(password):
+    """تجزئة كلمة مرور واحدة"""
+    return generate_password_hash(password, method=hash_method())
+
+
+def needs_rehash(password_hash):
+    """كلمة المرور مخزنة بملف fast بينما الملف الحالي أقوى (تُعاد تجزئتها عند الدخول)"""
+    fast = PASSWORD_HASH_PROFILES['fast']
+    return (password_hash or '').split('$', 1)[0] == fast and hash_method() != fast
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_start_method():
+    """
+    forkserver (أو spawn حيث لا يتوفر): العمليات لا تنسخ ذاكرة العامل متعدد الخيوط،
+    فلا ترث أقفالاً يحملها خيط آخر ولا اتصالات قاعدة البيانات
+    """
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def get_pool(workers):
+    """مجمع العمليات المشترك، يُنشأ مرة واحدة لكل عملية بعدد workers عند أول دفعة"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(pool_start_method())
+            )
+        return _pool
+
+
+def shutdown_pool():
+    """إيقاف مجمع العمليات (يُنشأ من جديد عند الدفعة التالية)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    تجزئة عدة كلمات مرور مع الحفاظ على الترتيب، موزعة على أنوية المعالج عبر
+    مجمع العمليات المشترك؛ الدفعات الصغيرة وتعطل المجمع تُجزأ في الخيط الحالي
+    """
+    passwords = list(passwords)
+    method = hash_method()
+    if workers is None:
+        workers = int(_setting('PASSWORD_HASH_WORKERS', 0)) or os.cpu_count() or 1
+    workers = min(workers, len(passwords))
+
+    if workers <= 1 or len(passwords) < MIN_PARALLEL_BATCH:
+        return [generate_password_hash(password, method=method) for password in passwords]
+
+    pool = get_pool(workers)
+    chunksize = max(len(passwords) // (workers * 4), 1)
+    try:
+        return list(pool.map(generate_password_hash, passwords, repeat(method), chunksize=chunksize))
+    except BrokenProcessPool:
+        # عملية فرعية ماتت: مجمع جديد للدفعة التالية، وهذه الدفعة في الخيط الحالي
+        shutdown_pool()
+        return [generate_password_hash(password, method=method) for password in passwords]
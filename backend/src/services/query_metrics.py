@@ -0,0 +1,154 @@
+"""
+قياس عدد استعلامات قاعدة البيانات وزمنها لكل طلب
+Query metrics - counts SQL statements and database time per request through
+SQLAlchemy engine events, reports them in response headers and the log, flags
+statements repeated inside one request (N+1) and enforces per-endpoint query
+budgets declared with @query_budget
+"""
+
+import time
+import threading
+from collections import Counter
+from functools import wraps
+from flask import current_app, g, request
+from sqlalchemy import event
+
+QUERY_COUNT_HEADER = 'X-DB-Query-Count'
+QUERY_TIME_HEADER = 'X-DB-Time-Ms'
+
+_active = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """تجاوز عدد الاستعلامات للحد المعلن"""
+
+
+class QueryCounter:
+    """
+    عداد استعلامات يعمل كسياق (with). العدادات المتداخلة تُحتسب كلها، وكل
+    عداد يرى فقط الاستعلامات المنفذة في خيطه.
+    """
+
+    def __init__(self, budget=None, label=None):
+        self.budget = budget
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __enter__(self):
+        if not hasattr(_active, 'counters'):
+            _active.counters = []
+        _active.counters.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _active.counters.remove(self)
+        if exc_type is None:
+            self.check_budget()
+        return False
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """الاستعلامات المتكررة بنفس النص (علامة على N+1)"""
+        return [(statement, times) for statement, times in self.statements.most_common() if times >= threshold]
+
+    def over_budget(self):
+        return self.budget is not None and self.count > self.budget
+
+    def check_budget(self):
+        if self.over_budget():
+            raise QueryBudgetExceeded(
+                f'{self.label or "block"} executed {self.count} queries (budget {self.budget})'
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_active, 'counters', None):
+        conn.info.setdefault('query_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counters = getattr(_active, 'counters', None)
+    started = conn.info.get('query_metrics_started')
+    if not counters or not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    for counter in counters:
+        counter.record(statement, duration)
+
+
+def instrument_engine(engine):
+    """تسجيل أحداث المحرك مرة واحدة"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def query_budget(max_queries):
+    """تحديد الحد الأقصى لاستعلامات المسار (يوضع مباشرة تحت @route)"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            return f(*args, **kwargs)
+        decorated_function.query_budget = max_queries
+        return decorated_function
+    return decorator
+
+
+def init_query_metrics(app, db):
+    """ربط القياس بالتطبيق: عداد لكل طلب وترويسات وسجل وفحص حد الاستعلامات"""
+    if not app.config.get('QUERY_METRICS_ENABLED', False):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    @app.before_request
+    def start_query_counter():
+        view = app.view_functions.get(request.endpoint)
+        counter = QueryCounter(budget=getattr(view, 'query_budget', None), label=request.endpoint)
+        g.query_counter = counter.__enter__()
+
+    @app.after_request
+    def report_query_metrics(response):
+        counter = g.pop('query_counter', None)
+        if counter is None:
+            return response
+        _active.counters.remove(counter)
+
+        response.headers[QUERY_COUNT_HEADER] = str(counter.count)
+        response.headers[QUERY_TIME_HEADER] = f'{counter.duration_ms:.1f}'
+
+        config = current_app.config
+        summary = f'{request.method} {request.path} -> {response.status_code}: ' \
+                  f'{counter.count} queries, {counter.duration_ms:.1f} ms DB'
+        if config.get('QUERY_METRICS_LOG'):
+            current_app.logger.info(summary)
+
+        for statement, times in counter.repeated(config.get('QUERY_REPEAT_THRESHOLD', 10)):
+            current_app.logger.warning(
+                f'Possible N+1 in {request.endpoint}: statement ran {times} times: {statement[:200]}'
+            )
+
+        if counter.over_budget():
+            current_app.logger.warning(f'Query budget exceeded ({counter.budget}): {summary}')
+            if config.get('QUERY_BUDGET_STRICT'):
+                counter.check_budget()
+        return response
+
+    @app.teardown_request
+    def discard_query_counter(exc):
+        # الطلبات التي انتهت باستثناء قبل after_request
+        counter = g.pop('query_counter', None)
+        if counter is not None and counter in getattr(_active, 'counters', []):
+            _active.counters.remove(counter)
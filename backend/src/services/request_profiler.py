@@ -0,0 +1,144 @@
+"""
+تحليل أداء الطلبات عند الطلب
+Opt-in request profiler - profiles requests whose path matches
+PROFILE_PATH_PATTERN, or admin requests that send the X-Profile header, and
+writes each profile to a rotating directory: collapsed stacks (.folded, for
+flamegraph.pl / speedscope) from a sampling profiler, or cProfile stats (.prof)
+"""
+
+import os
+import re
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from flask import g, request, session
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_FILE_HEADER = 'X-Profile-File'
+PROFILERS = ('sampling', 'cprofile')
+
+
+class StackSampler:
+    """عينات دورية من مكدس خيط الطلب تُجمع بصيغة collapsed stacks"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            for stack, count in self.samples.most_common():
+                output.write(f'{stack} {count}\n')
+
+
+class CProfileRecorder:
+    """cProfile لخيط الطلب مع حفظ النتائج بصيغة pstats"""
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def write(self, path):
+        self._profile.dump_stats(path)
+
+
+def _rotate(directory, keep):
+    """حذف أقدم الملفات عند تجاوز العدد المسموح"""
+    entries = sorted(
+        (entry for entry in os.scandir(directory) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in entries[:max(len(entries) - keep, 0)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def init_request_profiler(app):
+    """تسجيل خطافات التحليل فقط عند تفعيله، فلا كلفة على الطلبات في الوضع العادي"""
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+
+    profiler_type = app.config.get('PROFILER', 'sampling')
+    if profiler_type not in PROFILERS:
+        raise ValueError(f'Unknown PROFILER {profiler_type!r}, expected one of {PROFILERS}')
+
+    pattern = app.config.get('PROFILE_PATH_PATTERN')
+    path_pattern = re.compile(pattern) if pattern else None
+    directory = app.config.get('PROFILE_DIR') or os.path.join('logs', 'profiles')
+    keep = app.config.get('PROFILE_KEEP', 100)
+    interval = app.config.get('PROFILE_SAMPLE_INTERVAL', 0.005)
+    os.makedirs(directory, exist_ok=True)
+
+    def should_profile():
+        if path_pattern is not None and path_pattern.search(request.path):
+            return True
+        return bool(request.headers.get(PROFILE_HEADER)) and session.get('user_role') == 'admin'
+
+    @app.before_request
+    def start_profiler():
+        if not should_profile():
+            return
+        recorder = StackSampler(interval) if profiler_type == 'sampling' else CProfileRecorder()
+        g.request_profiler = (recorder, time.perf_counter())
+        recorder.start()
+
+    @app.after_request
+    def save_profile(response):
+        profiler = g.pop('request_profiler', None)
+        if profiler is None:
+            return response
+
+        recorder, started = profiler
+        recorder.stop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        extension = 'folded' if profiler_type == 'sampling' else 'prof'
+        filename = f'{datetime.utcnow():%Y%m%dT%H%M%S%f}_{request.method}_{slug}_{elapsed_ms:.0f}ms.{extension}'
+        try:
+            recorder.write(os.path.join(directory, filename))
+            _rotate(directory, keep)
+            response.headers[PROFILE_FILE_HEADER] = filename
+        except OSError as e:
+            app.logger.error(f'Error writing request profile: {e}')
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        # طلب انتهى باستثناء قبل after_request
+        profiler = g.pop('request_profiler', None)
+        if profiler is not None:
+            profiler[0].stop()
+
+    app.logger.info(f'Request profiling enabled ({profiler_type}) -> {directory}')
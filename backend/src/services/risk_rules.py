@@ -0,0 +1,22 @@
+"""
+قواعد تقييم المخاطر الأكاديمية
+Academic risk rules - the window, thresholds and weights shared by
+AIService (one student at a time) and RiskScoringService (vectorized over a
+class or school), so both engines always apply the same rules
+"""
+
+# السجلات المعتبرة: آخر 3 أشهر
+RISK_WINDOW_DAYS = 90
+
+# اتجاه الدرجات: متوسط آخر RECENT_GRADES درجات مقارنة بالأقدم بهامش GRADE_TREND_MARGIN
+RECENT_GRADES = 3
+GRADE_TREND_MARGIN = 5
+
+# نسبة الحضور الأدنى (%) ونسبة الملاحظات السلبية الأعلى (%)
+POOR_ATTENDANCE_RATE = 85
+BEHAVIOR_NEGATIVE_RATIO = 30
+
+# أوزان عوامل المخاطر وحدود المستويات
+RISK_WEIGHTS = {'academic_decline': 3, 'poor_attendance': 2, 'behavioral_issues': 2}
+HIGH_RISK_SCORE = 5
+MEDIUM_RISK_SCORE = 3
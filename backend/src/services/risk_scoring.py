@@ -0,0 +1,186 @@
+"""
+محرك تقييم المخاطر الأكاديمية المحلي
+Local risk scoring engine - applies the rules in risk_rules (shared with
+AIService._analyze_risk_factors/_determine_risk_level) to a whole class or
+school in one vectorized pass (pandas/NumPy) and stores the results in bulk,
+without any model calls
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, case, insert, delete
+from src.models.user import db, Student, Grade, Attendance, BehaviorNote
+from src.models.extended_models import StudentRiskScore
+from src.services.risk_rules import (
+    RISK_WINDOW_DAYS, RECENT_GRADES, GRADE_TREND_MARGIN, POOR_ATTENDANCE_RATE, BEHAVIOR_NEGATIVE_RATIO,
+    RISK_WEIGHTS, HIGH_RISK_SCORE, MEDIUM_RISK_SCORE
+)
+
+RISK_LEVELS = ('low', 'medium', 'high')
+ID_CHUNK = 900
+
+
+class RiskScoringService:
+    """تقييم مخاطر جميع طلاب صف أو مدرسة دفعة واحدة"""
+
+    @staticmethod
+    def _student_ids(class_name=None, student_ids=None):
+        query = db.session.query(Student.id)
+        if class_name:
+            query = query.filter(Student.class_name == class_name)
+        if student_ids is not None:
+            query = query.filter(Student.id.in_(student_ids))
+        return [student_id for (student_id,) in query.order_by(Student.id)]
+
+    @staticmethod
+    def _grade_trends(criteria, index):
+        """اتجاه الدرجات: متوسط آخر 3 درجات مقارنة بمتوسط الدرجات الأقدم"""
+        rows = db.session.query(
+            Grade.student_id, Grade.grade
+        ).filter(*criteria).order_by(Grade.student_id, Grade.date_recorded, Grade.id).all()
+
+        trends = pd.DataFrame(index=index)
+        trends['grade_trend'] = 'stable'
+        trends['academic_decline'] = False
+        if not rows:
+            return trends
+
+        grades = pd.DataFrame(rows, columns=['student_id', 'grade'])
+        by_student = grades.groupby('student_id')['grade']
+        is_recent = by_student.cumcount(ascending=False) < RECENT_GRADES
+
+        counts = by_student.size()
+        recent_avg = grades[is_recent].groupby('student_id')['grade'].mean()
+        older_avg = grades[~is_recent].groupby('student_id')['grade'].mean()
+        older_avg = older_avg.reindex(counts.index).fillna(recent_avg)
+
+        eligible = counts >= RECENT_GRADES
+        declining = eligible & (recent_avg < older_avg - GRADE_TREND_MARGIN)
+        improving = eligible & (recent_avg > older_avg + GRADE_TREND_MARGIN)
+
+        trend = pd.Series(
+            np.select([declining, improving], ['declining', 'improving'], 'stable'),
+            index=counts.index
+        )
+        trends['grade_trend'] = trend.reindex(index).fillna('stable')
+        trends['academic_decline'] = declining.reindex(index, fill_value=False).astype(bool)
+        return trends
+
+    @staticmethod
+    def _ratio_frame(model, status_column, flagged_value, criteria, index):
+        """عدد السجلات ونسبة الحالة المحددة لكل طالب (GROUP BY student_id)"""
+        rows = db.session.query(
+            model.student_id,
+            func.count(model.id),
+            func.sum(case((status_column == flagged_value, 1), else_=0))
+        ).filter(*criteria).group_by(model.student_id).all()
+
+        frame = pd.DataFrame(rows, columns=['student_id', 'total', 'matching'])
+        frame = frame.set_index('student_id').reindex(index, fill_value=0).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame['ratio'] = np.where(frame['total'] > 0, frame['matching'] / frame['total'] * 100, 0.0)
+        return frame
+
+    @classmethod
+    def score(cls, student_ids, as_of=None):
+        """حساب عوامل ومستوى المخاطر لقائمة طلاب وإرجاع DataFrame مفهرس برقم الطالب"""
+        index = pd.Index(student_ids, name='student_id')
+        if not student_ids:
+            return pd.DataFrame(index=index)
+
+        since = (as_of or datetime.utcnow()) - timedelta(days=RISK_WINDOW_DAYS)
+        frames = []
+        for start in range(0, len(student_ids), ID_CHUNK):
+            chunk = student_ids[start:start + ID_CHUNK]
+            chunk_index = pd.Index(chunk, name='student_id')
+
+            trends = cls._grade_trends(
+                [Grade.student_id.in_(chunk), Grade.date_recorded >= since], chunk_index
+            )
+            attendance = cls._ratio_frame(
+                Attendance, Attendance.status, 'present',
+                [Attendance.student_id.in_(chunk), Attendance.date >= since.date()], chunk_index
+            )
+            behavior = cls._ratio_frame(
+                BehaviorNote, BehaviorNote.note_type, 'negative',
+                [BehaviorNote.student_id.in_(chunk), BehaviorNote.date_recorded >= since], chunk_index
+            )
+
+            frame = trends.copy()
+            frame['attendance_rate'] = attendance['ratio']
+            frame['poor_attendance'] = (attendance['total'] > 0) & (attendance['ratio'] < POOR_ATTENDANCE_RATE)
+            frame['negative_behavior_ratio'] = behavior['ratio']
+            frame['behavioral_issues'] = (behavior['total'] > 0) & (behavior['ratio'] > BEHAVIOR_NEGATIVE_RATIO)
+            frames.append(frame)
+
+        scores = pd.concat(frames)
+        scores['risk_score'] = sum(
+            scores[factor].astype(int) * weight for factor, weight in RISK_WEIGHTS.items()
+        )
+        scores['risk_level'] = np.select(
+            [scores['risk_score'] >= HIGH_RISK_SCORE, scores['risk_score'] >= MEDIUM_RISK_SCORE],
+            ['high', 'medium'],
+            'low'
+        )
+        return scores
+
+    @staticmethod
+    def save(scores, scored_at=None):
+        """استبدال تقييمات الطلاب المحددين بإدراج جماعي واحد"""
+        if scores.empty:
+            return 0
+
+        scored_at = scored_at or datetime.utcnow()
+        records = [
+            {
+                'student_id': int(student_id),
+                'risk_score': int(row.risk_score),
+                'risk_level': row.risk_level,
+                'academic_decline': bool(row.academic_decline),
+                'poor_attendance': bool(row.poor_attendance),
+                'behavioral_issues': bool(row.behavioral_issues),
+                'grade_trend': row.grade_trend,
+                'attendance_rate': round(float(row.attendance_rate), 2),
+                'negative_behavior_ratio': round(float(row.negative_behavior_ratio), 2),
+                'scored_at': scored_at
+            }
+            for student_id, row in zip(scores.index, scores.itertuples(index=False))
+        ]
+
+        student_ids = [record['student_id'] for record in records]
+        for start in range(0, len(student_ids), ID_CHUNK):
+            db.session.execute(delete(StudentRiskScore).where(
+                StudentRiskScore.student_id.in_(student_ids[start:start + ID_CHUNK])
+            ))
+        db.session.execute(insert(StudentRiskScore), records)
+        db.session.commit()
+        return len(records)
+
+    @classmethod
+    def screen(cls, class_name=None, student_ids=None, flag_levels=('high',)):
+        """تقييم صف أو المدرسة كاملة وحفظ النتائج، مع قائمة الطلاب الذين يحتاجون متابعة"""
+        try:
+            ids = cls._student_ids(class_name, student_ids)
+            scores = cls.score(ids)
+            saved = cls.save(scores)
+
+            distribution = dict.fromkeys(RISK_LEVELS, 0)
+            if saved:
+                distribution.update({
+                    level: int(count) for level, count in scores['risk_level'].value_counts().items()
+                })
+            flagged = [int(sid) for sid in scores.index[scores['risk_level'].isin(flag_levels)]] if saved else []
+
+            return {
+                'success': True,
+                'scored_students': saved,
+                'risk_distribution': distribution,
+                'flagged_student_ids': flagged
+            }
+        except Exception as e:
+            db.session.rollback()
+            return {
+                'success': False,
+                'error': f'خطأ في تقييم المخاطر: {str(e)}'
+            }
@@ -0,0 +1,162 @@
+"""
+إحصائيات المدرسة للوحة المدير
+School statistics for the admin home page - user counts by role and active
+flag from one GROUP BY, students enrolled per classroom, today's attendance,
+unpublished grades and overdue tuition, served from the dashboard cache with
+a short TTL. Committed writes to any table the figures come from bump the
+school version, so the next request recomputes instead of waiting for expiry
+"""
+
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import event, func, select, inspect, and_, or_
+from sqlalchemy.orm import Session, object_session
+from src.models.user import db, User, Tuition
+from src.models.extended_models import Classroom, Enrollment, AttendanceRecord, StudentGrade
+from src.services.dashboard_cache import DashboardCache, cached_dashboard
+
+# نطاق نسخة الإحصائيات في الذاكرة المؤقتة (بجانب أرقام الطلاب في لوحاتهم)
+SCHOOL_SCOPE = 'school'
+ROLES = ('student', 'teacher', 'parent', 'admin')
+
+# الأعمدة التي تعتمد عليها الإحصائيات لكل نموذج؛ الإدراج والحذف يبطلان دائماً
+TRACKED_COLUMNS = {
+    User: ('role', 'is_active'),
+    Classroom: ('name', 'grade_level', 'section', 'capacity', 'is_active'),
+    Enrollment: ('classroom_id', 'student_id', 'status'),
+    AttendanceRecord: ('student_id', 'attendance_date', 'status'),
+    StudentGrade: ('is_published',),
+    Tuition: ('total_amount', 'paid_amount', 'due_date', 'status'),
+}
+
+
+class SchoolStatsService:
+    """حساب إحصائيات المدرسة بعدد ثابت من الاستعلامات التجميعية"""
+
+    @staticmethod
+    def user_counts():
+        """أعداد المستخدمين لكل دور وحالة تفعيل في استعلام GROUP BY واحد"""
+        rows = db.session.query(User.role, User.is_active, func.count(User.id)).group_by(
+            User.role, User.is_active
+        ).all()
+
+        stats = {'total_users': 0, 'active_users': 0, **{f'{role}s': 0 for role in ROLES}}
+        by_role = {role: {'total': 0, 'active': 0} for role in ROLES}
+        for role, is_active, count in rows:
+            stats['total_users'] += count
+            role_counts = by_role.setdefault(role, {'total': 0, 'active': 0})
+            role_counts['total'] += count
+            if is_active:
+                stats['active_users'] += count
+                role_counts['active'] += count
+            if role in ROLES:
+                stats[f'{role}s'] += count
+        stats['by_role'] = by_role
+        return stats
+
+    @staticmethod
+    def enrollment_by_classroom():
+        """عدد الطلاب المسجلين حالياً في كل فصل نشط"""
+        enrolled = func.count(Enrollment.id)
+        rows = db.session.query(
+            Classroom.id, Classroom.name, Classroom.grade_level, Classroom.section, Classroom.capacity, enrolled
+        ).outerjoin(
+            Enrollment, and_(Enrollment.classroom_id == Classroom.id, Enrollment.status == 'active')
+        ).filter(Classroom.is_active.is_(True)).group_by(Classroom.id).order_by(
+            Classroom.grade_level, Classroom.name
+        ).all()
+
+        return [
+            {'classroom_id': classroom_id, 'name': name, 'grade_level': grade_level, 'section': section,
+             'capacity': capacity, 'enrolled': count}
+            for classroom_id, name, grade_level, section, capacity, count in rows
+        ]
+
+    @staticmethod
+    def attendance_today(today):
+        """عدد السجلات والطلاب لكل حالة حضور لليوم"""
+        rows = db.session.query(
+            AttendanceRecord.status,
+            func.count(AttendanceRecord.id),
+            func.count(AttendanceRecord.student_id.distinct())
+        ).filter(AttendanceRecord.attendance_date == today).group_by(AttendanceRecord.status).all()
+
+        by_status = {status: {'records': records, 'students': students} for status, records, students in rows}
+        return {
+            'date': today.isoformat(),
+            'records': sum(counts['records'] for counts in by_status.values()),
+            'by_status': by_status
+        }
+
+    @staticmethod
+    def pending_counts(today):
+        """الدرجات غير المنشورة والأقساط المتأخرة في استعلام واحد من استعلامات فرعية"""
+        outstanding = Tuition.total_amount - func.coalesce(Tuition.paid_amount, 0)
+        overdue = and_(Tuition.due_date < today, outstanding > 0)
+        row = db.session.execute(select(
+            select(func.count(StudentGrade.id)).where(
+                or_(StudentGrade.is_published.is_(False), StudentGrade.is_published.is_(None))
+            ).scalar_subquery(),
+            select(func.count(Tuition.id)).where(overdue).scalar_subquery(),
+            select(func.coalesce(func.sum(outstanding), 0)).where(overdue).scalar_subquery(),
+            select(func.count(Tuition.student_id.distinct())).where(overdue).scalar_subquery(),
+        )).one()
+
+        unpublished_grades, overdue_count, overdue_amount, overdue_students = row
+        return {
+            'unpublished_grades': unpublished_grades,
+            'overdue_tuition': {
+                'count': overdue_count,
+                'students': overdue_students,
+                'outstanding_amount': round(float(overdue_amount), 2)
+            }
+        }
+
+    @classmethod
+    def compute(cls, today=None):
+        """الإحصائيات كاملة (أربعة استعلامات بغض النظر عن حجم المدرسة)"""
+        today = today or date.today()
+        stats = cls.user_counts()
+        stats.update(cls.pending_counts(today))
+        stats['attendance_today'] = cls.attendance_today(today)
+        stats['classrooms'] = cls.enrollment_by_classroom()
+        stats['generated_at'] = datetime.utcnow().isoformat()
+        return stats
+
+    @staticmethod
+    def invalidate():
+        """إبطال الإحصائيات المحفوظة (بعد كتابات Core لا تطلق أحداث ORM)"""
+        DashboardCache.invalidate([SCHOOL_SCOPE])
+
+
+def cached_school_stats():
+    """استجابة الإحصائيات من الذاكرة المؤقتة أو محسوبة؛ التاريخ جزء من المفتاح لأجل حضور اليوم"""
+    today = date.today()
+    return cached_dashboard(
+        'school_stats', [SCHOOL_SCOPE], lambda: SchoolStatsService.compute(today), today.isoformat(),
+        ttl=current_app.config.get('SCHOOL_STATS_TTL', 30)
+    )
+
+
+def _mark_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['school_stats_dirty'] = True
+
+
+def _mark_if_tracked_changed(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in TRACKED_COLUMNS[mapper.class_]):
+        _mark_changed(mapper, connection, target)
+
+
+def _invalidate_after_commit(session):
+    if session.info.pop('school_stats_dirty', False):
+        SchoolStatsService.invalidate()
+
+
+for _model in TRACKED_COLUMNS:
+    event.listen(_model, 'after_insert', _mark_changed)
+    event.listen(_model, 'after_update', _mark_if_tracked_changed)
+    event.listen(_model, 'after_delete', _mark_changed)
+event.listen(Session, 'after_commit', _invalidate_after_commit)
@@ -0,0 +1,125 @@
+"""
+خدمة إحصائيات الطالب المحسوبة في قاعدة البيانات
+Student statistics service - status counts and grade aggregates computed with
+GROUP BY instead of hydrating every row
+"""
+
+from sqlalchemy import func
+from src.models.user import db, Grade, Attendance
+
+ATTENDANCE_STATUSES = ('present', 'absent', 'late', 'excused')
+
+
+class StudentStatisticsService:
+    """حساب إحصائيات الدرجات والحضور عبر استعلامات تجميعية"""
+
+    @staticmethod
+    def grade_filters(student_id, subject=None, semester=None, grade_type=None):
+        """شروط تصفية الدرجات المشتركة بين القائمة والإحصائيات"""
+        criteria = [Grade.student_id == student_id]
+        if subject:
+            criteria.append(Grade.subject == subject)
+        if semester:
+            criteria.append(Grade.semester == semester)
+        if grade_type:
+            criteria.append(Grade.grade_type == grade_type)
+        return criteria
+
+    @staticmethod
+    def attendance_filters(student_id, start_date=None, end_date=None):
+        """شروط تصفية الحضور المشتركة بين القائمة والإحصائيات"""
+        criteria = [Attendance.student_id == student_id]
+        if start_date:
+            criteria.append(Attendance.date >= start_date)
+        if end_date:
+            criteria.append(Attendance.date <= end_date)
+        return criteria
+
+    @staticmethod
+    def subject_statistics(criteria):
+        """المتوسط والحد الأدنى والأعلى وعدد الدرجات لكل مادة وللمجموع"""
+        rows = db.session.query(
+            Grade.subject,
+            func.count(Grade.id),
+            func.sum(Grade.grade),
+            func.min(Grade.grade),
+            func.max(Grade.grade)
+        ).filter(*criteria).group_by(Grade.subject).all()
+
+        subjects = {}
+        total_count = 0
+        total_sum = 0
+        overall_min = None
+        overall_max = None
+        for subject, count, grade_sum, grade_min, grade_max in rows:
+            subjects[subject] = {
+                'average': round(grade_sum / count, 2) if count else 0,
+                'count': count,
+                'minimum': grade_min,
+                'maximum': grade_max
+            }
+            total_count += count
+            total_sum += grade_sum or 0
+            overall_min = grade_min if overall_min is None else min(overall_min, grade_min)
+            overall_max = grade_max if overall_max is None else max(overall_max, grade_max)
+
+        overall = {
+            'average': round(total_sum / total_count, 2) if total_count else 0,
+            'maximum': overall_max if overall_max is not None else 0,
+            'minimum': overall_min if overall_min is not None else 0,
+            'total_count': total_count
+        }
+        return overall, subjects
+
+    @staticmethod
+    def latest_grade_per_subject(criteria):
+        """آخر درجة مسجلة في كل مادة باستخدام ROW_NUMBER()"""
+        row_number = func.row_number().over(
+            partition_by=Grade.subject,
+            order_by=(Grade.date_recorded.desc(), Grade.id.desc())
+        ).label('row_number')
+
+        ranked = db.session.query(
+            Grade.subject.label('subject'), Grade.grade.label('grade'), row_number
+        ).filter(*criteria).subquery()
+
+        rows = db.session.query(ranked.c.subject, ranked.c.grade).filter(
+            ranked.c.row_number == 1
+        ).all()
+        return {subject: grade for subject, grade in rows}
+
+    @staticmethod
+    def attendance_counts(criteria):
+        """عدد سجلات الحضور لكل حالة (GROUP BY status)"""
+        rows = db.session.query(
+            Attendance.status, func.count(Attendance.id)
+        ).filter(*criteria).group_by(Attendance.status).all()
+
+        counts = dict.fromkeys(ATTENDANCE_STATUSES, 0)
+        total_days = 0
+        for status, count in rows:
+            counts[status] = count
+            total_days += count
+
+        present_days = counts['present']
+        return {
+            'total_days': total_days,
+            'present_days': present_days,
+            'absent_days': counts['absent'],
+            'late_days': counts['late'],
+            'excused_days': counts['excused'],
+            'attendance_percentage': round(present_days / total_days * 100, 2) if total_days > 0 else 0
+        }
+
+    @staticmethod
+    def paginate(query, page, per_page, total):
+        """جلب صفحة واحدة فقط من السجلات باستخدام إجمالي معروف مسبقاً"""
+        page = max(page, 1)
+        per_page = max(min(per_page, 500), 1)
+        items = query.limit(per_page).offset((page - 1) * per_page).all()
+        return items, {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page
+        }
@@ -0,0 +1,350 @@
+"""
+ملخص إحصائيات الطالب المحدث تدريجياً
+Materialized student summaries - one student_summaries row per student with
+running grade sums/counts (overall and per subject), attendance counts per
+status and behavior counts per note type. A summary row is inserted with every
+new Student (and backfilled by migration 008), so reads are a primary-key
+lookup. Grade, Attendance and BehaviorNote writes are applied as deltas in the
+same flush; rows written with Core bulk statements (which bypass ORM events)
+are brought back in line by rebuild()
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, func, select, update, delete, insert, inspect
+from sqlalchemy.orm import Session, object_session
+from src.models.user import db, Student, Grade, Attendance, BehaviorNote
+from src.models.extended_models import StudentSummary
+
+ID_CHUNK = 900  # أقل من حد متغيرات SQLite في IN (...)
+ATTENDANCE_COLUMNS = {
+    'present': 'attendance_present',
+    'absent': 'attendance_absent',
+    'late': 'attendance_late',
+    'excused': 'attendance_excused',
+}
+BEHAVIOR_COLUMNS = {
+    'positive': 'behavior_positive',
+    'negative': 'behavior_negative',
+    'neutral': 'behavior_neutral',
+}
+COUNT_COLUMNS = ('grade_count', 'attendance_count', 'behavior_count',
+                 *ATTENDANCE_COLUMNS.values(), *BEHAVIOR_COLUMNS.values())
+
+# الأعمدة التي يعتمد عليها الملخص لكل نموذج
+TRACKED_COLUMNS = {
+    Grade: ('student_id', 'subject', 'grade', 'date_recorded'),
+    Attendance: ('student_id', 'status', 'date'),
+    BehaviorNote: ('student_id', 'note_type', 'date_recorded'),
+}
+
+
+def _order_key(recorded_at, row_id):
+    """ترتيب الدرجات زمنياً ثم بالرقم؛ قائمة لأنها تُحفظ في JSON"""
+    return [recorded_at.isoformat() if recorded_at else '', row_id]
+
+
+def _empty_summary(student_id):
+    summary = dict.fromkeys(column.name for column in StudentSummary.__table__.columns)
+    summary.update(dict.fromkeys(COUNT_COLUMNS, 0))
+    summary.update(student_id=student_id, grade_sum=0.0, subject_grades={}, updated_at=datetime.utcnow())
+    return summary
+
+
+def _derive_grade_totals(summary):
+    """المجاميع الكلية للدرجات مشتقة من إحصائيات المواد"""
+    subjects = summary['subject_grades'].values()
+    summary['grade_count'] = sum(stats['count'] for stats in subjects)
+    summary['grade_sum'] = sum(stats['sum'] for stats in subjects)
+    summary['grade_min'] = min((stats['min'] for stats in subjects), default=None)
+    summary['grade_max'] = max((stats['max'] for stats in subjects), default=None)
+    latest = max((stats['latest_key'][0] for stats in subjects), default='')
+    summary['last_grade_at'] = datetime.fromisoformat(latest) if latest else None
+
+
+class StudentSummaryService:
+    """قراءة الملخصات وبناؤها من السجلات الخام وتطبيق التغييرات عليها"""
+
+    @staticmethod
+    def _chunks(student_ids):
+        student_ids = list(student_ids)
+        for start in range(0, len(student_ids), ID_CHUNK):
+            yield student_ids[start:start + ID_CHUNK]
+
+    @staticmethod
+    def _subject_grades(connection, student_ids, subjects=None):
+        """إحصائيات كل مادة لكل طالب: مجاميع GROUP BY وأول/آخر درجة عبر ROW_NUMBER()"""
+        criteria = [Grade.student_id.in_(student_ids)]
+        if subjects is not None:
+            criteria.append(Grade.subject.in_(subjects))
+
+        result = defaultdict(dict)
+        rows = connection.execute(
+            select(Grade.student_id, Grade.subject, func.count(Grade.id), func.sum(Grade.grade),
+                   func.min(Grade.grade), func.max(Grade.grade))
+            .where(*criteria).group_by(Grade.student_id, Grade.subject)
+        )
+        for student_id, subject, count, grade_sum, grade_min, grade_max in rows:
+            result[student_id][subject] = {'count': count, 'sum': float(grade_sum or 0),
+                                           'min': grade_min, 'max': grade_max}
+
+        partition = (Grade.student_id, Grade.subject)
+        ranked = select(
+            Grade.id, Grade.student_id, Grade.subject, Grade.grade, Grade.date_recorded,
+            func.row_number().over(partition_by=partition, order_by=(Grade.date_recorded, Grade.id)).label('first_rank'),
+            func.row_number().over(partition_by=partition,
+                                   order_by=(Grade.date_recorded.desc(), Grade.id.desc())).label('latest_rank')
+        ).where(*criteria).subquery()
+        rows = connection.execute(
+            select(ranked).where((ranked.c.first_rank == 1) | (ranked.c.latest_rank == 1))
+        )
+        for row_id, student_id, subject, grade, recorded_at, first_rank, latest_rank in rows:
+            stats = result[student_id][subject]
+            if first_rank == 1:
+                stats.update(first=grade, first_key=_order_key(recorded_at, row_id))
+            if latest_rank == 1:
+                stats.update(latest=grade, latest_key=_order_key(recorded_at, row_id))
+        return result
+
+    @classmethod
+    def compute(cls, connection, student_ids):
+        """بناء الملخصات من السجلات الخام (سبعة استعلامات مجمعة لكل دفعة)"""
+        summaries = {}
+        for chunk in cls._chunks(student_ids):
+            chunk_summaries = {student_id: _empty_summary(student_id) for student_id in chunk}
+
+            for student_id, subjects in cls._subject_grades(connection, chunk).items():
+                chunk_summaries[student_id]['subject_grades'] = subjects
+
+            rows = connection.execute(
+                select(Attendance.student_id, Attendance.status, func.count(Attendance.id))
+                .where(Attendance.student_id.in_(chunk)).group_by(Attendance.student_id, Attendance.status)
+            )
+            for student_id, status, count in rows:
+                summary = chunk_summaries[student_id]
+                summary['attendance_count'] += count
+                if status in ATTENDANCE_COLUMNS:
+                    summary[ATTENDANCE_COLUMNS[status]] = count
+
+            rows = connection.execute(
+                select(BehaviorNote.student_id, BehaviorNote.note_type, func.count(BehaviorNote.id))
+                .where(BehaviorNote.student_id.in_(chunk)).group_by(BehaviorNote.student_id, BehaviorNote.note_type)
+            )
+            for student_id, note_type, count in rows:
+                summary = chunk_summaries[student_id]
+                summary['behavior_count'] += count
+                if note_type in BEHAVIOR_COLUMNS:
+                    summary[BEHAVIOR_COLUMNS[note_type]] = count
+
+            for column, marker in (('last_attendance_date', Attendance.date),
+                                   ('last_behavior_at', BehaviorNote.date_recorded)):
+                model = marker.class_
+                rows = connection.execute(
+                    select(model.student_id, func.max(marker)).where(model.student_id.in_(chunk))
+                    .group_by(model.student_id)
+                )
+                for student_id, value in rows:
+                    chunk_summaries[student_id][column] = value
+
+            for summary in chunk_summaries.values():
+                _derive_grade_totals(summary)
+            summaries.update(chunk_summaries)
+        return summaries
+
+    @classmethod
+    def rebuild(cls, student_ids=None, connection=None):
+        """إعادة بناء ملخصات طلاب محددين (أو جميع الطلاب) واستبدال الصفوف القديمة"""
+        connection = connection if connection is not None else db.session.connection()
+        if student_ids is None:
+            student_ids = connection.execute(select(Student.id).order_by(Student.id)).scalars().all()
+
+        rebuilt = 0
+        table = StudentSummary.__table__
+        for chunk in cls._chunks(sorted(set(student_ids))):
+            summaries = cls.compute(connection, chunk)
+            connection.execute(delete(table).where(table.c.student_id.in_(chunk)))
+            if summaries:
+                connection.execute(insert(table), list(summaries.values()))
+            rebuilt += len(summaries)
+        return rebuilt
+
+    @staticmethod
+    def create_empty(connection, student_ids):
+        """صفوف ملخص فارغة للطلاب الجدد (إدراج واحد لكل دفعة)"""
+        connection.execute(
+            insert(StudentSummary.__table__), [_empty_summary(student_id) for student_id in student_ids]
+        )
+
+    @classmethod
+    def get(cls, student_id):
+        """ملخص الطالب بقراءة واحدة بالمفتاح الأساسي؛ يُحسب دون حفظ إن لم يُبنَ بعد"""
+        summary = db.session.get(StudentSummary, student_id)
+        if summary is None:
+            summary = StudentSummary(**cls.compute(db.session.connection(), [student_id])[student_id])
+        return summary
+
+    @classmethod
+    def get_many(cls, student_ids):
+        """ملخصات عدة طلاب باستعلام واحد (IN على المفتاح الأساسي)"""
+        student_ids = list(dict.fromkeys(student_ids))
+        summaries = {}
+        for chunk in cls._chunks(student_ids):
+            for summary in StudentSummary.query.filter(StudentSummary.student_id.in_(chunk)):
+                summaries[summary.student_id] = summary
+
+        missing = [student_id for student_id in student_ids if student_id not in summaries]
+        if missing:
+            for student_id, values in cls.compute(db.session.connection(), missing).items():
+                summaries[student_id] = StudentSummary(**values)
+        return summaries
+
+    # ---- التحديث التدريجي ----
+
+    @staticmethod
+    def _apply_grade(summary, sign, row_id, values, stale_subjects):
+        subjects = summary['subject_grades']
+        subject, grade = values['subject'], values['grade']
+        key = _order_key(values['date_recorded'], row_id)
+        stats = subjects.get(subject)
+
+        if sign > 0:
+            if stats is None:
+                subjects[subject] = {'count': 1, 'sum': float(grade), 'min': grade, 'max': grade,
+                                     'first': grade, 'first_key': key, 'latest': grade, 'latest_key': key}
+                return
+            stats['count'] += 1
+            stats['sum'] += grade
+            stats['min'] = min(stats['min'], grade)
+            stats['max'] = max(stats['max'], grade)
+            if key < stats['first_key']:
+                stats.update(first=grade, first_key=key)
+            if key > stats['latest_key']:
+                stats.update(latest=grade, latest_key=key)
+            return
+
+        if stats is None:
+            stale_subjects.add(subject)
+            return
+        stats['count'] -= 1
+        stats['sum'] -= grade
+        if stats['count'] <= 0:
+            del subjects[subject]
+        elif grade in (stats['min'], stats['max']) or key in (stats['first_key'], stats['latest_key']):
+            # القيمة المحذوفة كانت حداً أو أول/آخر درجة: يُعاد حساب هذه المادة فقط
+            stale_subjects.add(subject)
+
+    @staticmethod
+    def _apply_count(summary, sign, total_column, column, marker_column, marker, stale_markers):
+        summary[total_column] += sign
+        if column:
+            summary[column] += sign
+        current = summary[marker_column]
+        if sign > 0:
+            if marker is not None and (current is None or marker > current):
+                summary[marker_column] = marker
+        elif marker is not None and marker == current:
+            stale_markers.add(marker_column)
+
+    @classmethod
+    def apply_changes(cls, connection, changes):
+        """تطبيق تغييرات الـ flush كفروق على الملخصات الموجودة؛ الطلاب بلا ملخص يُبنى لهم من جديد"""
+        by_student = defaultdict(list)
+        for change in changes:
+            by_student[change[3]['student_id']].append(change)
+
+        table = StudentSummary.__table__
+        existing = {}
+        for chunk in cls._chunks(sorted(by_student)):
+            rows = connection.execute(select(table).where(table.c.student_id.in_(chunk)).with_for_update())
+            existing.update({row.student_id: dict(row._mapping) for row in rows})
+
+        missing = [student_id for student_id in by_student if student_id not in existing]
+        if missing:
+            cls.rebuild(missing, connection=connection)
+
+        for student_id, summary in existing.items():
+            summary['subject_grades'] = {
+                subject: dict(stats) for subject, stats in (summary['subject_grades'] or {}).items()
+            }
+            stale_subjects, stale_markers = set(), set()
+            for model, sign, row_id, values in by_student[student_id]:
+                if model is Grade:
+                    cls._apply_grade(summary, sign, row_id, values, stale_subjects)
+                elif model is Attendance:
+                    cls._apply_count(summary, sign, 'attendance_count', ATTENDANCE_COLUMNS.get(values['status']),
+                                     'last_attendance_date', values['date'], stale_markers)
+                else:
+                    cls._apply_count(summary, sign, 'behavior_count', BEHAVIOR_COLUMNS.get(values['note_type']),
+                                     'last_behavior_at', values['date_recorded'], stale_markers)
+
+            if stale_subjects:
+                recomputed = cls._subject_grades(connection, [student_id], sorted(stale_subjects))[student_id]
+                for subject in stale_subjects:
+                    summary['subject_grades'].pop(subject, None)
+                summary['subject_grades'].update(recomputed)
+            for marker_column in stale_markers:
+                marker = Attendance.date if marker_column == 'last_attendance_date' else BehaviorNote.date_recorded
+                summary[marker_column] = connection.execute(
+                    select(func.max(marker)).where(marker.class_.student_id == student_id)
+                ).scalar()
+
+            _derive_grade_totals(summary)
+            summary['updated_at'] = datetime.utcnow()
+            connection.execute(update(table).where(table.c.student_id == student_id).values(**summary))
+
+
+def _snapshot(target, columns, previous=False):
+    """قيم الأعمدة الحالية، أو السابقة (قبل التعديل) عند previous"""
+    state = inspect(target)
+    values = {}
+    for column in columns:
+        history = state.attrs[column].history
+        values[column] = history.deleted[0] if previous and history.deleted else getattr(target, column)
+    return values
+
+
+def _record_change(target, sign, values):
+    session = object_session(target)
+    if session is not None and values['student_id'] is not None:
+        session.info.setdefault('student_summary_changes', []).append((type(target), sign, target.id, values))
+
+
+def _after_insert(mapper, connection, target):
+    _record_change(target, 1, _snapshot(target, TRACKED_COLUMNS[type(target)]))
+
+
+def _after_update(mapper, connection, target):
+    columns = TRACKED_COLUMNS[type(target)]
+    state = inspect(target)
+    if not any(state.attrs[column].history.has_changes() for column in columns):
+        return
+    _record_change(target, -1, _snapshot(target, columns, previous=True))
+    _record_change(target, 1, _snapshot(target, columns))
+
+
+def _after_delete(mapper, connection, target):
+    _record_change(target, -1, _snapshot(target, TRACKED_COLUMNS[type(target)], previous=True))
+
+
+def _after_student_insert(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('student_summary_new_students', []).append(target.id)
+
+
+def _apply_after_flush(session, flush_context):
+    # صفوف الطلاب الجدد أولاً، فتُطبق درجاتهم في نفس الـ flush كفروق على صف فارغ
+    new_students = session.info.pop('student_summary_new_students', None)
+    if new_students:
+        StudentSummaryService.create_empty(session.connection(), new_students)
+    changes = session.info.pop('student_summary_changes', None)
+    if changes:
+        StudentSummaryService.apply_changes(session.connection(), changes)
+
+
+for _model in TRACKED_COLUMNS:
+    event.listen(_model, 'after_insert', _after_insert)
+    event.listen(_model, 'after_update', _after_update)
+    event.listen(_model, 'after_delete', _after_delete)
+event.listen(Student, 'after_insert', _after_student_insert)
+event.listen(Session, 'after_flush', _apply_after_flush)
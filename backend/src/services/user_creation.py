@@ -4,17 +4,48 @@ User Creation Service with automatic login credentials
 """
 
 from datetime import date, datetime
+from itertools import islice
+from sqlalchemy import insert
 from src import db
-from src.models.user import User, Student, Teacher, Parent
-from src.models.extended_models import UserCredentials, generate_username, generate_random_password
+from src.models.user import User, Student, Teacher, Parent, ParentStudent
+from src.models.extended_models import (
+    UserCredentials, generate_username, generate_usernames, generate_random_password
+)
+from src.services.password_hashing import hash_passwords
 import json
 
+BULK_BATCH_SIZE = 500
+GENERATED_EMAIL_DOMAIN = 'thanawiya-school.com'
+CLASS_NAME_LENGTH = Student.__table__.c.class_name.type.length
+
+
+def _parse_date(value):
+    """تحويل تاريخ بصيغة ISO أو كائن تاريخ إلى date"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _class_name(row):
+    """اسم صف الطالب: class_name إن وُجد، وإلا الصف والشعبة معاً"""
+    class_name = str(row.get('class_name') or '').strip()
+    if class_name:
+        return class_name
+    return ' '.join(
+        part for part in (str(row.get('grade') or '').strip(), str(row.get('section') or '').strip()) if part
+    )
+
 
 class UserCreationService:
     """خدمة إنشاء المستخدمين مع بيانات الدخول التلقائية"""
     
     @staticmethod
-    def create_teacher_with_credentials(name, email, phone, subjects=None, qualification=None, **kwargs):
+    def create_teacher_with_credentials(name, email, phone, subjects=None, qualification=None,
+                                        password=None, password_hash=None, **kwargs):
         """إنشاء معلم مع بيانات تسجيل الدخول التلقائية"""
         try:
             # Check if user already exists
@@ -27,7 +58,7 @@ class UserCreationService:
             
             # Generate username and password
             username = generate_username(name, 'teacher')
-            password = generate_random_password()
+            password = password or generate_random_password()
             
             # Create user
             user = User(
@@ -38,7 +69,10 @@ class UserCreationService:
                 phone=phone,
                 is_active=True
             )
-            user.set_password(password)
+            if password_hash:
+                user.password_hash = password_hash
+            else:
+                user.set_password(password)
             
             db.session.add(user)
             db.session.flush()  # To get user.id
@@ -85,7 +119,8 @@ class UserCreationService:
             }
     
     @staticmethod
-    def create_student_with_credentials(name, email, phone, class_name, date_of_birth=None, **kwargs):
+    def create_student_with_credentials(name, email, phone, class_name, date_of_birth=None,
+                                        password=None, password_hash=None, **kwargs):
         """إنشاء طالب مع بيانات تسجيل الدخول التلقائية"""
         try:
             # Check if user already exists
@@ -98,7 +133,7 @@ class UserCreationService:
             
             # Generate username and password
             username = generate_username(name, 'student')
-            password = generate_random_password()
+            password = password or generate_random_password()
             
             # Create user
             user = User(
@@ -109,7 +144,10 @@ class UserCreationService:
                 phone=phone,
                 is_active=True
             )
-            user.set_password(password)
+            if password_hash:
+                user.password_hash = password_hash
+            else:
+                user.set_password(password)
             
             db.session.add(user)
             db.session.flush()  # To get user.id
@@ -156,7 +194,8 @@ class UserCreationService:
             }
     
     @staticmethod
-    def create_parent_with_credentials(name, email, phone, occupation=None, relationship='parent', **kwargs):
+    def create_parent_with_credentials(name, email, phone, occupation=None, relationship='parent',
+                                       password=None, password_hash=None, **kwargs):
         """إنشاء ولي أمر مع بيانات تسجيل الدخول التلقائية"""
         try:
             # Check if user already exists
@@ -169,7 +208,7 @@ class UserCreationService:
             
             # Generate username and password
             username = generate_username(name, 'parent')
-            password = generate_random_password()
+            password = password or generate_random_password()
             
             # Create user
             user = User(
@@ -180,7 +219,10 @@ class UserCreationService:
                 phone=phone,
                 is_active=True
             )
-            user.set_password(password)
+            if password_hash:
+                user.password_hash = password_hash
+            else:
+                user.set_password(password)
             
             db.session.add(user)
             db.session.flush()  # To get user.id
@@ -222,6 +264,194 @@ class UserCreationService:
                 'error': f'خطأ في إنشاء ولي الأمر: {str(e)}'
             }
     
+    @staticmethod
+    def hash_passwords(passwords):
+        """حساب تجزئة كلمات المرور لدفعة من المستخدمين على جميع الأنوية"""
+        return hash_passwords(passwords)
+    
+    @classmethod
+    def bulk_create_students_with_parents(cls, rows, batch_size=BULK_BATCH_SIZE):
+        """
+        إنشاء عدد كبير من الطلاب وأولياء أمورهم مع بيانات الدخول على دفعات.
+        
+        كل صف قاموس بنفس شكل صفوف استيراد Excel (name, student_id, birth_date,
+        grade, section, parent_name, parent_phone, address). يتم حفظ كل دفعة في
+        معاملة واحدة، وفشل دفعة لا يلغي الدفعات السابقة.
+        """
+        summary = {
+            'success': True,
+            'created_students': 0,
+            'created_parents': 0,
+            'linked_parents': 0,
+            'skipped': 0,
+            'errors': []
+        }
+        
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            
+            try:
+                result = cls._create_student_batch(batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                summary['errors'].extend(
+                    f'{row.get("name") or row.get("student_id")}: خطأ في حفظ الدفعة - {str(e)}'
+                    for row in batch
+                )
+                continue
+            
+            summary['created_students'] += result['created_students']
+            summary['created_parents'] += result['created_parents']
+            summary['linked_parents'] += result['linked_parents']
+            summary['skipped'] += len(batch) - result['created_students']
+            summary['errors'].extend(result['errors'])
+        
+        return summary
+    
+    @classmethod
+    def _create_student_batch(cls, batch):
+        """إنشاء دفعة واحدة بعدد ثابت من الاستعلامات (بدون commit)"""
+        errors = []
+        
+        # استبعاد أرقام الطلاب المكررة داخل الدفعة أو الموجودة مسبقاً
+        student_ids = {str(row.get('student_id') or '').strip() for row in batch} - {''}
+        existing_students = {
+            student_id for (student_id,) in db.session.query(Student.student_id).filter(
+                Student.student_id.in_(student_ids)
+            )
+        } if student_ids else set()
+        
+        rows = []
+        seen = set()
+        for row in batch:
+            name = (row.get('name') or '').strip()
+            student_id = str(row.get('student_id') or '').strip()
+            if not name or not student_id:
+                errors.append(f'{name or student_id}: الاسم أو رقم الهوية مفقود')
+            elif student_id in existing_students or student_id in seen:
+                errors.append(f'{name}: الطالب موجود مسبقاً برقم الهوية {student_id}')
+            elif len(_class_name(row)) > CLASS_NAME_LENGTH:
+                errors.append(f'{name}: اسم الصف "{_class_name(row)}" أطول من {CLASS_NAME_LENGTH} أحرف')
+            else:
+                seen.add(student_id)
+                rows.append(row)
+        
+        # أولياء الأمور الموجودون مسبقاً يتم ربطهم بدلاً من إنشائهم من جديد
+        parent_keys = {}
+        for row in rows:
+            phone = (row.get('parent_phone') or '').strip()
+            parent_name = (row.get('parent_name') or '').strip()
+            if phone and parent_name:
+                parent_keys.setdefault(phone, parent_name)
+        
+        existing_parents = dict(
+            db.session.query(User.phone, Parent.id).join(
+                Parent, Parent.user_id == User.id
+            ).filter(
+                User.role == 'parent', User.phone.in_(parent_keys)
+            ).all()
+        ) if parent_keys else {}
+        new_parent_phones = [phone for phone in parent_keys if phone not in existing_parents]
+        
+        # أسماء المستخدمين والبريد الإلكتروني لكل الحسابات الجديدة دفعة واحدة
+        usernames = generate_usernames(
+            [(row['name'], 'student') for row in rows] +
+            [(parent_keys[phone], 'parent') for phone in new_parent_phones]
+        )
+        student_usernames = usernames[:len(rows)]
+        parent_usernames = usernames[len(rows):]
+        
+        student_emails = [
+            (row.get('email') or f'{username}@{GENERATED_EMAIL_DOMAIN}').strip()
+            for row, username in zip(rows, student_usernames)
+        ]
+        parent_emails = [f'{username}@{GENERATED_EMAIL_DOMAIN}' for username in parent_usernames]
+        existing_emails = {
+            email for (email,) in db.session.query(User.email).filter(
+                User.email.in_(set(student_emails + parent_emails))
+            )
+        } if student_emails else set()
+        
+        accounts = []  # (row, username, email, role)
+        for row, username, email in zip(rows, student_usernames, student_emails):
+            if email in existing_emails:
+                errors.append(f'{row["name"]}: المستخدم موجود مسبقاً بالبريد الإلكتروني {email}')
+                continue
+            existing_emails.add(email)
+            accounts.append((row, username, email, 'student'))
+        for phone, username, email in zip(new_parent_phones, parent_usernames, parent_emails):
+            if email in existing_emails:
+                errors.append(f'{parent_keys[phone]}: المستخدم موجود مسبقاً بالبريد الإلكتروني {email}')
+                continue
+            existing_emails.add(email)
+            accounts.append((phone, username, email, 'parent'))
+        
+        passwords = [generate_random_password() for _ in accounts]
+        password_hashes = cls.hash_passwords(passwords)
+        
+        users = []
+        for (source, username, email, role), password_hash in zip(accounts, password_hashes):
+            users.append(User(
+                username=username,
+                email=email,
+                name=source['name'] if role == 'student' else parent_keys[source],
+                role=role,
+                phone=None if role == 'student' else source,
+                password_hash=password_hash,
+                is_active=True
+            ))
+        db.session.add_all(users)
+        db.session.flush()  # إدراج جماعي للحصول على المعرفات
+        
+        students = []
+        parents = {}
+        for (source, _, _, role), user in zip(accounts, users):
+            if role == 'student':
+                students.append((source, Student(
+                    user_id=user.id,
+                    student_id=str(source['student_id']).strip(),
+                    class_name=_class_name(source),
+                    date_of_birth=_parse_date(source.get('birth_date')),
+                    address=source.get('address') or None,
+                    emergency_contact=(source.get('parent_phone') or '').strip() or None
+                )))
+            else:
+                parents[source] = Parent(user_id=user.id, relationship='parent')
+        db.session.add_all([student for _, student in students])
+        db.session.add_all(parents.values())
+        db.session.flush()
+        
+        # الروابط وبيانات الدخول لا تحتاج معرفاتها، لذا تُدرج عبر executemany
+        links = []
+        for row, student in students:
+            phone = (row.get('parent_phone') or '').strip()
+            parent_id = existing_parents.get(phone) or (parents[phone].id if phone in parents else None)
+            if parent_id:
+                links.append({'parent_id': parent_id, 'student_id': student.id})
+            elif phone:
+                # حساب ولي الأمر لم يُنشأ (اسم مفقود أو بريد مكرر): الطالب أُنشئ دون ربط
+                errors.append(f'{row["name"]}: تم إنشاء الطالب دون ربطه بولي الأمر ({phone})')
+        
+        credentials = [
+            {'user_id': user.id, 'generated_username': username, 'generated_password': password}
+            for (_, username, _, _), user, password in zip(accounts, users, passwords)
+        ]
+        if links:
+            db.session.execute(insert(ParentStudent), links)
+        if credentials:
+            db.session.execute(insert(UserCredentials), credentials)
+        
+        return {
+            'created_students': len(students),
+            'created_parents': len(parents),
+            'linked_parents': len(links),
+            'errors': errors
+        }
+    
     @staticmethod
     def get_pending_credentials():
         """الحصول على بيانات تسجيل الدخول التي لم يطلع عليها المدير بعد"""
@@ -1,6 +1,10 @@
 from datetime import datetime
 from src.models.user import db, User, Student, Teacher, Parent
 from src.models.extended_models import UserCredentials, generate_random_password, generate_username
+from src.services.dashboard_cache import DashboardCache
+from src.services.school_stats import SchoolStatsService
+
+PUBLISH_ID_CHUNK = 900  # أقل من حد متغيرات SQLite في IN (...)
 
 
 class UserCreationService:
@@ -204,7 +208,9 @@ class UserCreationService:
     @staticmethod
     def get_pending_credentials_for_admin():
         """استرجاع بيانات تسجيل الدخول التي لم يراها المدير بعد"""
-        credentials = UserCredentials.query.filter_by(
+        credentials = UserCredentials.query.options(
+            *UserCredentials.loader_options()
+        ).filter_by(
             viewed_by_admin=False
         ).order_by(UserCredentials.created_at.desc()).all()
         
@@ -337,7 +343,9 @@ class GradeSystemService:
         """استرجاع الدرجات غير المنشورة للمعلم"""
         from src.models.extended_models import StudentGrade, GradeSystem, Course
         
-        unpublished_grades = db.session.query(StudentGrade).join(
+        unpublished_grades = db.session.query(StudentGrade).options(
+            *StudentGrade.loader_options()
+        ).join(
             GradeSystem
         ).join(Course).filter(
             Course.teacher_id == teacher_id,
@@ -347,28 +355,189 @@ class GradeSystemService:
         return [grade.to_dict() for grade in unpublished_grades]
     
     @staticmethod
-    def publish_grades(grade_ids, teacher_id):
-        """نشر درجات متعددة وإرسال إشعارات لأولياء الأمور"""
+    def parse_scores(scores, max_score):
+        """تحويل الأزواج [student_id, score] أو [student_id, score, notes] إلى قائمة مع التحقق من الحدود"""
+        if not isinstance(max_score, (int, float)) or max_score <= 0:
+            raise ValueError('الدرجة القصوى لنظام الدرجات غير محددة')
+        if not isinstance(scores, list) or not scores:
+            raise ValueError('قائمة الدرجات مطلوبة: [[student_id, score], ...]')
+        
+        parsed = []
+        seen = set()
+        for entry in scores:
+            if isinstance(entry, dict):
+                entry = [entry.get('student_id'), entry.get('score'), entry.get('notes')]
+            if not isinstance(entry, (list, tuple)) or len(entry) not in (2, 3):
+                raise ValueError(f'درجة غير صالحة: {entry}')
+            student_id, score, notes = (*entry, None)[:3]
+            if not isinstance(student_id, int) or isinstance(student_id, bool):
+                raise ValueError(f'رقم طالب غير صالح: {student_id}')
+            if not isinstance(score, (int, float)) or isinstance(score, bool) or not 0 <= score <= max_score:
+                raise ValueError(f'درجة الطالب {student_id} يجب أن تكون بين 0 و {max_score}')
+            if student_id in seen:
+                raise ValueError(f'الطالب {student_id} مكرر في الطلب')
+            seen.add(student_id)
+            parsed.append((student_id, float(score), notes))
+        return parsed
+    
+    @classmethod
+    def record_student_grades(cls, grade_system_id, scores, user_id, assignment_id=None, recorded_date=None):
+        """
+        تسجيل درجات فصل كامل لنظام درجات واحد بعبارة INSERT واحدة (executemany):
+        المعلم ونظام الدرجات ومادته في استعلامين، والتسجيل وأولياء الأمور في استعلام Enrollment واحد،
+        والنسب والدرجات الحرفية محسوبة للقائمة كلها مرة واحدة؛ النشر التلقائي يضيف INSERT ... SELECT
+        واحداً لإشعارات أولياء الأمور
+        """
+        from sqlalchemy import insert, select, null, exists
+        from src.models.user import ParentStudent
+        from src.models.extended_models import (
+            StudentGrade, GradeSystem, Course, Enrollment, Assignment, grade_percentages
+        )
+        
         try:
-            from src.models.extended_models import StudentGrade
+            teacher = Teacher.query.filter_by(user_id=user_id).first()
+            if not teacher:
+                return {'success': False, 'error': 'ملف المعلم غير موجود', 'status': 404}
+            
+            # مادة الواجب في نفس الاستعلام (استعلام فرعي) للتحقق من انتمائه لمادة نظام الدرجات
+            assignment_course = (
+                select(Assignment.course_id).where(Assignment.id == assignment_id).scalar_subquery()
+                if assignment_id is not None else null()
+            )
+            row = db.session.execute(
+                select(GradeSystem, Course.teacher_id, Course.classroom_id, assignment_course).join(Course).where(
+                    GradeSystem.id == grade_system_id
+                )
+            ).first()
+            if row is None or not row.GradeSystem.is_active:
+                return {'success': False, 'error': 'نظام الدرجات غير موجود', 'status': 404}
+            grade_system, course_teacher_id, classroom_id, assignment_course_id = row
+            if teacher.id not in (course_teacher_id, grade_system.created_by):
+                return {'success': False, 'error': 'المعلم لا يدرّس هذه المادة', 'status': 403}
+            if assignment_id is not None and assignment_course_id != grade_system.course_id:
+                return {'success': False, 'error': 'الواجب غير موجود في مادة نظام الدرجات'}
+            
+            entries = cls.parse_scores(scores, grade_system.max_score)
+            has_parent = exists().where(ParentStudent.student_id == Enrollment.student_id)
+            enrolled = dict(db.session.execute(
+                select(Enrollment.student_id, has_parent).where(
+                    Enrollment.classroom_id == classroom_id, Enrollment.status == 'active',
+                    Enrollment.student_id.in_([student_id for student_id, _, _ in entries])
+                )
+            ).all())
+            not_enrolled = sorted({student_id for student_id, _, _ in entries} - enrolled.keys())
+            if not_enrolled:
+                return {'success': False, 'error': 'طلاب غير مسجلين في فصل المادة', 'student_ids': not_enrolled}
+            
+            percentages, letters = grade_percentages([score for _, score, _ in entries], grade_system.max_score)
+            now = datetime.utcnow()
+            auto_publish = bool(grade_system.auto_publish)  # قبل commit الذي ينهي صلاحية الكائن
+            notify_parents = auto_publish and bool(grade_system.notify_parents)
+            published_at = now if auto_publish else None
+            rows = [
+                {'student_id': student_id, 'grade_system_id': grade_system.id, 'assignment_id': assignment_id,
+                 'score': score, 'max_score': grade_system.max_score, 'percentage': percentage,
+                 'grade_letter': letter, 'recorded_date': recorded_date or now.date(), 'recorded_by': teacher.id,
+                 'recorded_at': now, 'is_published': auto_publish, 'published_at': published_at,
+                 'parent_notified': notify_parents and bool(enrolled[student_id]),
+                 'parent_notified_at': now if notify_parents and enrolled[student_id] else None, 'notes': notes}
+                for (student_id, score, notes), percentage, letter in zip(entries, percentages, letters)
+            ]
+            # الجدول لا النموذج: إدراج ORM الجماعي يقسم الصفوف حسب القيم الفارغة إلى عدة عبارات
+            # بدون ترتيب الإرجاع حسب المعاملات: SQLite يعود حينها إلى إدراج صف بصف
+            table = StudentGrade.__table__
+            if db.session.get_bind().dialect.insert_executemany_returning:
+                grade_ids = sorted(db.session.execute(insert(table).returning(table.c.id), rows).scalars())
+            else:
+                db.session.execute(insert(table), rows)
+                grade_ids = None
+            notified_count = 0
+            if any(row['parent_notified'] for row in rows):
+                notified_count = db.session.execute(StudentGrade.parent_notifications_insert(
+                    table.c.id.in_(grade_ids) if grade_ids is not None else
+                    (table.c.grade_system_id == grade_system.id) & (table.c.recorded_at == now), now
+                )).rowcount
+            db.session.commit()
             
-            grades = StudentGrade.query.filter(
-                StudentGrade.id.in_(grade_ids)
-            ).all()
+            # الإدراج عبر Core لا يطلق أحداث ORM
+            DashboardCache.invalidate([row['student_id'] for row in rows])
+            SchoolStatsService.invalidate()
             
-            published_count = 0
-            for grade in grades:
-                # التأكد من صلاحية المعلم
-                if grade.recorder.user_id == teacher_id:
-                    grade.publish_grade()
-                    published_count += 1
+            return {
+                'success': True,
+                'recorded_count': len(rows),
+                'grade_ids': grade_ids,
+                'auto_published': auto_publish,
+                'notified_count': notified_count,
+                'average_percentage': round(sum(percentages) / len(percentages), 2)
+            }
             
+        except ValueError as e:
+            db.session.rollback()
+            return {'success': False, 'error': str(e)}
+        except Exception as e:
+            db.session.rollback()
+            return {'success': False, 'error': str(e), 'status': 500}
+    
+    @staticmethod
+    def publish_grades(grade_ids, teacher_id):
+        """
+        نشر درجات متعددة بعبارة UPDATE واحدة تتحقق من الصلاحية بنفسها:
+        WHERE id IN (...) AND recorded_by = (معلم المستخدم teacher_id) AND لم تُنشر بعد،
+        وتعلّم parent_notified في نفس العبارة، ثم INSERT ... SELECT واحد لإشعارات أولياء الأمور
+        """
+        from sqlalchemy import update, select, or_, case
+        from src.models.extended_models import StudentGrade
+        
+        try:
+            grade_ids = sorted({grade_id for grade_id in grade_ids if isinstance(grade_id, int)})
+            table = StudentGrade.__table__
+            teacher = select(Teacher.id).where(Teacher.user_id == teacher_id).scalar_subquery()
+            returning = db.session.get_bind().dialect.update_returning
+            
+            now = datetime.utcnow()
+            notify = StudentGrade.parent_notification_due()
+            published = []
+            for start in range(0, len(grade_ids), PUBLISH_ID_CHUNK):
+                criteria = [
+                    table.c.id.in_(grade_ids[start:start + PUBLISH_ID_CHUNK]),
+                    table.c.recorded_by == teacher,
+                    or_(table.c.is_published.is_(False), table.c.is_published.is_(None))
+                ]
+                statement = update(table).where(*criteria).values(
+                    is_published=True, published_at=now,
+                    parent_notified=notify, parent_notified_at=case((notify, now), else_=None)
+                )
+                columns = (table.c.id, table.c.student_id, table.c.parent_notified)
+                if returning:
+                    published.extend(db.session.execute(statement.returning(*columns)).all())
+                else:
+                    published.extend(db.session.execute(select(*columns[:2], notify).where(*criteria)).all())
+                    db.session.execute(statement)
+            
+            notified_ids = [grade_id for grade_id, _, notified in published if notified]
+            notified_count = 0
+            for start in range(0, len(notified_ids), PUBLISH_ID_CHUNK):
+                notified_count += db.session.execute(StudentGrade.parent_notifications_insert(
+                    table.c.id.in_(notified_ids[start:start + PUBLISH_ID_CHUNK]), now
+                )).rowcount
             db.session.commit()
             
+            # التحديث عبر Core لا يطلق أحداث ORM
+            DashboardCache.invalidate([student_id for _, student_id, _ in published])
+            if published:
+                SchoolStatsService.invalidate()
+            
+            published_count = len(published)
+            message = f'تم نشر {published_count} درجة'
+            if notified_count:
+                message += f' وإرسال {notified_count} إشعار لأولياء الأمور'
             return {
                 'success': True,
                 'published_count': published_count,
-                'message': f'تم نشر {published_count} درجة وإرسال إشعارات لأولياء الأمور'
+                'published_ids': sorted(grade_id for grade_id, _, _ in published),
+                'notified_count': notified_count,
+                'message': message
             }
             
         except Exception as e:
@@ -0,0 +1,216 @@
+"""
+فهرس البحث عن المستخدمين
+User search index - one normalized document per user (name, username and
+email with Arabic letter variants folded and diacritics stripped) stored in an
+SQLite FTS5 trigram table, or a pg_trgm GIN-indexed table on PostgreSQL, so
+partial-name lookups are index searches ranked by relevance instead of three
+leading-wildcard LIKE scans. ORM inserts/updates/deletes of users keep it in
+sync at flush time; Core bulk inserts call rebuild()
+"""
+
+import re
+import weakref
+from sqlalchemy import event, inspect, select, text, bindparam, Integer, Float
+from sqlalchemy.orm import Session, object_session
+from src.models.user import db, User
+
+TABLE = 'user_search'
+SUPPORTED_DIALECTS = ('sqlite', 'postgresql')
+INDEXED_COLUMNS = ('name', 'username', 'email')
+MIN_TRIGRAM_TERM = 3  # أقصر جزء يستطيع فهرس الثلاثيات البحث عنه
+REBUILD_BATCH = 5000
+
+# التشكيل والتطويل وعلامات القرآن
+_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه', 'ى': 'ي', 'ی': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ک': 'ك',
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},
+})
+
+# هل الفهرس موجود في قاعدة بيانات المحرك (يُفحص مرة لكل محرك)
+_available = weakref.WeakKeyDictionary()
+
+
+def normalize_arabic(value):
+    """توحيد أشكال الألف والهمزة والتاء المربوطة والياء وحذف التشكيل والأحرف الكبيرة"""
+    value = _DIACRITICS.sub('', value or '')
+    return ' '.join(value.translate(_FOLD).lower().split())
+
+
+def user_document(name, username, email):
+    return normalize_arabic(' '.join(part for part in (name, username, email) if part))
+
+
+def _like_pattern(term):
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+class UserSearchIndex:
+    """إنشاء الفهرس ومزامنته والبحث فيه"""
+
+    @staticmethod
+    def _key_column(dialect_name):
+        # FTS5 لا يقبل مفتاحاً أساسياً؛ rowid هو معرف المستخدم
+        return 'rowid' if dialect_name == 'sqlite' else 'user_id'
+
+    @classmethod
+    def available(cls, connection):
+        engine = connection.engine
+        if engine not in _available:
+            _available[engine] = (
+                connection.dialect.name in SUPPORTED_DIALECTS and inspect(connection).has_table(TABLE)
+            )
+        return _available[engine]
+
+    @classmethod
+    def create(cls, connection):
+        """إنشاء جدول الفهرس حسب نوع قاعدة البيانات؛ False إن لم تكن مدعومة"""
+        dialect_name = connection.dialect.name
+        if dialect_name == 'sqlite':
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(document, tokenize='trigram')"
+            ))
+        elif dialect_name == 'postgresql':
+            connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            connection.execute(text(
+                f'CREATE TABLE IF NOT EXISTS {TABLE} (user_id INTEGER PRIMARY KEY, document TEXT NOT NULL)'
+            ))
+            connection.execute(text(
+                f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_document_trgm ON {TABLE} USING gin (document gin_trgm_ops)'
+            ))
+        else:
+            return False
+        _available[connection.engine] = True
+        return True
+
+    @classmethod
+    def ensure(cls, connection=None):
+        """إنشاء الفهرس وتعبئته إن لم يكن موجوداً"""
+        connection = connection if connection is not None else db.session.connection()
+        if cls.available(connection):
+            return True
+        _available.pop(connection.engine, None)
+        if not cls.create(connection):
+            return False
+        cls.rebuild(connection)
+        return True
+
+    @classmethod
+    def rebuild(cls, connection=None):
+        """إعادة بناء الفهرس من جدول المستخدمين (بعد الإدراج الجماعي أو لإصلاح الانحراف)"""
+        connection = connection if connection is not None else db.session.connection()
+        if not cls.available(connection) and not cls.create(connection):
+            return 0
+
+        connection.execute(text(f'DELETE FROM {TABLE}'))
+        rows = connection.execute(
+            select(User.id, User.name, User.username, User.email).order_by(User.id)
+        ).yield_per(REBUILD_BATCH)
+        indexed = 0
+        for batch in rows.partitions():
+            cls._insert(connection, [
+                {'user_id': row.id, 'document': user_document(row.name, row.username, row.email)}
+                for row in batch
+            ])
+            indexed += len(batch)
+        return indexed
+
+    @classmethod
+    def _insert(cls, connection, documents):
+        if documents:
+            key = cls._key_column(connection.dialect.name)
+            connection.execute(text(f'INSERT INTO {TABLE} ({key}, document) VALUES (:user_id, :document)'), documents)
+
+    @classmethod
+    def apply(cls, connection, changes):
+        """تطبيق تغييرات الجلسة: {user_id: document أو None للحذف}"""
+        if not changes or not cls.available(connection):
+            return
+        key = cls._key_column(connection.dialect.name)
+        connection.execute(
+            text(f'DELETE FROM {TABLE} WHERE {key} IN :ids').bindparams(bindparam('ids', expanding=True)),
+            {'ids': list(changes)}
+        )
+        cls._insert(connection, [
+            {'user_id': user_id, 'document': document}
+            for user_id, document in changes.items() if document is not None
+        ])
+
+    @classmethod
+    def matches(cls, search, connection=None):
+        """
+        استعلام فرعي (user_id, rank) للمستخدمين الذين تحتوي وثيقتهم كل كلمات البحث؛
+        rank الأصغر أولاً. None إن لم يكن الفهرس متاحاً أو كان البحث فارغاً بعد التوحيد.
+        """
+        connection = connection if connection is not None else db.session.connection()
+        terms = normalize_arabic(search).split()
+        if not terms or not cls.available(connection):
+            return None
+
+        params = {}
+        conditions = []
+        if connection.dialect.name == 'sqlite':
+            phrases = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM]
+            if phrases:
+                conditions.append(f'{TABLE} MATCH :match')
+                params['match'] = ' '.join('"' + term.replace('"', '""') + '"' for term in phrases)
+            short_terms = [term for term in terms if len(term) < MIN_TRIGRAM_TERM]
+            rank = f'bm25({TABLE})' if phrases else '0.0'
+            key = 'rowid'
+        else:
+            short_terms = terms  # pg_trgm يخدم LIKE '%...%' من الفهرس
+            params['query'] = ' '.join(terms)
+            rank = '-word_similarity(:query, document)'
+            key = 'user_id'
+
+        for i, term in enumerate(short_terms):
+            conditions.append(f"document LIKE :term_{i} ESCAPE '\\'")
+            params[f'term_{i}'] = _like_pattern(term)
+
+        statement = text(
+            f'SELECT {key} AS user_id, {rank} AS rank FROM {TABLE} WHERE {" AND ".join(conditions)}'
+        ).bindparams(**params).columns(user_id=Integer, rank=Float)
+        return statement.subquery('search_matches')
+
+
+def _record(target, document):
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault('user_search_changes', {})[target.id] = document
+
+
+def _after_insert(mapper, connection, target):
+    _record(target, user_document(target.name, target.username, target.email))
+
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in INDEXED_COLUMNS):
+        _record(target, user_document(target.name, target.username, target.email))
+
+
+def _after_delete(mapper, connection, target):
+    _record(target, None)
+
+
+def _apply_after_flush(session, flush_context):
+    changes = session.info.pop('user_search_changes', None)
+    if changes:
+        UserSearchIndex.apply(session.connection(), changes)
+
+
+event.listen(User, 'after_insert', _after_insert)
+event.listen(User, 'after_update', _after_update)
+event.listen(User, 'after_delete', _after_delete)
+event.listen(Session, 'after_flush', _apply_after_flush)
+
+
+def init_user_search(app):
+    """إنشاء فهرس البحث وتعبئته عند أول تشغيل (بعد db.create_all)"""
+    with db.engine.begin() as connection:
+        if UserSearchIndex.ensure(connection):
+            app.logger.info(f'User search index ready ({connection.dialect.name})')
+        else:
+            app.logger.warning(f'User search index not supported on {connection.dialect.name}, using LIKE')
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the project root to the path (src/ too: main.py imports `config` as a top-level module)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'src'))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """تطبيق الاختبار بقاعدة SQLite في الذاكرة (TestingConfig: QUERY_BUDGET_STRICT)"""
+    # create_app يكتب logs/app.log في مجلد العمل الحالي
+    monkeypatch.chdir(tmp_path)
+
+    from src.main import create_app
+    from src.models.user import db
+
+    app = create_app('testing')
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.user import db, User
+
+
+@pytest.fixture
+def admin_client(app, client):
+    with app.app_context():
+        users = [
+            User(username=f'user{n}', email=f'user{n}@example.com', password_hash='-', role='student', name=f'user{n}')
+            for n in range(7)
+        ]
+        for user in users[1::2]:
+            user.created_at = datetime(2026, 1, 1)  # ties: the cursor falls back to id
+        db.session.add_all(users)
+        db.session.commit()
+        admin_id = users[0].id
+    with client.session_transaction() as session:
+        session['user_id'] = admin_id
+        session['user_role'] = 'admin'
+    return client
+
+
+def test_created_at_cursor_pages_cover_every_user(admin_client):
+    seen = []
+    response = admin_client.get('/api/admin/users?sort=created_at&per_page=3')
+    while True:
+        assert response.status_code == 200, response.get_json()
+        data = response.get_json()
+        seen.extend(user['id'] for user in data['users'])
+        if not data['next_cursor']:
+            break
+        response = admin_client.get(f'/api/admin/users?sort=created_at&per_page=3&cursor={data["next_cursor"]}')
+
+    assert sorted(seen) == list(range(1, 8))
+    assert len(seen) == len(set(seen))
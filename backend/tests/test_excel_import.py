@@ -0,0 +1,57 @@
+import io
+from datetime import datetime, timedelta
+
+import openpyxl
+import pytest
+
+from src.models.user import db, User
+from src.models.extended_models import ImportJob
+from src.services.excel_import import ExcelImportService, STUDENT_COLUMNS
+
+
+@pytest.fixture
+def admin(app, client):
+    with app.app_context():
+        user = User(username='admin', email='admin@example.com', password_hash='-', role='admin', name='admin')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = 'admin'
+    return user_id
+
+
+def add_job(admin, status, idle):
+    job = ImportJob(import_type='students', status=status, created_by=admin,
+                    created_at=datetime.utcnow() - idle, updated_at=datetime.utcnow() - idle)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_import_job_without_progress_is_failed_on_read(app, client, admin):
+    with app.app_context():
+        stale = add_job(admin, 'processing', timedelta(hours=2))
+        active = add_job(admin, 'processing', timedelta(minutes=5))
+
+    assert client.get(f'/api/import-jobs/{stale}').get_json()['import_job']['status'] == 'failed'
+    assert client.get(f'/api/import-jobs/{active}').get_json()['import_job']['status'] == 'processing'
+
+
+def test_preview_is_kept_on_the_job(app, admin):
+    workbook = openpyxl.Workbook()
+    workbook.active.append(STUDENT_COLUMNS)
+    for n in range(3):
+        workbook.active.append([f'طالب {n}', f'10000{n}', '15/03/2010', 'الأول', 'أ', '', '', '', 'ذكر', 'بنين'])
+    upload = io.BytesIO()
+    workbook.save(upload)
+    upload.seek(0)
+
+    with app.app_context():
+        result = ExcelImportService.run(upload, 'students', created_by=admin)
+        db.session.expire_all()
+        job = db.session.get(ImportJob, result['job']['id']).to_dict()
+
+    assert [row['name'] for row in job['preview']] == ['طالب 0', 'طالب 1', 'طالب 2']
+    assert job['preview'] == result['preview']
@@ -0,0 +1,165 @@
+from datetime import date
+
+import pytest
+
+from src.models.user import db, User, Student, Teacher, Parent, ParentStudent
+from src.models.extended_models import (
+    AcademicYear, Classroom, Subject, Course, Enrollment, Assignment, GradeSystem, StudentGrade, Notification
+)
+
+
+def add_user(role, name):
+    user = User(username=name, email=f'{name}@example.com', password_hash='-', role=role, name=name)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def add_course(teacher, classroom, code):
+    subject = Subject(name=code, code=code)
+    db.session.add(subject)
+    db.session.flush()
+    course = Course(classroom_id=classroom.id, subject_id=subject.id, teacher_id=teacher.id)
+    db.session.add(course)
+    db.session.flush()
+    return course
+
+
+@pytest.fixture
+def school(app, client):
+    """معلم بمادتين في فصل من طالبين (للأول وليا أمر، والثاني بلا ولي أمر)، مسجل الدخول"""
+    with app.app_context():
+        teacher = Teacher(user_id=add_user('teacher', 'teacher').id, teacher_id='T0001')
+        year = AcademicYear(year='2026-2027', start_date=date(2026, 9, 1), end_date=date(2027, 6, 30))
+        db.session.add_all([teacher, year])
+        db.session.flush()
+        classroom = Classroom(name='3أ', grade_level='12', academic_year_id=year.id)
+        db.session.add(classroom)
+        db.session.flush()
+        students = [
+            Student(user_id=add_user('student', f'student{n}').id, student_id=f'S{n:04d}', class_name='3أ')
+            for n in range(2)
+        ]
+        db.session.add_all(students)
+        db.session.flush()
+        db.session.add_all([Enrollment(classroom_id=classroom.id, student_id=student.id) for student in students])
+        parents = [Parent(user_id=add_user('parent', f'parent{n}').id) for n in range(2)]
+        db.session.add_all(parents)
+        db.session.flush()
+        db.session.add_all([ParentStudent(parent_id=parent.id, student_id=students[0].id) for parent in parents])
+        math, physics = add_course(teacher, classroom, 'MATH'), add_course(teacher, classroom, 'PHYS')
+        db.session.commit()
+        ids = {
+            'teacher': teacher.id, 'math': math.id, 'physics': physics.id,
+            'students': [student.id for student in students],
+            'parent_users': sorted(parent.user_id for parent in parents),
+        }
+        user_id = teacher.user_id
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = 'teacher'
+    return ids
+
+
+def add_grade_system(school, **values):
+    grade_system = GradeSystem(course_id=school['math'], name='midterm', grade_type='midterm',
+                               created_by=school['teacher'], **values)
+    db.session.add(grade_system)
+    db.session.commit()
+    return grade_system.id
+
+
+def post_scores(client, school, grade_system_id, **data):
+    scores = [[student_id, 40] for student_id in school['students']]
+    return client.post(f'/api/teacher/grade-systems/{grade_system_id}/grades', json={'scores': scores, **data})
+
+
+def test_grade_system_without_max_score_is_rejected(app, client, school):
+    with app.app_context():
+        grade_system_id = add_grade_system(school)
+        db.session.get(GradeSystem, grade_system_id).max_score = None
+        db.session.commit()
+
+    response = post_scores(client, school, grade_system_id)
+
+    assert response.status_code == 400
+    assert 'الدرجة القصوى' in response.get_json()['error']
+
+
+def test_assignment_must_belong_to_the_grade_system_course(app, client, school):
+    with app.app_context():
+        grade_system_id = add_grade_system(school, max_score=50.0)
+        assignments = [Assignment(course_id=school[course], title=course, assignment_type='quiz')
+                       for course in ('physics', 'math')]
+        db.session.add_all(assignments)
+        db.session.commit()
+        other_course, same_course = (assignment.id for assignment in assignments)
+
+    assert post_scores(client, school, grade_system_id, assignment_id=other_course).status_code == 400
+    assert post_scores(client, school, grade_system_id, assignment_id=other_course + 100).status_code == 400
+    assert post_scores(client, school, grade_system_id, assignment_id=same_course).status_code == 201
+
+
+def stored_notifications(app):
+    with app.app_context():
+        return sorted((notification.user_id, notification.type, notification.title, notification.body,
+                       notification.data_json) for notification in Notification.query)
+
+
+def notified_flags(app, grade_ids):
+    with app.app_context():
+        return [(grade.parent_notified, grade.parent_notified_at is not None)
+                for grade in StudentGrade.query.filter(StudentGrade.id.in_(grade_ids)).order_by(StudentGrade.id)]
+
+
+@pytest.mark.parametrize('notify_parents', [True, False])
+def test_publish_notifies_linked_parents(app, client, school, notify_parents):
+    with app.app_context():
+        grade_system_id = add_grade_system(school, max_score=50.0, notify_parents=notify_parents)
+    grade_ids = post_scores(client, school, grade_system_id).get_json()['grade_ids']
+
+    data = client.post('/api/teacher/grades/publish', json={'grade_ids': grade_ids}).get_json()
+
+    assert data['published_count'] == 2
+    if not notify_parents:
+        assert data['notified_count'] == 0 and 'أولياء الأمور' not in data['message']
+        assert stored_notifications(app) == []
+        assert notified_flags(app, grade_ids) == [(False, False), (False, False)]
+        return
+
+    # إشعار لكل ولي أمر للطالب الأول فقط؛ الطالب الثاني بلا ولي أمر
+    student_grade = f'{{"student_grade_id": {grade_ids[0]}, "student_id": {school["students"][0]}}}'
+    assert stored_notifications(app) == [
+        (user_id, 'grade', 'تم نشر درجة جديدة', 'student0 - midterm', student_grade)
+        for user_id in school['parent_users']
+    ]
+    assert data['notified_count'] == 2 and 'أولياء الأمور' in data['message']
+    assert notified_flags(app, grade_ids) == [(True, True), (False, False)]
+
+
+def test_single_grade_publish_matches_bulk_notifications(app, client, school):
+    from src.services.user_management import GradeSystemService
+
+    with app.app_context():
+        grade_system_id = add_grade_system(school, max_score=50.0, auto_publish=True)
+        result = GradeSystemService.record_student_grade(school['students'][0], grade_system_id, 40, school['teacher'])
+    assert result["success"], result
+    grade_id = result["student_grade"]["id"]
+
+    student_grade = f'{{"student_grade_id": {grade_id}, "student_id": {school["students"][0]}}}'
+    assert stored_notifications(app) == [
+        (user_id, 'grade', 'تم نشر درجة جديدة', 'student0 - midterm', student_grade)
+        for user_id in school['parent_users']
+    ]
+    assert notified_flags(app, [grade_id]) == [(True, True)]
+
+
+def test_auto_published_grades_notify_parents(app, client, school):
+    with app.app_context():
+        grade_system_id = add_grade_system(school, max_score=50.0, auto_publish=True)
+
+    data = post_scores(client, school, grade_system_id).get_json()
+
+    assert data['auto_published'] and data['notified_count'] == 2
+    assert [user_id for user_id, *_ in stored_notifications(app)] == school['parent_users']
+    assert notified_flags(app, data['grade_ids']) == [(True, True), (False, False)]
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from werkzeug.security import check_password_hash
+
+from src.services import password_hashing
+
+
+@pytest.fixture
+def fast_profile(monkeypatch):
+    monkeypatch.setenv('PASSWORD_HASH_PROFILE', 'fast')
+    yield
+    password_hashing.shutdown_pool()
+
+
+def test_worker_thread_batches_use_the_process_pool(fast_profile):
+    passwords = [f'password{n}' for n in range(password_hashing.MIN_PARALLEL_BATCH * 2)]
+
+    # خيط عامل مثل طلب الويب أو منفذ استيراد Excel
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        hashes = executor.submit(password_hashing.hash_passwords, passwords, 2).result()
+
+    pool = password_hashing._pool
+    assert pool is not None and pool._mp_context.get_start_method() == password_hashing.pool_start_method()
+    assert len(pool._processes) == 2
+    assert all(check_password_hash(password_hash, password) for password_hash, password in zip(hashes, passwords))
+
+    # المجمع يُنشأ مرة واحدة ويُعاد استخدامه
+    password_hashing.hash_passwords(passwords, 2)
+    assert password_hashing._pool is pool
+
+
+def test_small_batches_hash_in_the_calling_thread(fast_profile):
+    hashes = password_hashing.hash_passwords(['a', 'b'], 2)
+
+    assert password_hashing._pool is None
+    assert check_password_hash(hashes[1], 'b')
@@ -0,0 +1,115 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+from src.models.user import db
+from src.services.query_metrics import (
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryBudgetExceeded, query_budget
+)
+
+
+def add_probe(app, budget, queries):
+    @app.route('/probe')
+    @query_budget(budget)
+    def probe():
+        for n in range(queries):
+            db.session.execute(text(f'SELECT {n}'))
+        return 'ok'
+
+
+def test_budget_breach_fails_under_strict(app, client):
+    add_probe(app, budget=1, queries=2)
+
+    with pytest.raises(QueryBudgetExceeded, match='probe executed 2 queries'):
+        client.get('/probe')
+
+
+def test_budget_breach_only_logged_when_not_strict(app, client):
+    app.config['QUERY_BUDGET_STRICT'] = False
+    add_probe(app, budget=1, queries=2)
+
+    response = client.get('/probe')
+
+    assert response.status_code == 200
+    assert response.headers[QUERY_COUNT_HEADER] == '2'
+
+
+def test_within_budget_reports_headers(app, client):
+    add_probe(app, budget=2, queries=2)
+
+    response = client.get('/probe')
+
+    assert response.status_code == 200
+    assert response.headers[QUERY_COUNT_HEADER] == '2'
+    assert QUERY_TIME_HEADER in response.headers
+
+
+def test_metrics_disabled_by_default_outside_development_and_testing():
+    from config import Config, ProductionConfig
+
+    if 'QUERY_METRICS_ENABLED' in os.environ:
+        pytest.skip('QUERY_METRICS_ENABLED is set in the environment')
+    assert Config.QUERY_METRICS_ENABLED is False
+    assert ProductionConfig.QUERY_METRICS_ENABLED is False
+
+
+def add_family(children):
+    """ولي أمر بعدد من الأبناء، لكل ابن درجات وحضور وملاحظات سلوك"""
+    from datetime import date, datetime
+    from src.models.user import User, Student, Teacher, Parent, ParentStudent, Grade, Attendance, BehaviorNote
+
+    def add_user(role, name):
+        user = User(username=name, email=f'{name}@example.com', password_hash='-', role=role, name=name)
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    teacher = Teacher(user_id=add_user('teacher', 'teacher').id, teacher_id='T0001')
+    parent = Parent(user_id=add_user('parent', 'parent').id)
+    db.session.add_all([teacher, parent])
+    db.session.flush()
+    for n in range(children):
+        student = Student(user_id=add_user('student', f'student{n}').id, student_id=f'S{n:04d}', class_name='3أ')
+        db.session.add(student)
+        db.session.flush()
+        db.session.add_all([
+            ParentStudent(parent_id=parent.id, student_id=student.id),
+            Grade(student_id=student.id, teacher_id=teacher.id, subject='math', grade=80 + n, grade_type='exam',
+                  date_recorded=datetime(2026, 10, 1)),
+            Attendance(student_id=student.id, teacher_id=teacher.id, date=date(2026, 10, 1), status='present'),
+            BehaviorNote(student_id=student.id, teacher_id=teacher.id, note_type='positive', note='ممتاز'),
+        ])
+    db.session.commit()
+    return parent.user_id
+
+
+@pytest.mark.parametrize('children', [1, 3])
+def test_parent_dashboard_stays_within_its_declared_budget(app, client, children):
+    # QUERY_BUDGET_STRICT في TestingConfig: تجاوز @query_budget(10) يرفع QueryBudgetExceeded
+    with app.app_context():
+        user_id = add_family(children)
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = 'parent'
+
+    response = client.get('/api/parent/dashboard')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['children']) == children
+    assert int(response.headers[QUERY_COUNT_HEADER]) <= 10
+
+
+def test_parent_children_list_uses_the_slim_user_summary(app, client):
+    with app.app_context():
+        user_id = add_family(2)
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = 'parent'
+
+    response = client.get('/api/children')
+
+    assert response.status_code == 200
+    users = [child['user'] for child in response.get_json()['children']]
+    assert [user['name'] for user in users] == ['student0', 'student1']
+    assert all(set(user) == {'id', 'username', 'name', 'role'} for user in users)
@@ -0,0 +1,50 @@
+from datetime import date, datetime, timedelta
+
+from src.models.user import db, User, Student, Teacher, Grade, Attendance, BehaviorNote
+from src.services.ai_service import AIService
+from src.services.risk_scoring import RiskScoringService
+
+
+def add_user(role, name):
+    user = User(username=name, email=f'{name}@example.com', password_hash='-', role=role, name=name)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def test_ai_analysis_and_local_scoring_agree_on_back_dated_grades(app):
+    today = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        teacher = Teacher(user_id=add_user('teacher', 'teacher').id, teacher_id='T0001')
+        db.session.add(teacher)
+        students = []
+        # (أيام مضت، الدرجة) بترتيب الإدخال: الدرجات المنخفضة أقدم لكنها أُدخلت أخيراً
+        entries = {
+            'declining': [(40, 95), (30, 92), (20, 90), (10, 60), (5, 58), (1, 55)],
+            'back-dated': [(10, 60), (5, 58), (1, 55), (40, 95), (30, 92), (20, 90)],
+        }
+        for n, (name, grades) in enumerate(entries.items()):
+            student = Student(user_id=add_user('student', name).id, student_id=f'S{n:04d}', class_name='3أ')
+            db.session.add(student)
+            db.session.flush()
+            students.append(student.id)
+            for days, grade in grades:
+                db.session.add(Grade(student_id=student.id, teacher_id=teacher.id, subject='math', grade=grade,
+                                     grade_type='exam', date_recorded=today - timedelta(days=days)))
+            for day in range(1, 5):
+                db.session.add(Attendance(student_id=student.id, teacher_id=teacher.id,
+                                          date=date.today() - timedelta(days=day), status='absent' if day < 2 else 'present'))
+            db.session.add(BehaviorNote(student_id=student.id, teacher_id=teacher.id, note_type='negative',
+                                        note='-', date_recorded=today - timedelta(days=2)))
+        db.session.commit()
+
+        service = AIService(client=object())
+        records = service._load_records(students, 'risk')
+        scores = RiskScoringService.score(students)
+        for student_id in students:
+            factors = service._analyze_risk_factors(*records[student_id][2])
+            row = scores.loc[student_id]
+            assert factors['grade_trend'] == row['grade_trend'] == 'declining'
+            assert factors['poor_attendance'] == bool(row['poor_attendance'])
+            assert factors['behavioral_issues'] == bool(row['behavioral_issues'])
+            assert service._determine_risk_level(factors) == row['risk_level'] == 'high'
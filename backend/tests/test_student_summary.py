@@ -0,0 +1,152 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from src.models.user import db, User, Student, Teacher, Grade, Attendance, BehaviorNote
+from src.models.extended_models import StudentSummary
+from src.services.student_summary import StudentSummaryService
+
+SUBJECTS = ['math', 'physics', 'arabic']
+ATTENDANCE_STATUSES = ['present', 'absent', 'late', 'excused', 'sick']
+NOTE_TYPES = ['positive', 'negative', 'neutral']
+START = datetime(2026, 1, 1, 8, 0)
+
+
+def add_user(role, name):
+    user = User(username=name, email=f'{name}@example.com', role=role, name=name, is_active=True)
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def add_student(n):
+    student = Student(user_id=add_user('student', f'student{n}').id, student_id=f'S{n:04d}', class_name='3أ')
+    db.session.add(student)
+    db.session.flush()
+    return student
+
+
+@pytest.fixture
+def school(app):
+    with app.app_context():
+        teacher = Teacher(user_id=add_user('teacher', 'teacher').id, teacher_id='T0001')
+        db.session.add(teacher)
+        students = [add_student(n) for n in range(3)]
+        db.session.commit()
+        yield teacher.id, [student.id for student in students]
+
+
+def assert_summaries_match(student_ids):
+    """الملخص المحدث تدريجياً يساوي الملخص المحسوب من السجلات الخام"""
+    connection = db.session.connection()
+    expected = StudentSummaryService.compute(connection, student_ids)
+    table = StudentSummary.__table__
+    stored = {row.student_id: dict(row._mapping) for row in connection.execute(select(table))}
+    for student_id in student_ids:
+        assert student_id in stored, f'no summary row for student {student_id}'
+        stored[student_id].pop('updated_at')
+        expected[student_id].pop('updated_at')
+        assert stored[student_id] == expected[student_id]
+
+
+def test_new_student_gets_summary_row(app, school):
+    _, student_ids = school
+    with app.app_context():
+        rows = db.session.execute(select(StudentSummary.student_id).order_by(StudentSummary.student_id))
+        assert rows.scalars().all() == student_ids
+        assert_summaries_match(student_ids)
+
+
+def test_dashboard_of_new_student_stays_within_budget(app, client, school):
+    _, student_ids = school
+    with app.app_context():
+        user_id = db.session.get(Student, student_ids[0]).user_id
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = 'student'
+
+    # QUERY_BUDGET_STRICT: تجاوز @query_budget(8) يرفع QueryBudgetExceeded
+    response = client.get('/api/dashboard?grades_limit=-1')
+
+    assert response.status_code == 200
+
+
+def test_removing_extremes_and_endpoints(app, school):
+    teacher_id, student_ids = school
+    student_id = student_ids[0]
+    with app.app_context():
+        grades = []
+        for day, value in enumerate([70.0, 50.0, 90.0, 60.0, 80.0]):
+            grade = Grade(student_id=student_id, teacher_id=teacher_id, subject='math', grade=value,
+                          grade_type='exam', date_recorded=START + timedelta(days=day))
+            db.session.add(grade)
+            grades.append(grade)
+        db.session.commit()
+        assert_summaries_match(student_ids)
+
+        # الحد الأدنى، ثم الحد الأعلى، ثم أول درجة، ثم آخر درجة
+        for grade in (grades[1], grades[2], grades[0], grades[4]):
+            db.session.delete(grade)
+            db.session.commit()
+            assert_summaries_match(student_ids)
+
+        attendance = [
+            Attendance(student_id=student_id, teacher_id=teacher_id, date=date(2026, 1, day), status='present')
+            for day in (1, 2, 3)
+        ]
+        db.session.add_all(attendance)
+        db.session.commit()
+        db.session.delete(attendance[-1])  # آخر تاريخ حضور
+        db.session.commit()
+        assert_summaries_match(student_ids)
+
+
+def random_values(rng, model, student_ids):
+    when = START + timedelta(days=rng.randrange(60), minutes=rng.randrange(600))
+    values = {'student_id': rng.choice(student_ids)}
+    if model is Grade:
+        # أنصاف الدرجات ممثلة تماماً في float، فالمجاميع قابلة للمقارنة بالتساوي
+        values.update(subject=rng.choice(SUBJECTS), grade=rng.randrange(0, 201) / 2,
+                      grade_type='exam', date_recorded=rng.choice([when, START]))
+    elif model is Attendance:
+        values.update(status=rng.choice(ATTENDANCE_STATUSES), date=when.date())
+    else:
+        values.update(note_type=rng.choice(NOTE_TYPES), note='ملاحظة', date_recorded=when)
+    return values
+
+
+def random_change(rng, teacher_id, student_ids):
+    """إدراج أو تعديل (بما فيه نقل السجل لطالب آخر) أو حذف سجل عشوائي"""
+    model = rng.choice([Grade, Grade, Attendance, BehaviorNote])
+    rows = model.query.all()
+    action = rng.choice(['insert', 'update', 'delete']) if rows else 'insert'
+
+    if action == 'insert':
+        db.session.add(model(teacher_id=teacher_id, **random_values(rng, model, student_ids)))
+    elif action == 'update':
+        row = rng.choice(rows)
+        values = random_values(rng, model, student_ids)
+        for column in rng.sample(sorted(values), rng.randint(1, len(values))):
+            setattr(row, column, values[column])
+    else:
+        db.session.delete(rng.choice(rows))
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_incremental_updates_match_full_recompute(app, school, seed):
+    teacher_id, student_ids = school
+    rng = random.Random(seed)
+    with app.app_context():
+        for step in range(300):
+            # أحياناً عدة تغييرات في flush واحد (نفس السجل قد يتغير مرتين)
+            for _ in range(rng.choice([1, 1, 1, 3])):
+                random_change(rng, teacher_id, student_ids)
+                if rng.random() < 0.5:
+                    db.session.flush()
+            db.session.commit()
+            assert_summaries_match(student_ids)
+
+        assert Grade.query.count() > 0
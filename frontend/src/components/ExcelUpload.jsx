@@ -1,5 +1,9 @@
 import React, { useState } from 'react';
 
+// متابعة مهمة الاستيراد: كل ثانية لمدة أقصاها 30 دقيقة
+const POLL_INTERVAL_MS = 1000;
+const POLL_TIMEOUT_MS = 30 * 60 * 1000;
+
 const ExcelUpload = ({ onUpload, type = 'students' }) => {
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
@@ -34,9 +38,29 @@ const ExcelUpload = ({ onUpload, type = 'students' }) => {
       });
 
       if (response.ok) {
-        const result = await response.json();
-        alert(`تم رفع ${result.count} ${type === 'students' ? 'طالب' : 'شعبة'} بنجاح!`);
-        if (onUpload) onUpload(result);
+        // الاستيراد يعمل في الخلفية: متابعة المهمة حتى انتهائها
+        let { import_job: job, status_url: statusUrl } = await response.json();
+        const deadline = Date.now() + POLL_TIMEOUT_MS;
+        while (job.status === 'pending' || job.status === 'processing') {
+          if (Date.now() > deadline) {
+            alert('الاستيراد ما زال قيد المعالجة؛ تابع حالته لاحقاً');
+            return;
+          }
+          await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+          const statusResponse = await fetch(statusUrl);
+          const status = await statusResponse.json();
+          if (!statusResponse.ok) {
+            alert(`خطأ في متابعة الاستيراد: ${status.error}`);
+            return;
+          }
+          job = status.import_job;
+        }
+        if (job.status === 'failed') {
+          alert('فشل استيراد الملف');
+          return;
+        }
+        alert(`تم رفع ${job.success_count} ${type === 'students' ? 'طالب' : 'شعبة'} بنجاح!`);
+        if (onUpload) onUpload(job);
         setFile(null);
         setPreview([]);
       } else {